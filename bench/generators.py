@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Seeded synthetic input generators for the LABS gates.
+
+Each `generate_chNN(out_dir, rows, seed)` writes a directory laid out like
+that chapter's own inputs, scaled to `rows` rows, and returns the number of
+"rows" the gate will process. Files are streamed (CSV line by line, the
+big JSON list of CH07 and CH10 item by item), so scales up to 10^8 rows
+only cost disk space, not memory. The gates themselves still load CH07
+and CH10 JSON whole.
+
+The same (rows, seed) pair always produces byte-identical files, so
+benchmark runs on different machines or commits see the same data.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator
+
+
+SEGMENTS = ["A", "B", "C", "D"]
+FIRST_NAMES = ["Alice", "Bob", "Charlie", "Dana", "Eve", "Frank", "Grace", "Heidi"]
+
+
+def _write_json(path: Path, payload: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+
+
+def _write_json_list(path: Path, payload: Dict[str, Any], key: str, items: Iterator[Any]) -> None:
+    """`_write_json` with `payload[key]` streamed from `items`, one item per line."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    marker = json.dumps("\0stream")
+    head, tail = json.dumps({**payload, key: "\0stream"}, ensure_ascii=False, indent=2).split(marker, 1)
+    with path.open("w", encoding="utf-8") as f:
+        f.write(head + "[")
+        sep = "\n    "
+        for item in items:
+            f.write(sep + json.dumps(item, ensure_ascii=False))
+            sep = ",\n    "
+        f.write("\n  ]" + tail)
+
+
+def _write_lines(path: Path, header: str, lines: Iterator[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", newline="") as f:
+        f.write(header + "\n")
+        buf = []
+        for line in lines:
+            buf.append(line)
+            if len(buf) >= 10_000:
+                f.write("\n".join(buf) + "\n")
+                buf.clear()
+        if buf:
+            f.write("\n".join(buf) + "\n")
+
+
+def _customer_id(i: int) -> str:
+    return f"C{i:09d}"
+
+
+def generate_ch02(out_dir: Path, rows: int, seed: int) -> int:
+    """Boundary config + `rows` change requests as JSON Lines."""
+    rng = random.Random(seed)
+    _write_json(
+        out_dir / "boundary_config.json",
+        {
+            "chapter": "CH02",
+            "allowed_path_prefixes": ["labs/ch02/"],
+            "limits": {"max_files_changed": 4, "max_hunks_per_file": 3, "max_lines_added": 120},
+            "rb30": {"required": True, "allowed_anchor_types": ["tag", "swap", "tt"]},
+        },
+    )
+
+    def requests() -> Iterator[str]:
+        for i in range(rows):
+            files = [
+                {
+                    "path": f"labs/ch02/file_{rng.randrange(1000)}.txt",
+                    "hunks": [
+                        {"lines_added": rng.randint(0, 40), "lines_removed": rng.randint(0, 10)}
+                        for _ in range(rng.randint(1, 3))
+                    ],
+                }
+                for _ in range(rng.randint(1, 4))
+            ]
+            yield json.dumps(
+                {
+                    "change_id": f"bench-{i:09d}",
+                    "chapter": "CH02",
+                    "mode": "labs",
+                    "files": files,
+                    "rb30_anchor": {"type": rng.choice(["tag", "swap", "tt"]), "ref": f"pre-bench-{i:09d}"},
+                },
+                separators=(",", ":"),
+            )
+
+    path = out_dir / "change_requests.jsonl"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        for line in requests():
+            f.write(line + "\n")
+    return rows
+
+
+def generate_ch04(out_dir: Path, rows: int, seed: int) -> int:
+    """raw/bronze/silver/gold `customers.csv`, `rows` customers per layer."""
+    rng = random.Random(seed)
+    names = [rng.choice(FIRST_NAMES) for _ in range(min(rows, 4096) or 1)]
+
+    def name(i: int) -> str:
+        return f"{names[i % len(names)]}{i}"
+
+    _write_lines(out_dir / "raw" / "customers.csv", "customer_id,name",
+                 (f"{_customer_id(i)},{name(i)}" for i in range(rows)))
+    _write_lines(out_dir / "bronze" / "customers.csv", "customer_id,name,email",
+                 (f"{_customer_id(i)},{name(i)},{name(i).lower()}@example.com" for i in range(rows)))
+    _write_lines(out_dir / "silver" / "customers.csv", "customer_id,name,email,is_active",
+                 (f"{_customer_id(i)},{name(i)},{name(i).lower()}@example.com,{'true' if i % 7 else 'false'}"
+                  for i in range(rows)))
+    _write_lines(out_dir / "gold" / "customers.csv", "customer_id,segment",
+                 (f"{_customer_id(i)},{SEGMENTS[i % len(SEGMENTS)]}" for i in range(rows)))
+    return 4 * rows
+
+
+def generate_ch06(out_dir: Path, rows: int, seed: int) -> int:
+    """`rows` transactions over rows/4 policies, with hub and satellite."""
+    rng = random.Random(seed)
+    policies = max(1, rows // 4)
+    _write_lines(out_dir / "raw" / "transactions.csv", "txn_id,policy_id,amount",
+                 (f"T{i:09d},P{rng.randrange(policies):09d},{rng.uniform(10, 500):.2f}" for i in range(rows)))
+    _write_lines(out_dir / "vault" / "hub_policy.csv", "policy_id",
+                 (f"P{i:09d}" for i in range(policies)))
+    _write_lines(out_dir / "vault" / "sat_policy_details.csv", "policy_id,status",
+                 (f"P{i:09d},{'active' if i % 5 else 'lapsed'}" for i in range(policies)))
+    return rows + 2 * policies
+
+
+def generate_ch07(out_dir: Path, rows: int, seed: int) -> int:
+    """Change pack with `rows` changes plus a minimal snapshot."""
+    rng = random.Random(seed)
+    _write_json(
+        out_dir / "state_snapshot.json",
+        {
+            "chapters": {},
+            "boundary": {"allowed_targets": ["production", "staging"]},
+            "metrics": {
+                "current_model": {"id": "ch07_model_v1", "auc": 0.92},
+                "candidate_model": {"id": "ch07_model_v2", "auc": 0.94},
+                "min_auc": 0.90,
+                "max_delta_auc": 0.05,
+            },
+        },
+    )
+    _write_json_list(
+        out_dir / "change_pack.json",
+        {
+            "kind": "ai_generated_change_pack",
+            "chapter": "CH07",
+            "mode": "labs",
+            "rb30_anchor": {"type": "tag", "ref": "pre-bench"},
+            "metrics": {"reason": "Synthetic benchmark pack.", "confidence": 0.5},
+        },
+        "changes",
+        (
+            {
+                "type": "model_promotion",
+                "target": rng.choice(["production", "staging"]),
+                "from_model_id": "ch07_model_v1",
+                "to_model_id": f"ch07_model_{i}",
+                "expected_auc": round(rng.uniform(0.9, 0.95), 3),
+            }
+            for i in range(rows)
+        ),
+    )
+    return rows
+
+
+def generate_ch09(out_dir: Path, rows: int, seed: int) -> int:
+    """On-prem and cloud `customers.csv` with `rows` rows each."""
+    _write_json(out_dir / "ch09_migration_plan.json",
+                {"plan_id": "bench", "tables": [{"name": "customers", "mode": "dual_write"}]})
+    for side in ("onprem", "cloud"):
+        _write_lines(out_dir / side / "customers.csv", "customer_id,name",
+                     (f"{_customer_id(i)},{FIRST_NAMES[(i + seed) % len(FIRST_NAMES)]}" for i in range(rows)))
+    return 2 * rows
+
+
+def generate_ch10(out_dir: Path, rows: int, seed: int) -> int:
+    """`rows` workloads over rows/50 warehouses."""
+    rng = random.Random(seed)
+    warehouses = max(2, rows // 50)
+    caps = [rng.choice([16, 32, 64, 128]) for _ in range(warehouses)]
+    _write_json(out_dir / "warehouses.json",
+                {"warehouses": [{"id": f"wh{i:05d}", "max_concurrency": caps[i]} for i in range(warehouses)]})
+    _write_json_list(
+        out_dir / "workloads.json",
+        {},
+        "workloads",
+        (
+            {
+                "id": f"w{i:09d}",
+                "name": f"workload_{i}",
+                "avg_query_seconds": rng.choice([5, 30, 60, 120]),
+                "concurrency": rng.randint(1, 4),
+                "assigned_warehouse": f"wh{rng.randrange(warehouses):05d}",
+            }
+            for i in range(rows)
+        ),
+    )
+    return rows
+
+
+GENERATORS: Dict[str, Callable[[Path, int, int], int]] = {
+    "CH02": generate_ch02,
+    "CH04": generate_ch04,
+    "CH06": generate_ch06,
+    "CH07": generate_ch07,
+    "CH09": generate_ch09,
+    "CH10": generate_ch10,
+}
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+LABS gate benchmarks (dev helper).
+
+For every (chapter, scale) case:
+
+1. Generate seeded synthetic inputs with `bench/generators.py`
+   (or reuse them from `--data-dir` if a previous run left them there).
+2. In a fresh child process, import the chapter's `run.py` and time its
+   core evaluate function on those inputs: parsing + checks, no
+   `artifacts/result.json` write.
+3. Record wall time, CPU time, peak RSS and rows/s.
+
+Results are written as JSON under `bench/results/` so a later run can be
+compared against them with `--baseline`.
+
+Usage:
+
+    python bench/run_bench.py                          # default chapters, 1e3..1e5
+    python bench/run_bench.py --chapters CH04 CH09 --scales 1e6 1e7
+    python bench/run_bench.py --baseline bench/results/<earlier>.json
+
+Exit code: 0 when every case ran (and nothing regressed against the
+baseline), 1 on a regression, 2 when a case crashed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / "results"
+
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+from generators import GENERATORS  # noqa: E402
+from run_labs import discover_chapters, import_module  # noqa: E402
+
+
+DEFAULT_SCALES = [1_000, 10_000, 100_000]
+DEFAULT_TOLERANCE = 0.25
+
+
+def _load_json(path: Path) -> Dict[str, Any]:
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _case_ch02(module: Any, data_dir: Path) -> str:
+    boundary = module.load_json(data_dir / "boundary_config.json")
+    status = "accept"
+    with (data_dir / "change_requests.jsonl").open("r", encoding="utf-8") as f:
+        for line in f:
+            if module.evaluate_change_request(boundary, json.loads(line))["status"] != "accept":
+                status = "reject"
+    return status
+
+
+def _case_ch04(module: Any, data_dir: Path) -> str:
+    return module.evaluate_layers(data_dir)["status"]
+
+
+def _case_ch06(module: Any, data_dir: Path) -> str:
+    return module.evaluate_vault(data_dir)["status"]
+
+
+def _case_ch07(module: Any, data_dir: Path) -> str:
+    errors: List[str] = []
+    snapshot = module.load_json(data_dir / "state_snapshot.json", errors)
+    pack = module.load_json(data_dir / "change_pack.json", errors)
+    return module.evaluate_change_pack(snapshot, pack, errors)["status"]
+
+
+def _case_ch09(module: Any, data_dir: Path) -> str:
+    plan = module.load_json(data_dir / "ch09_migration_plan.json")
+    return module.evaluate_migration(plan, data_dir / "onprem", data_dir / "cloud")["status"]
+
+
+def _case_ch10(module: Any, data_dir: Path) -> str:
+    workloads = module.load_json(data_dir / "workloads.json")
+    warehouses = module.load_json(data_dir / "warehouses.json")
+    return module.evaluate_scaling(workloads, warehouses, data_dir)["status"]
+
+
+CASES: Dict[str, Callable[[Any, Path], str]] = {
+    "CH02": _case_ch02,
+    "CH04": _case_ch04,
+    "CH06": _case_ch06,
+    "CH07": _case_ch07,
+    "CH09": _case_ch09,
+    "CH10": _case_ch10,
+}
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure_case(chapter: str, data_dir: str) -> Dict[str, Any]:
+    """Child-process entry point: import the chapter and time one gate run."""
+    module = import_module(f"labs_{chapter.lower()}_run", discover_chapters()[chapter])
+    rss_before = _peak_rss_mb()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    status = CASES[chapter](module, Path(data_dir))
+    return {
+        "status": status,
+        "wall_seconds": time.perf_counter() - wall_start,
+        "cpu_seconds": time.process_time() - cpu_start,
+        "rss_before_mb": rss_before,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def prepare_data(chapter: str, rows: int, seed: int, root: Path) -> tuple[Path, int]:
+    """Generate (or reuse) the inputs for one case; return (dir, rows processed)."""
+    data_dir = root / f"{chapter.lower()}-{rows}-seed{seed}"
+    marker = data_dir / ".complete"
+    if marker.exists():
+        return data_dir, int(marker.read_text(encoding="utf-8"))
+    if data_dir.exists():
+        shutil.rmtree(data_dir)
+    processed = GENERATORS[chapter](data_dir, rows, seed)
+    marker.write_text(str(processed), encoding="utf-8")
+    return data_dir, processed
+
+
+def run_case(chapter: str, rows: int, seed: int, data_root: Path) -> Dict[str, Any]:
+    gen_start = time.perf_counter()
+    data_dir, processed = prepare_data(chapter, rows, seed, data_root)
+    entry: Dict[str, Any] = {
+        "chapter": chapter,
+        "scale": rows,
+        "rows_processed": processed,
+        "generate_seconds": round(time.perf_counter() - gen_start, 3),
+    }
+    # A fresh spawn-ed child per case keeps peak RSS per case honest.
+    ctx = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            measured = pool.submit(measure_case, chapter, str(data_dir)).result()
+    except Exception as e:  # noqa: BLE001
+        entry.update({"outcome": "error", "reason": f"{type(e).__name__}: {e}"})
+        return entry
+
+    wall = measured["wall_seconds"]
+    entry.update(
+        {
+            "outcome": measured["status"],
+            "wall_seconds": round(wall, 4),
+            "cpu_seconds": round(measured["cpu_seconds"], 4),
+            "peak_rss_mb": round(measured["peak_rss_mb"], 1),
+            "rss_before_mb": round(measured["rss_before_mb"], 1),
+            "rows_per_second": round(processed / wall, 1) if wall > 0 else None,
+        }
+    )
+    return entry
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """Return one row per case present in both runs, flagging slowdowns beyond `tolerance`."""
+    previous = {
+        (r["chapter"], r["scale"]): r
+        for r in baseline.get("results", [])
+        if r.get("wall_seconds")
+    }
+    rows = []
+    for r in results:
+        old = previous.get((r["chapter"], r["scale"]))
+        if old is None or not r.get("wall_seconds"):
+            continue
+        ratio = r["wall_seconds"] / old["wall_seconds"]
+        rows.append(
+            {
+                "chapter": r["chapter"],
+                "scale": r["scale"],
+                "baseline_wall_seconds": old["wall_seconds"],
+                "wall_seconds": r["wall_seconds"],
+                "wall_ratio": round(ratio, 3),
+                "baseline_peak_rss_mb": old.get("peak_rss_mb"),
+                "peak_rss_mb": r.get("peak_rss_mb"),
+                "regressed": ratio > 1 + tolerance,
+            }
+        )
+    return rows
+
+
+def _parse_scale(value: str) -> int:
+    try:
+        return int(float(value))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a row count: {value!r}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark LABS gates on synthetic data.")
+    parser.add_argument("--chapters", nargs="*", default=sorted(CASES), help="Chapters to benchmark.")
+    parser.add_argument("--scales", nargs="*", type=_parse_scale, default=DEFAULT_SCALES,
+                        help="Row counts, e.g. 1e3 1e6 (default: 1e3 1e4 1e5).")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", type=Path, default=None,
+                        help="Keep generated inputs here and reuse them across runs (default: temp dir).")
+    parser.add_argument("--out", type=Path, default=None,
+                        help="Result file (default: bench/results/bench-<utc>.json).")
+    parser.add_argument("--baseline", type=Path, default=None, help="Earlier result file to compare against.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed wall-time slowdown vs baseline (default: 0.25 = 25%%).")
+    args = parser.parse_args(argv)
+
+    chapters = [c.upper() for c in args.chapters]
+    unknown = sorted(set(chapters) - set(CASES))
+    if unknown:
+        parser.error(f"no benchmark for chapters: {unknown}")
+
+    now = datetime.now(timezone.utc)
+    tmp = None
+    if args.data_dir is None:
+        tmp = tempfile.TemporaryDirectory(prefix="labs-bench-")
+        data_root = Path(tmp.name)
+    else:
+        data_root = args.data_dir
+        data_root.mkdir(parents=True, exist_ok=True)
+
+    results: List[Dict[str, Any]] = []
+    try:
+        for chapter in chapters:
+            for rows in args.scales:
+                entry = run_case(chapter, rows, args.seed, data_root)
+                results.append(entry)
+                if entry["outcome"] == "error":
+                    print(f"[{chapter}] {rows:>11,} rows  error  ({entry['reason']})")
+                else:
+                    print(
+                        f"[{chapter}] {rows:>11,} rows  {entry['outcome']:<7}"
+                        f" {entry['wall_seconds']:9.3f} s  {entry['peak_rss_mb']:8.1f} MB"
+                        f"  {entry['rows_per_second']:>14,.0f} rows/s"
+                    )
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "created_utc": now.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "git_rev": _git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": multiprocessing.cpu_count(),
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+    code = 2 if any(r["outcome"] == "error" for r in results) else 0
+    if args.baseline is not None:
+        comparison = compare(results, _load_json(args.baseline), args.tolerance)
+        report["baseline"] = {"path": str(args.baseline), "tolerance": args.tolerance, "cases": comparison}
+        for row in comparison:
+            flag = "REGRESSED" if row["regressed"] else "ok"
+            print(f"[{row['chapter']}] {row['scale']:>11,} rows  x{row['wall_ratio']:.2f} vs baseline  {flag}")
+        if code == 0 and any(row["regressed"] for row in comparison):
+            code = 1
+
+    out_path = args.out or RESULTS_DIR / f"bench-{now.strftime('%Y%m%dT%H%M%SZ')}.json"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with out_path.open("w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    print(f"[BENCH] {len(results)} case(s) → {out_path}, exit={code}")
+    return code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
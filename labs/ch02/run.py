@@ -7,28 +7,48 @@ evaluates the request against boundary, unit limits, and RB-30,
 and writes a deterministic JSON result to artifacts/result.json.
 """
 
-import json
+import sys
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 
 HERE = Path(__file__).resolve().parent
 INPUTS_DIR = HERE / "inputs"
+SCHEMAS_DIR = HERE / "schemas"
 ARTIFACTS_DIR = HERE / "artifacts"
+RESULT_PATH = ARTIFACTS_DIR / "result.json"
 
+LABS_DIR = str(HERE.parent)
+if LABS_DIR not in sys.path:
+    sys.path.insert(0, LABS_DIR)
 
-def load_json(path: Path) -> Dict[str, Any]:
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+from common import perf
+from common.fastio import load_json
+from common.refindex import RefIndex, ref_index
+from common.validation import rejected, validate_inputs
+
+REPO_ROOT = HERE.parent.parent
 
 
 def ensure_artifacts_dir() -> None:
     ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
 
 
+def load_ref_index(boundary_config: Dict[str, Any]) -> Optional[RefIndex]:
+    """The repository ref index when `rb30.verify_refs` is on (else None).
+
+    Build it once and pass it to every `evaluate_change_request` call.
+    """
+    rb30_cfg = boundary_config.get("rb30", {})
+    if not rb30_cfg.get("verify_refs", False):
+        return None
+    return ref_index(REPO_ROOT / rb30_cfg.get("repo", "."))
+
+
 def evaluate_change_request(
     boundary_config: Dict[str, Any],
     change_request: Dict[str, Any],
+    refs: Optional[RefIndex] = None,
 ) -> Dict[str, Any]:
     # Summary metrics
     files = change_request.get("files", [])
@@ -66,6 +86,7 @@ def evaluate_change_request(
     allowed_types = rb30_cfg.get("allowed_anchor_types", [])
 
     anchor = change_request.get("rb30_anchor")
+    anchor_unresolved = None
     if not required and anchor is None:
         rb30_ok = True
     elif anchor is None:
@@ -73,6 +94,11 @@ def evaluate_change_request(
     else:
         anchor_type = anchor.get("type")
         rb30_ok = (not allowed_types) or (anchor_type in allowed_types)
+        # With a ref index, git-backed anchors must name an existing ref or commit.
+        if rb30_ok and refs is not None and anchor_type in rb30_cfg.get("verify_anchor_types", ["tag"]):
+            if refs.resolve(str(anchor.get("ref", ""))) is None:
+                rb30_ok = False
+                anchor_unresolved = anchor.get("ref")
 
     # Overall status
     status = "accept" if (boundary_ok and unit_ok and rb30_ok) else "reject"
@@ -91,11 +117,11 @@ def evaluate_change_request(
             "rb30_ok": bool(rb30_ok),
         },
         "status": status,
-        "messages": build_messages(boundary_ok, unit_ok, rb30_ok),
+        "messages": build_messages(boundary_ok, unit_ok, rb30_ok, anchor_unresolved),
     }
 
 
-def build_messages(boundary_ok: bool, unit_ok: bool, rb30_ok: bool) -> List[str]:
+def build_messages(boundary_ok: bool, unit_ok: bool, rb30_ok: bool, anchor_unresolved: Any = None) -> List[str]:
     messages: List[str] = []
 
     if boundary_ok:
@@ -110,28 +136,55 @@ def build_messages(boundary_ok: bool, unit_ok: bool, rb30_ok: bool) -> List[str]
 
     if rb30_ok:
         messages.append("RB-30 anchor is present and allowed.")
+    elif anchor_unresolved is not None:
+        messages.append(f"RB-30 anchor ref {anchor_unresolved!r} does not exist in the repository.")
     else:
         messages.append("RB-30 anchor is missing or uses a disallowed type.")
 
     return messages
 
 
-def main() -> None:
+def run_lab() -> Dict[str, Any]:
+    """Load inputs, evaluate them, and write artifacts/result.json."""
     boundary_config_path = INPUTS_DIR / "boundary_config.json"
     change_request_path = INPUTS_DIR / "change_request.json"
 
-    boundary_config = load_json(boundary_config_path)
-    change_request = load_json(change_request_path)
+    ensure_artifacts_dir()
+    with perf.session("CH02", ARTIFACTS_DIR):
+        with perf.phase("load"):
+            boundary_config = load_json(boundary_config_path)
+            change_request = load_json(change_request_path)
+
+        with perf.phase("validate"):
+            errors = validate_inputs({
+                "boundary_config.json": (SCHEMAS_DIR / "boundary_config.schema.json", boundary_config),
+                "change_request.json": (SCHEMAS_DIR / "change_request.schema.json", change_request),
+            })
 
-    result = evaluate_change_request(boundary_config, change_request)
+        refs = None
+        if not errors:
+            try:
+                refs = load_ref_index(boundary_config)
+            except ValueError as e:
+                errors = {"boundary_config.json": [f"$.rb30.repo: {e}"]}
 
-    ensure_artifacts_dir()
-    artifacts_path = ARTIFACTS_DIR / "result.json"
-    with artifacts_path.open("w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+        if errors:
+            change_id = change_request.get("change_id") if isinstance(change_request, dict) else None
+            result = rejected("CH02", change_id, errors)
+        else:
+            with perf.phase("evaluate"):
+                result = evaluate_change_request(boundary_config, change_request, refs)
+
+        perf.write_result(result, RESULT_PATH)
+
+    return result
+
+
+def main() -> None:
+    result = run_lab()
 
     # Human-friendly one-line summary（パスは Path から算出）
-    display_path = artifacts_path.relative_to(HERE)
+    display_path = RESULT_PATH.relative_to(HERE)
     print(f"[CH02] Lab completed. status={result['status']} → {display_path}")
 
 
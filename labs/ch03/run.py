@@ -1,12 +1,15 @@
 #!/usr/bin/env python
 from pathlib import Path
-import json
 import math
+import sys
 
+LABS_DIR = str(Path(__file__).resolve().parent.parent)
+if LABS_DIR not in sys.path:
+    sys.path.insert(0, LABS_DIR)
 
-def load_json(path: Path) -> dict:
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+from common import perf
+from common.fastio import load_json
+from common.validation import rejected, validate_inputs
 
 
 def compute_metrics(pipeline_cfg: dict, sli_slo_cfg: dict):
@@ -70,17 +73,7 @@ def compute_metrics(pipeline_cfg: dict, sli_slo_cfg: dict):
     return scenario_id, metrics, checks
 
 
-def main():
-    base_dir = Path(__file__).resolve().parent
-    inputs_dir = base_dir / "inputs"
-    artifacts_dir = base_dir / "artifacts"
-    artifacts_dir.mkdir(parents=True, exist_ok=True)
-
-    output_path = artifacts_dir / "result.json"
-
-    pipeline_cfg = load_json(inputs_dir / "integration_pipeline.json")
-    sli_slo_cfg = load_json(inputs_dir / "sli_slo_config.json")
-
+def evaluate_integration(pipeline_cfg: dict, sli_slo_cfg: dict) -> dict:
     scenario_id, metrics, checks = compute_metrics(pipeline_cfg, sli_slo_cfg)
 
     status = "accept" if checks.get("overall_ok", False) else "reject"
@@ -108,10 +101,39 @@ def main():
         "metrics": metrics,
     }
 
-    with output_path.open("w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    return result
+
 
-    print(f"[CH03] Lab completed. status={status} → {output_path.relative_to(base_dir)}")
+def run_lab():
+    base_dir = Path(__file__).resolve().parent
+    inputs_dir = base_dir / "inputs"
+    artifacts_dir = base_dir / "artifacts"
+    artifacts_dir.mkdir(parents=True, exist_ok=True)
+
+    output_path = artifacts_dir / "result.json"
+
+    with perf.session("CH03", artifacts_dir):
+        with perf.phase("load"):
+            pipeline_cfg = load_json(inputs_dir / "integration_pipeline.json")
+            sli_slo_cfg = load_json(inputs_dir / "sli_slo_config.json")
+        with perf.phase("validate"):
+            errors = validate_inputs({
+                "integration_pipeline.json": (base_dir / "schemas" / "integration_pipeline.schema.json", pipeline_cfg),
+                "sli_slo_config.json": (base_dir / "schemas" / "sli_slo_config.schema.json", sli_slo_cfg),
+            })
+        if errors:
+            result = rejected("CH03", "baseline", errors)
+        else:
+            with perf.phase("evaluate"):
+                result = evaluate_integration(pipeline_cfg, sli_slo_cfg)
+        perf.write_result(result, output_path)
+
+    return result
+
+
+def main():
+    result = run_lab()
+    print(f"[CH03] Lab completed. status={result['status']} → artifacts/result.json")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+CH04 columnar layer files (`customers.lcol`).
+
+A compact, typed, memory-mappable copy of a layer CSV so repeated
+consistency checks do not re-parse text:
+
+    magic "LABSCOL1" | uint32 header length | JSON header | 8-byte aligned buffers
+
+- Key columns, and string columns with few distinct values, are
+  dictionary-encoded: the distinct values sorted by their UTF-8 bytes
+  (`dict_offsets` + `dict_data`) plus one code per row (`codes`,
+  uint8/16/32 depending on the dictionary size).
+- Other string columns are stored plainly: `offsets` + `data` in row order.
+- `int64` / `float64` columns are stored as raw little-endian arrays, but
+  only when every value round-trips exactly through `int` / `float` (and,
+  for `int64`, fits in 64 bits). Key columns are always `string`.
+
+Because dictionaries are sorted, two layers have the same key *set* exactly
+when their key dictionaries are byte-identical, so `keys_consistent`
+becomes a memcmp instead of building Python sets. Row counts and column
+names come straight from the header.
+
+Usage:
+
+    python labs/ch04/columnar.py convert labs/ch04/inputs     # every layer
+    python labs/ch04/columnar.py convert path/to/customers.csv
+    python labs/ch04/columnar.py show labs/ch04/inputs/raw/customers.lcol
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+from array import array
+from itertools import accumulate
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+LABS_DIR = str(Path(__file__).resolve().parent.parent)
+if LABS_DIR not in sys.path:
+    sys.path.insert(0, LABS_DIR)
+
+from common import perf  # noqa: E402
+from common.fastio import iter_rows, read_header  # noqa: E402
+
+
+MAGIC = b"LABSCOL1"
+VERSION = 1
+SUFFIX = ".lcol"
+ALIGN = 8
+DEFAULT_KEY_COLUMNS = ("customer_id",)
+LAYERS = ("raw", "bronze", "silver", "gold")
+
+
+def _code_type(distinct: int) -> str:
+    if distinct <= 0xFF:
+        return "B"
+    if distinct <= 0xFFFF:
+        return "H"
+    return "I"
+
+
+def _as_little_endian(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(buf: memoryview, typecode: str) -> Any:
+    """Zero-copy view of a buffer on little-endian hosts, a swapped copy otherwise."""
+    if sys.byteorder == "little":
+        return buf.cast(typecode)
+    values = array(typecode, buf.tobytes())
+    values.byteswap()
+    return values
+
+
+INT64_MIN, INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+
+def _infer_type(distinct: Sequence[str]) -> str:
+    if not distinct:
+        return "string"
+    try:
+        # Integers outside int64 stay strings rather than overflow array("q").
+        if all(str(n := int(v)) == v and INT64_MIN <= n <= INT64_MAX for v in distinct):
+            return "int64"
+    except ValueError:
+        pass
+    try:
+        if all(repr(float(v)) == v for v in distinct):
+            return "float64"
+    except ValueError:
+        pass
+    return "string"
+
+
+def _offsets(encoded: Sequence[bytes]) -> Tuple[str, bytes]:
+    """Cumulative end offsets (leading 0) as uint32, or uint64 for >4 GiB of data."""
+    ends = array("Q", accumulate(map(len, encoded), initial=0))
+    typecode = "I" if ends[-1] <= 0xFFFFFFFF else "Q"
+    return typecode, _as_little_endian(ends if typecode == "Q" else array("I", ends))
+
+
+def write_columnar(
+    csv_path: Path,
+    out_path: Optional[Path] = None,
+    key_columns: Sequence[str] = DEFAULT_KEY_COLUMNS,
+) -> Path:
+    """Convert one CSV into a `.lcol` file (single streaming pass over the CSV)."""
+    out_path = out_path or csv_path.with_suffix(SUFFIX)
+    header = read_header(csv_path)
+
+    # One pass: provisional dictionary codes per column, in first-seen order.
+    seen: List[Dict[str, int]] = [{} for _ in header]
+    codes: List[array] = [array("I") for _ in header]
+    appenders = [c.append for c in codes]
+    rows = 0
+    for row in iter_rows(csv_path, columns=header, row_type="tuple"):
+        rows += 1
+        for d, append, value in zip(seen, appenders, row):
+            if value is None:
+                value = ""
+            append(d.setdefault(value, len(d)))
+
+    buffers: List[bytes] = []
+    offset = 0
+
+    def add(data: bytes) -> List[int]:
+        nonlocal offset
+        pad = -len(data) % ALIGN
+        buffers.append(data + b"\0" * pad)
+        start = offset
+        offset += len(data) + pad
+        return [start, len(data)]
+
+    columns_meta: List[Dict[str, Any]] = []
+    for name, d, provisional in zip(header, seen, codes):
+        distinct = list(d)
+        is_key = name in key_columns
+        col_type = "string" if is_key else _infer_type(distinct)
+        meta: Dict[str, Any] = {"name": name, "type": col_type, "distinct": len(distinct)}
+        if col_type != "string":
+            typecode, parse = ("q", int) if col_type == "int64" else ("d", float)
+            parsed = [parse(v) for v in distinct]
+            meta["encoding"] = "plain"
+            meta["buffers"] = {"values": add(_as_little_endian(array(typecode, map(parsed.__getitem__, provisional))))}
+        elif is_key or len(distinct) * 2 <= rows:
+            # Sort the dictionary by UTF-8 bytes and remap provisional codes.
+            encoded = [v.encode("utf-8") for v in distinct]
+            order = sorted(range(len(encoded)), key=encoded.__getitem__)
+            remap = array("I", bytes(4 * len(order)))
+            for new_code, old_code in enumerate(order):
+                remap[old_code] = new_code
+            sorted_values = [encoded[i] for i in order]
+            offset_type, offsets = _offsets(sorted_values)
+            code_type = _code_type(len(order))
+            meta["encoding"] = "dictionary"
+            meta["offset_type"] = offset_type
+            meta["code_type"] = code_type
+            meta["buffers"] = {
+                "dict_offsets": add(offsets),
+                "dict_data": add(b"".join(sorted_values)),
+                "codes": add(_as_little_endian(array(code_type, map(remap.__getitem__, provisional)))),
+            }
+        else:
+            encoded = [v.encode("utf-8") for v in distinct]
+            row_values = list(map(encoded.__getitem__, provisional))
+            offset_type, offsets = _offsets(row_values)
+            meta["encoding"] = "plain"
+            meta["offset_type"] = offset_type
+            meta["buffers"] = {"offsets": add(offsets), "data": add(b"".join(row_values))}
+        columns_meta.append(meta)
+
+    header_json = json.dumps(
+        {
+            "format": "labs-columnar",
+            "version": VERSION,
+            "byteorder": "little",
+            "rows": rows,
+            "source": csv_path.name,
+            "columns": columns_meta,
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+    prefix = MAGIC + struct.pack("<I", len(header_json)) + header_json
+    prefix += b"\0" * (-len(prefix) % ALIGN)
+
+    tmp = out_path.with_name(out_path.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(prefix)
+        for data in buffers:
+            f.write(data)
+    tmp.replace(out_path)
+    return out_path
+
+
+class ColumnarFile:
+    """Read-only, memory-mapped view of a `.lcol` file."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file = path.open("rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._file.close()
+            raise ValueError(f"{path}: not a columnar file (empty)")
+        self._view = view = memoryview(self._mm)
+        if bytes(view[: len(MAGIC)]) != MAGIC:
+            self.close()
+            raise ValueError(f"{path}: not a columnar file (bad magic)")
+        (header_len,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header: Dict[str, Any] = json.loads(bytes(view[start : start + header_len]))
+        if self.header.get("version") != VERSION:
+            self.close()
+            raise ValueError(f"{path}: unsupported columnar version {self.header.get('version')!r}")
+        data_start = start + header_len
+        data_start += -data_start % ALIGN
+        self._data = view[data_start:]
+        self._columns = {c["name"]: c for c in self.header["columns"]}
+        perf.count_read(path, rows=self.rows)
+
+    def __enter__(self) -> "ColumnarFile":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        try:
+            for view in (getattr(self, "_data", None), getattr(self, "_view", None)):
+                if view is not None:
+                    view.release()
+            if self._mm is not None:
+                self._mm.close()
+        except BufferError:
+            pass  # a caller still holds a view; the mapping goes away with it
+        self._mm = None
+        self._file.close()
+
+    @property
+    def rows(self) -> int:
+        return int(self.header["rows"])
+
+    @property
+    def columns(self) -> List[str]:
+        return [c["name"] for c in self.header["columns"]]
+
+    def _buffer(self, column: str, name: str) -> memoryview:
+        start, length = self._columns[column]["buffers"][name]
+        return self._data[start : start + length]
+
+    def dictionary(self, column: str) -> Tuple[Any, memoryview]:
+        """(offsets, data) of a string column's sorted dictionary, without copying."""
+        meta = self._columns[column]
+        if meta["encoding"] != "dictionary":
+            raise ValueError(f"{self.path}: column {column!r} is not dictionary-encoded")
+        offsets = _from_little_endian(self._buffer(column, "dict_offsets"), meta["offset_type"])
+        return offsets, self._buffer(column, "dict_data")
+
+    def distinct_values(self, column: str) -> List[str]:
+        offsets, data = self.dictionary(column)
+        return _decode_all(offsets, bytes(data))
+
+    def values(self, column: str) -> Iterator[Any]:
+        """Row values in file order (str, int or float by column type)."""
+        meta = self._columns[column]
+        if meta["type"] != "string":
+            yield from _from_little_endian(self._buffer(column, "values"), "q" if meta["type"] == "int64" else "d")
+        elif meta["encoding"] == "plain":
+            offsets = _from_little_endian(self._buffer(column, "offsets"), meta["offset_type"])
+            yield from _decode_all(offsets, bytes(self._buffer(column, "data")))
+        else:
+            words = self.distinct_values(column)
+            yield from map(words.__getitem__, _from_little_endian(self._buffer(column, "codes"), meta["code_type"]))
+
+    def key_set(self, column: str) -> "KeySet":
+        """The column's distinct values; the dictionary bytes are copied out of the mapping."""
+        meta = self._columns[column]
+        offsets, data = self.dictionary(column)
+        return KeySet(bytes(self._buffer(column, "dict_offsets")), bytes(data), len(offsets) - 1, meta["offset_type"])
+
+
+def _decode_all(offsets: Any, raw: bytes) -> List[str]:
+    return [raw[offsets[i] : offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+
+class KeySet:
+    """Distinct keys of a columnar key column, comparable with sets and other KeySets.
+
+    KeySet == KeySet compares the sorted dictionaries byte for byte;
+    comparing with a Python set decodes the keys once.
+    """
+
+    def __init__(self, offsets: bytes, data: bytes, size: int, offset_type: str) -> None:
+        self._offsets = offsets
+        self._data = data
+        self._size = size
+        self._offset_type = offset_type
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[str]:
+        offsets = _from_little_endian(memoryview(self._offsets), self._offset_type)
+        return iter(_decode_all(offsets, self._data))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, KeySet):
+            return self._offsets == other._offsets and self._data == other._data
+        if isinstance(other, (set, frozenset)):
+            return len(other) == self._size and set(self) == other
+        return NotImplemented
+
+    def __ne__(self, other: object) -> bool:
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None  # type: ignore[assignment]
+
+
+def columnar_path(csv_path: Path) -> Path:
+    return csv_path.with_suffix(SUFFIX)
+
+
+def is_fresh(col_path: Path, csv_path: Path) -> bool:
+    """Use the columnar copy only when it exists and is not older than its CSV."""
+    if not col_path.exists():
+        return False
+    if not csv_path.exists():
+        return True
+    return col_path.stat().st_mtime_ns >= csv_path.stat().st_mtime_ns
+
+
+def convert_inputs(
+    inputs_dir: Path,
+    table: str = "customers",
+    key_columns: Sequence[str] = DEFAULT_KEY_COLUMNS,
+) -> List[Path]:
+    """Write `<layer>/<table>.lcol` next to every layer CSV under `inputs_dir`."""
+    written = []
+    for layer in LAYERS:
+        csv_path = inputs_dir / layer / f"{table}.csv"
+        if csv_path.exists():
+            written.append(write_columnar(csv_path, key_columns=key_columns))
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="CH04 columnar layer files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert = sub.add_parser("convert", help="CSV -> .lcol (a file, or every layer under an inputs dir).")
+    convert.add_argument("path", type=Path)
+    convert.add_argument("--key", action="append", default=None, help="Key column(s); default: customer_id.")
+    show = sub.add_parser("show", help="Print the header of a .lcol file.")
+    show.add_argument("path", type=Path)
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        keys = tuple(args.key) if args.key else DEFAULT_KEY_COLUMNS
+        if args.path.is_dir():
+            written = convert_inputs(args.path, key_columns=keys)
+        else:
+            written = [write_columnar(args.path, key_columns=keys)]
+        for path in written:
+            print(f"[CH04] wrote {path}")
+        return 0
+
+    with ColumnarFile(args.path) as cf:
+        print(json.dumps(cf.header, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+CH04 multi-file layers: partition discovery and parallel scanning.
+
+A layer is normally one `<layer>/customers.csv`. It may instead be many
+partition files:
+
+- a directory `<layer>/customers/` (every `*.csv`, `*.csv.gz`,
+  `*.csv.zst` below it), picked up automatically when the single CSV
+  does not exist; or
+- any directory or glob named in `inputs/layers.json`:
+
+      {"layers": {"raw": "raw/customers/dt=*/part-*.csv"}, "workers": 8}
+
+  Paths are relative to `inputs/`; `workers` defaults to the CPU count.
+
+Each partition is scanned independently (in a process pool when there is
+more than one partition in total) into a mergeable partial: row count,
+column names and optionally a schema profile state. Keys never travel
+back through the pool and the parent never touches them:
+
+- each scan worker splits its partition's distinct keys by `crc32(key)`
+  into one shard file per worker, raw UTF-8 keys one per line;
+- one compare task per shard then unions each layer's keys of that
+  shard and checks the four sets agree. A key always lands in the same
+  shard, so the per-shard distinct counts add up to the layer's.
+
+The parent only reduces partials and per-shard counts, O(partitions)
+work, into the same numbers `run.py` already reports (`row_counts`,
+`keys_consistent`, `num_columns`). With `workers` 1 everything runs in
+process and the four key sets are compared directly.
+
+When every layer is a single file nothing is spawned and the original
+single-file path is used, including `.lcol` key dictionaries.
+"""
+
+from __future__ import annotations
+
+import glob
+import marshal
+import multiprocessing
+import os
+import shutil
+import site
+import sys
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+HERE = Path(__file__).resolve().parent
+LABS_DIR = str(HERE.parent)
+if LABS_DIR not in sys.path:
+    sys.path.insert(0, LABS_DIR)
+
+from columnar import LAYERS, ColumnarFile, columnar_path, is_fresh  # noqa: E402
+from common import perf  # noqa: E402
+from common.fastio import iter_rows, load_json, read_header, read_keys  # noqa: E402
+from schema_profile import LayerProfile, profile_layer  # noqa: E402
+
+
+LAYOUT_FILE = "layers.json"
+PARTITION_SUFFIXES = (".csv", ".csv.gz", ".csv.zst")
+
+
+def _is_partition(path: Path) -> bool:
+    return path.is_file() and path.name.endswith(PARTITION_SUFFIXES)
+
+
+def resolve_partitions(inputs_dir: Path, spec: str) -> List[Path]:
+    """Files for one layer spec: a file, a directory (recursive) or a glob."""
+    path = inputs_dir / spec
+    if glob.has_magic(spec):
+        return sorted(p for p in map(Path, glob.glob(str(path), recursive=True)) if _is_partition(p))
+    if path.is_dir():
+        return sorted(p for p in path.rglob("*") if _is_partition(p))
+    return [path]
+
+
+def layer_sources(inputs_dir: Path, table: str = "customers") -> Dict[str, List[Path]]:
+    """{layer: [partition files]} using `layers.json` overrides, a `<table>/`
+    directory, or the single `<table>.csv`, in that order."""
+    layout: Dict[str, Any] = {}
+    if (inputs_dir / LAYOUT_FILE).exists():
+        layout = load_json(inputs_dir / LAYOUT_FILE).get("layers", {})
+    sources = {}
+    for layer in LAYERS:
+        spec = layout.get(layer)
+        if spec is None:
+            single = f"{layer}/{table}.csv"
+            spec = f"{layer}/{table}" if not (inputs_dir / single).exists() and (inputs_dir / layer / table).is_dir() else single
+        sources[layer] = resolve_partitions(inputs_dir, spec)
+    return sources
+
+
+def configured_workers(inputs_dir: Path) -> int:
+    if (inputs_dir / LAYOUT_FILE).exists():
+        workers = load_json(inputs_dir / LAYOUT_FILE).get("workers")
+        if workers:
+            return int(workers)
+    return os.cpu_count() or 1
+
+
+def _write_shards(paths: List[str], keys: Iterable[str]) -> None:
+    """Split `keys` across the shard files `paths` by crc32 of the key.
+
+    A shard file is a tag byte and the UTF-8 keys: `L` and one key per
+    line, or `M` and a `marshal`-ed list when some key contains a newline.
+    """
+    crc32 = zlib.crc32
+    shards: List[List[bytes]] = [[] for _ in paths]
+    n = len(paths)
+    for k in keys:
+        kb = k.encode("utf-8")
+        shards[crc32(kb) % n].append(kb)
+    for path, shard in zip(paths, shards):
+        data = b"\n".join(shard)
+        with open(path, "wb") as f:
+            if data.count(b"\n") == max(len(shard) - 1, 0):
+                f.write(b"L" + data)
+            else:
+                f.write(b"M" + marshal.dumps(shard))
+
+
+def _read_shard(path: str) -> List[bytes]:
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:1] == b"M":
+        return marshal.loads(data[1:])
+    return data[1:].split(b"\n") if len(data) > 1 else []
+
+
+def scan_partition(
+    path: str,
+    key: str,
+    profile_config: Optional[Dict[str, Any]] = None,
+    shard_paths: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Worker: the mergeable partial for one partition file.
+
+    The partition's distinct keys are split across `shard_paths`; without
+    them (in-process scans) they are returned under `keys`.
+    """
+    csv_path = Path(path)
+    col_path = columnar_path(csv_path)
+    keys: Iterable[str]
+    if is_fresh(col_path, csv_path):
+        with ColumnarFile(col_path) as cf:
+            keys, rows, columns, fmt = cf.distinct_values(key), cf.rows, cf.columns, "columnar"
+    else:
+        keys, rows = read_keys(csv_path, key)
+        columns, fmt = read_header(csv_path), "csv"
+    partial: Dict[str, Any] = {"path": path, "rows": rows, "columns": columns, "format": fmt}
+    if shard_paths is None:
+        partial["keys"] = keys
+    else:
+        _write_shards(shard_paths, keys)
+    if profile_config is not None:
+        partial["profile"] = profile_layer(csv_path, profile_config).to_state()
+    return partial
+
+
+def layer_keys(paths: List[Path], key: str = "customer_id") -> Iterator[str]:
+    """Every key of a layer in row order, partition by partition.
+
+    Reads a partition's `.lcol` copy when it is fresh, as the scan does,
+    so a layer held only in columnar form needs no CSV.
+    """
+    for csv_path in paths:
+        col_path = columnar_path(csv_path)
+        if is_fresh(col_path, csv_path):
+            with ColumnarFile(col_path) as cf:
+                yield from cf.values(key)
+        else:
+            for (k,) in iter_rows(csv_path, columns=[key], row_type="tuple"):
+                yield k
+
+
+def compare_keys(keys: Dict[str, Iterable[Iterable[Any]]]) -> Tuple[Dict[str, int], bool]:
+    """({layer: distinct keys}, whether every layer has the same key set).
+
+    `keys` holds, per layer, the key collections (str or encoded bytes)
+    of its partitions.
+    """
+    sets: Dict[str, Set[Any]] = {layer: set().union(*parts) for layer, parts in keys.items()}
+    first = next(iter(sets.values()), set())
+    return {layer: len(s) for layer, s in sets.items()}, all(s == first for s in sets.values())
+
+
+def compare_shard(shard_paths: Dict[str, List[str]]) -> Tuple[Dict[str, int], bool]:
+    """Worker: `compare_keys` for one shard, from each layer's shard files."""
+    return compare_keys({layer: map(_read_shard, paths) for layer, paths in shard_paths.items()})
+
+
+def merge_partials(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reduce one layer's partials: rows add up, columns union.
+
+    Keys are compared separately; see `compare_keys`.
+    """
+    columns: List[str] = []
+    seen = set()
+    rows = 0
+    formats = set()
+    schemas = set()
+    profile: Optional[LayerProfile] = None
+    for partial in partials:
+        rows += partial["rows"]
+        formats.add(partial["format"])
+        if partial["rows"]:
+            schemas.add(tuple(partial["columns"]))
+        for c in partial["columns"]:
+            if c not in seen:
+                seen.add(c)
+                columns.append(c)
+        if "profile" in partial:
+            part = LayerProfile.from_state(partial["profile"])
+            if profile is None or (not profile.rows and part.rows):
+                profile = part
+            elif part.columns == profile.columns:
+                profile.merge(part)
+            # Otherwise the partition's schema differs; schemas_agree reports it.
+    return {
+        "rows": rows,
+        "columns": columns,
+        "format": formats.pop() if len(formats) == 1 else "mixed",
+        "partitions": len(partials),
+        "schemas_agree": len(schemas) <= 1,
+        "profile": profile,
+    }
+
+
+def _by_layer(
+    sources: Dict[str, List[Path]], jobs: List[Tuple[str, str]], partials: List[Dict[str, Any]]
+) -> Dict[str, List[Dict[str, Any]]]:
+    by_layer: Dict[str, List[Dict[str, Any]]] = {layer: [] for layer in sources}
+    for (layer, _), partial in zip(jobs, partials):
+        by_layer[layer].append(partial)
+    return by_layer
+
+
+def scan_layers(
+    sources: Dict[str, List[Path]],
+    key: str = "customer_id",
+    profile_config: Optional[Dict[str, Any]] = None,
+    workers: int = 1,
+) -> Tuple[Dict[str, Dict[str, Any]], bool]:
+    """Scan every partition of every layer and reduce per layer.
+
+    Returns ({layer: merged partial with `distinct_keys`}, keys_consistent).
+    All partitions go to one pool so small and large layers share the
+    workers; results come back in submission order, so the output does
+    not depend on scheduling.
+    """
+    jobs = [(layer, str(path)) for layer, paths in sources.items() for path in paths]
+    workers = max(1, min(workers, len(jobs)))
+    if workers == 1:
+        partials = [scan_partition(path, key, profile_config) for _, path in jobs]
+        by_layer = _by_layer(sources, jobs, partials)
+        distinct, consistent = compare_keys({layer: [p.pop("keys") for p in parts] for layer, parts in by_layer.items()})
+    else:
+        shard_dir = Path(tempfile.mkdtemp(prefix="labs-keys-"))
+        try:
+            # shard_paths[i][s]: keys of job i that fall in shard s.
+            shard_paths = [[str(shard_dir / f"{i:05d}-{s:03d}") for s in range(workers)] for i in range(len(jobs))]
+            # spawn, not fork: scripts/run_labs.py runs chapters on threads.
+            # Workers unpickle `partitions.scan_partition` by module name, and
+            # the runner drops the chapter directory from sys.path once run.py
+            # is imported, so each worker puts it back first.
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=ctx, initializer=site.addsitedir, initargs=(str(HERE),)
+            ) as pool:
+                chunksize = max(1, len(jobs) // (workers * 4))
+                partials = list(
+                    pool.map(
+                        scan_partition,
+                        [path for _, path in jobs],
+                        [key] * len(jobs),
+                        [profile_config] * len(jobs),
+                        shard_paths,
+                        chunksize=chunksize,
+                    )
+                )
+                by_layer = _by_layer(sources, jobs, partials)
+                shards = [
+                    {layer: [shard_paths[i][s] for i, (job_layer, _) in enumerate(jobs) if job_layer == layer] for layer in sources}
+                    for s in range(workers)
+                ]
+                counts = list(pool.map(compare_shard, shards))
+        finally:
+            shutil.rmtree(shard_dir, ignore_errors=True)
+        # Worker processes have no perf session; attribute their reads here.
+        for partial in partials:
+            perf.count_read(Path(partial["path"]), rows=partial["rows"])
+        distinct = {layer: sum(c[layer] for c, _ in counts) for layer in sources}
+        consistent = all(ok for _, ok in counts)
+
+    scans = {}
+    for layer, parts in by_layer.items():
+        scans[layer] = merge_partials(parts)
+        scans[layer]["distinct_keys"] = distinct[layer]
+    return scans, consistent
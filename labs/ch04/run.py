@@ -1,61 +1,159 @@
 #!/usr/bin/env python
 from pathlib import Path
-import csv
-import json
-
-def load_csv(path: Path):
-    with path.open("r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
-    return rows
-
-def main():
-    base_dir = Path(__file__).resolve().parent
-    inputs_dir = base_dir / "inputs"
-
-    raw_path = inputs_dir / "raw" / "customers.csv"
-    bronze_path = inputs_dir / "bronze" / "customers.csv"
-    silver_path = inputs_dir / "silver" / "customers.csv"
-    gold_path = inputs_dir / "gold" / "customers.csv"
-    artifacts_dir = base_dir / "artifacts"
-    artifacts_dir.mkdir(parents=True, exist_ok=True)
-    out_path = artifacts_dir / "result.json"
-
-    rows_raw = load_csv(raw_path)
-    rows_bronze = load_csv(bronze_path)
-    rows_silver = load_csv(silver_path)
-    rows_gold = load_csv(gold_path)
-
-    ids_raw = {r["customer_id"] for r in rows_raw}
-    ids_bronze = {r["customer_id"] for r in rows_bronze}
-    ids_silver = {r["customer_id"] for r in rows_silver}
-    ids_gold = {r["customer_id"] for r in rows_gold}
+from typing import Optional
+import sys
+
+LABS_DIR = str(Path(__file__).resolve().parent.parent)
+if LABS_DIR not in sys.path:
+    sys.path.insert(0, LABS_DIR)
+
+from columnar import LAYERS, ColumnarFile, columnar_path, is_fresh
+from common import perf
+from common.fastio import load_json, read_header, read_keys
+from common.keyindex import KeyIndex
+from common.uniqueness import describe, find_duplicates
+from partitions import configured_workers, layer_keys, layer_sources, scan_layers
+from schema_profile import LayerProfile, profile_files, schema_evolution
+
+def load_layer(csv_path: Path, key: str = "customer_id"):
+    """(keys, row count, column names, format) for one layer.
+
+    Reads the `.lcol` columnar copy when it is at least as new as the CSV
+    (see columnar.py); otherwise streams the key column from the CSV.
+    """
+    col_path = columnar_path(csv_path)
+    if is_fresh(col_path, csv_path):
+        with ColumnarFile(col_path) as cf:
+            return cf.key_set(key), cf.rows, cf.columns, "columnar"
+    keys, count = read_keys(csv_path, key)
+    return keys, count, read_header(csv_path), "csv"
+
+def load_delta(inputs_dir: Path, sources: dict, delta_config: dict, state_dir: Path, key: str = "customer_id"):
+    """Delta mode: update the persisted key index from changed snapshot
+    files and new CDC records (`cdc/<layer>/customers.csv`), then read
+    row counts, columns, key consistency and duplicates off the index."""
+    cdc_dir = inputs_dir / delta_config.get("cdc_dir", "cdc")
+    with KeyIndex(state_dir / delta_config.get("index", "key_index.sqlite"), LAYERS) as index:
+        for layer, paths in sources.items():
+            log = cdc_dir / layer / "customers.csv"
+            logs = [log] if log.exists() else []
+            index.forget_missing(layer, paths + logs)
+            for path in paths:
+                index.sync_file(layer, path, key)
+            for log in logs:
+                index.apply_log(layer, log, key)
+        layers = {layer: (None, index.rows(layer), index.columns(layer), "csv") for layer in sources}
+        keys_ok = index.keys_consistent()
+        duplicates = {layer: index.duplicates(layer) for layer in sources}
+        delta = {
+            "files_read": index.files_read,
+            "cdc_records": index.cdc_records,
+            "keys_changed": index.changed_keys,
+        }
+    return layers, keys_ok, duplicates, delta
+
+def evaluate_layers(inputs_dir: Path, state_dir: Optional[Path] = None) -> dict:
+    # One customers.csv per layer, or partition files (see partitions.py).
+    sources = layer_sources(inputs_dir)
+    partitioned = any(len(paths) != 1 for paths in sources.values())
+
+    profile_config = None
+    profile_config_path = inputs_dir / "schema_profile.json"
+    if profile_config_path.exists():
+        profile_config = load_json(profile_config_path)
+
+    # Optional: delta mode against a persisted key index (see common/keyindex.py).
+    delta_config = None
+    delta_config_path = inputs_dir / "delta.json"
+    if delta_config_path.exists():
+        delta_config = load_json(delta_config_path)
+
+    # Only keys, counts and headers are needed; rows are never materialized.
+    scans = {}
+    delta = None
+    with perf.phase("load"):
+        if delta_config is not None:
+            try:
+                layers, keys_ok, duplicates, delta = load_delta(inputs_dir, sources, delta_config, state_dir or inputs_dir)
+            except ValueError as e:
+                # A bad CDC log (unknown op, delete of an absent key): the
+                # index was rolled back, nothing below can be trusted.
+                return {
+                    "chapter": "CH04",
+                    "status": "reject",
+                    "change_id": "baseline",
+                    "messages": [
+                        "Checked tiny Medallion layout for customers across raw/bronze/silver/gold.",
+                        f"Delta mode: CDC log rejected, key index left unchanged: {e}",
+                    ],
+                    "checks": {"cdc_log_valid": False},
+                    "metrics": {"delta": {"error": str(e)}},
+                }
+        elif partitioned:
+            # Partition keys are compared in the workers, shard by shard.
+            scans, keys_ok = scan_layers(sources, profile_config=profile_config, workers=configured_workers(inputs_dir))
+            layers = {name: (None, s["rows"], s["columns"], s["format"]) for name, s in scans.items()}
+        else:
+            layers = {name: load_layer(paths[0]) for name, paths in sources.items()}
+    ids_raw, count_raw, header_raw, format_raw = layers["raw"]
+    ids_bronze, count_bronze, header_bronze, format_bronze = layers["bronze"]
+    ids_silver, count_silver, header_silver, format_silver = layers["silver"]
+    ids_gold, count_gold, header_gold, format_gold = layers["gold"]
 
     row_counts = {
-        "raw": len(rows_raw),
-        "bronze": len(rows_bronze),
-        "silver": len(rows_silver),
-        "gold": len(rows_gold),
+        "raw": count_raw,
+        "bronze": count_bronze,
+        "silver": count_silver,
+        "gold": count_gold,
     }
 
     # basic invariants
-    keys_ok = (
-        ids_raw == ids_bronze == ids_silver == ids_gold
-    )
+    if delta is None and not scans:
+        keys_ok = (
+            ids_raw == ids_bronze == ids_silver == ids_gold
+        )
+
+    # Key sets hide duplicates; fewer distinct keys than rows means some
+    # exist, and only then is the layer re-read (from its .lcol copy when
+    # fresh) to find and sample them.
+    if delta is None:
+        duplicates = {}
+        with perf.phase("uniqueness"):
+            for name, (ids, count, _, _) in layers.items():
+                distinct = scans[name]["distinct_keys"] if scans else len(ids)
+                if distinct < count:
+                    duplicates[name] = find_duplicates(layer_keys(sources[name]))
+    duplicates = {name: report for name, report in duplicates.items() if report["duplicate_keys"]}
 
     # column evolution: we just check they are non-empty and different shapes
-    cols_raw = set(rows_raw[0].keys()) if rows_raw else set()
-    cols_bronze = set(rows_bronze[0].keys()) if rows_bronze else set()
-    cols_silver = set(rows_silver[0].keys()) if rows_silver else set()
-    cols_gold = set(rows_gold[0].keys()) if rows_gold else set()
+    cols_raw = set(header_raw) if count_raw else set()
+    cols_bronze = set(header_bronze) if count_bronze else set()
+    cols_silver = set(header_silver) if count_silver else set()
+    cols_gold = set(header_gold) if count_gold else set()
 
     evolution_ok = bool(cols_raw) and bool(cols_bronze) and bool(cols_silver) and bool(cols_gold)
 
+    # Optional: full schema-evolution report when a profile config is present.
+    # Partitioned layers were already profiled by the scan workers. Delta
+    # mode skips it: profiling reads every full layer, which is what delta
+    # mode exists to avoid.
+    evolution = None
+    if profile_config is not None and delta is None:
+        with perf.phase("profile"):
+            if scans:
+                profiles = [(name, s["profile"] or LayerProfile([], profile_config)) for name, s in scans.items()]
+            else:
+                profiles = [(name, profile_files(paths, profile_config)) for name, paths in sources.items()]
+            evolution = schema_evolution(profiles, profile_config)
+
     checks = {
         "row_counts_consistent": row_counts["raw"] == row_counts["bronze"] == row_counts["silver"] == row_counts["gold"],
         "keys_consistent": keys_ok,
         "column_evolution_present": evolution_ok,
+        "keys_unique_per_layer": not duplicates,
     }
+    if delta is not None:
+        checks["cdc_log_valid"] = True
 
     status = "accept" if all(checks.values()) else "reject"
 
@@ -66,6 +164,28 @@ def main():
         messages.append("All layers share the same customer_id set and row counts; columns evolve as expected.")
     else:
         messages.append("One or more Medallion consistency checks failed; inspect row counts, keys, or columns.")
+    for name, report in duplicates.items():
+        messages.append(describe(f"layer '{name}'", report))
+    if delta is not None:
+        messages.append(
+            f"Delta mode: {delta['files_read']} snapshot file(s) re-read, "
+            f"{delta['cdc_records']} CDC record(s) applied, {delta['keys_changed']} key count(s) changed."
+        )
+    for name, s in scans.items():
+        if not s["schemas_agree"]:
+            messages.append(f"Partitions of layer '{name}' do not share one header; num_columns counts the union.")
+    if evolution is not None:
+        for t in evolution["transitions"]:
+            changes = []
+            if t["added"]:
+                changes.append(f"added {t['added']}")
+            if t["dropped"]:
+                changes.append(f"dropped {t['dropped']}")
+            if t["renamed"]:
+                changes.append("renamed " + ", ".join(f"{r['from']}->{r['to']}" for r in t["renamed"]))
+            if t["type_changed"]:
+                changes.append("retyped " + ", ".join(f"{c['column']} {c['from']}->{c['to']}" for c in t["type_changed"]))
+            messages.append(f"Schema {t['from']} -> {t['to']}: {'; '.join(changes) or 'unchanged'}.")
 
     result = {
         "chapter": "CH04",
@@ -81,13 +201,44 @@ def main():
                 "silver": len(cols_silver),
                 "gold": len(cols_gold),
             },
+            "duplicate_keys": duplicates,
         },
     }
 
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    if evolution is not None:
+        result["metrics"]["schema_evolution"] = evolution
+
+    formats = {"raw": format_raw, "bronze": format_bronze, "silver": format_silver, "gold": format_gold}
+    if set(formats.values()) != {"csv"}:
+        result["metrics"]["layer_formats"] = formats
+
+    if delta is not None:
+        result["metrics"]["delta"] = delta
 
-    print(f"[CH04] Lab completed. status={status} → {out_path.relative_to(base_dir)}")
+    if partitioned:
+        result["metrics"]["partitions"] = {name: len(paths) for name, paths in sources.items()}
+
+    return result
+
+
+def run_lab():
+    base_dir = Path(__file__).resolve().parent
+    inputs_dir = base_dir / "inputs"
+    artifacts_dir = base_dir / "artifacts"
+    artifacts_dir.mkdir(parents=True, exist_ok=True)
+    out_path = artifacts_dir / "result.json"
+
+    with perf.session("CH04", artifacts_dir):
+        with perf.phase("evaluate"):
+            result = evaluate_layers(inputs_dir, artifacts_dir)
+        perf.write_result(result, out_path)
+
+    return result
+
+
+def main():
+    result = run_lab()
+    print(f"[CH04] Lab completed. status={result['status']} → artifacts/result.json")
 
 
 if __name__ == "__main__":
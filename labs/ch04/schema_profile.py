@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+CH04 schema-evolution report with per-column statistics.
+
+One streaming pass per layer collects, for every column:
+
+- inferred type (bool < int < float < string; mixed bool/number -> string)
+- null rate (empty cells count as null)
+- distinct estimate (exact up to EXACT_DISTINCT_LIMIT values, then
+  HyperLogLog)
+- min / max (numeric for int/float columns, lexical otherwise)
+- a bottom-k hash sketch of the values, used to spot renamed columns
+
+Every piece is mergeable: `LayerProfile.merge` combines profiles built on
+different partitions of the same layer (in any order, in other processes
+via `to_state()` / `from_state()`) into the profile of the whole layer.
+Hashes are keyed blake2b, not `hash()`, so they agree across processes.
+
+Standalone (prints the same report run.py stores in
+`metrics.schema_evolution`):
+
+    python labs/ch04/schema_profile.py labs/ch04/inputs
+
+`diff_layers` compares consecutive layers: columns added, dropped,
+renamed (a dropped and an added column whose value sketches overlap by at
+least `rename_similarity`), and type changes for columns present in both.
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import math
+import sys
+from hashlib import blake2b
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LABS_DIR = str(Path(__file__).resolve().parent.parent)
+if LABS_DIR not in sys.path:
+    sys.path.insert(0, LABS_DIR)
+
+from columnar import LAYERS, ColumnarFile, columnar_path, is_fresh  # noqa: E402
+from common.fastio import iter_rows, read_header  # noqa: E402
+
+
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "hll_precision": 12,
+    "bottom_k": 128,
+    "rename_similarity": 0.8,
+}
+EXACT_DISTINCT_LIMIT = 1024
+HASH_KEY = b"labs-ch04"
+
+TYPE_ORDER = ["bool", "int", "float", "string"]
+BOOL_VALUES = {"true", "false"}
+NUMBER_START = set("0123456789+-.")
+
+
+def value_hash(value: str) -> int:
+    """Stable 64-bit hash of a cell value."""
+    return int.from_bytes(blake2b(value.encode("utf-8"), digest_size=8, key=HASH_KEY).digest(), "little")
+
+
+def classify(value: str) -> Tuple[str, Any]:
+    """(kind, comparable value) for a non-empty cell.
+
+    Only cells starting like a number are tried as numbers, so "inf" and
+    "nan" stay strings.
+    """
+    if value[0] not in NUMBER_START:
+        lowered = value.lower()
+        if lowered in BOOL_VALUES:
+            return "bool", lowered == "true"
+        return "string", value
+    try:
+        return "int", int(value)
+    except ValueError:
+        pass
+    try:
+        number = float(value)
+    except ValueError:
+        return "string", value
+    if math.isnan(number) or math.isinf(number):
+        return "string", value
+    return "float", number
+
+
+def resolve_type(kinds: Iterable[str]) -> Optional[str]:
+    """Join the kinds seen in a column; None when the column is all nulls."""
+    kinds = set(kinds)
+    if not kinds:
+        return None
+    if "string" in kinds or ("bool" in kinds and kinds & {"int", "float"}):
+        return "string"
+    return max(kinds, key=TYPE_ORDER.index)
+
+
+class HyperLogLog:
+    """Plain HyperLogLog over 64-bit hashes (mergeable by register-wise max)."""
+
+    def __init__(self, precision: int) -> None:
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, h: int) -> None:
+        p = self.precision
+        idx = h & ((1 << p) - 1)
+        rank = (64 - p) - (h >> p).bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("cannot merge HyperLogLogs with different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))  # linear counting for small sets
+        return round(raw)
+
+
+class ColumnStats:
+    """Mergeable statistics for one column."""
+
+    def __init__(self, precision: int, bottom_k: int) -> None:
+        self.count = 0
+        self.nulls = 0
+        self.kinds: Dict[str, List[Any]] = {}  # kind -> [min, max] in that kind's order
+        self.text_bounds: Optional[List[str]] = None  # lexical [min, max] over all values
+        self.exact: Optional[set] = set()
+        self.hll = HyperLogLog(precision)
+        self.bottom_k = bottom_k
+        self._sketch: List[int] = []  # max-heap of the k smallest hashes (negated)
+        self._in_sketch: set = set()
+
+    def add(self, value: Optional[str]) -> None:
+        self.count += 1
+        if value is None or value == "":
+            self.nulls += 1
+            return
+        kind, comparable = classify(value)
+        bounds = self.kinds.get(kind)
+        if bounds is None:
+            self.kinds[kind] = [comparable, comparable]
+        elif comparable < bounds[0]:
+            bounds[0] = comparable
+        elif comparable > bounds[1]:
+            bounds[1] = comparable
+        # Lexical bounds too, in case mixed kinds resolve the column to "string".
+        text = self.text_bounds
+        if text is None:
+            self.text_bounds = [value, value]
+        elif value < text[0]:
+            text[0] = value
+        elif value > text[1]:
+            text[1] = value
+
+        h = value_hash(value)
+        if self.exact is not None:
+            self.exact.add(value)
+            if len(self.exact) > EXACT_DISTINCT_LIMIT:
+                self.exact = None
+        self.hll.add(h)
+        self._offer(h)
+
+    def _offer(self, h: int) -> None:
+        full = len(self._sketch) >= self.bottom_k
+        if (full and h >= -self._sketch[0]) or h in self._in_sketch:
+            return
+        if not full:
+            heapq.heappush(self._sketch, -h)
+            self._in_sketch.add(h)
+        else:
+            evicted = -heapq.heapreplace(self._sketch, -h)
+            self._in_sketch.discard(evicted)
+            self._in_sketch.add(h)
+
+    def sketch(self) -> List[int]:
+        return sorted(self._in_sketch)
+
+    def merge(self, other: "ColumnStats") -> None:
+        self.count += other.count
+        self.nulls += other.nulls
+        for kind, (lo, hi) in other.kinds.items():
+            bounds = self.kinds.get(kind)
+            if bounds is None:
+                self.kinds[kind] = [lo, hi]
+            else:
+                bounds[0] = min(bounds[0], lo)
+                bounds[1] = max(bounds[1], hi)
+        if other.text_bounds is not None:
+            if self.text_bounds is None:
+                self.text_bounds = list(other.text_bounds)
+            else:
+                self.text_bounds = [min(self.text_bounds[0], other.text_bounds[0]),
+                                    max(self.text_bounds[1], other.text_bounds[1])]
+        if self.exact is not None and other.exact is not None:
+            self.exact |= other.exact
+            if len(self.exact) > EXACT_DISTINCT_LIMIT:
+                self.exact = None
+        else:
+            self.exact = None
+        self.hll.merge(other.hll)
+        for h in other._in_sketch:
+            self._offer(h)
+
+    def summary(self) -> Dict[str, Any]:
+        col_type = resolve_type(self.kinds)
+        lo = hi = None
+        if col_type == "string":
+            lo, hi = self.text_bounds  # type: ignore[misc]
+        elif col_type is not None:
+            numeric = [self.kinds[k] for k in ("bool", "int", "float") if k in self.kinds]
+            lo = min(b[0] for b in numeric)
+            hi = max(b[1] for b in numeric)
+        distinct = len(self.exact) if self.exact is not None else self.hll.estimate()
+        return {
+            "type": col_type or "null",
+            "null_rate": round(self.nulls / self.count, 6) if self.count else 0.0,
+            "distinct_estimate": distinct,
+            "distinct_exact": self.exact is not None,
+            "min": lo,
+            "max": hi,
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "nulls": self.nulls,
+            "kinds": self.kinds,
+            "text_bounds": self.text_bounds,
+            "exact": sorted(self.exact) if self.exact is not None else None,
+            "hll": self.hll.registers.hex(),
+            "sketch": self.sketch(),
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], precision: int, bottom_k: int) -> "ColumnStats":
+        stats = cls(precision, bottom_k)
+        stats.count = state["count"]
+        stats.nulls = state["nulls"]
+        stats.kinds = {k: list(v) for k, v in state["kinds"].items()}
+        stats.text_bounds = state["text_bounds"]
+        stats.exact = set(state["exact"]) if state["exact"] is not None else None
+        stats.hll.registers = bytearray.fromhex(state["hll"])
+        for h in state["sketch"]:
+            stats._offer(h)
+        return stats
+
+
+def jaccard(a: Sequence[int], b: Sequence[int], k: int) -> float:
+    """Bottom-k estimate of |A ∩ B| / |A ∪ B| from two sorted sketches."""
+    sa, sb = set(a), set(b)
+    union = heapq.nsmallest(k, sa | sb)
+    if not union:
+        return 0.0
+    return sum(1 for h in union if h in sa and h in sb) / len(union)
+
+
+class LayerProfile:
+    """Column statistics for one layer (or one partition of it)."""
+
+    def __init__(self, columns: Sequence[str], config: Optional[Dict[str, Any]] = None) -> None:
+        cfg = dict(DEFAULT_CONFIG, **(config or {}))
+        self.precision = int(cfg["hll_precision"])
+        self.bottom_k = int(cfg["bottom_k"])
+        self.columns = list(columns)
+        self.rows = 0
+        self.stats = {c: ColumnStats(self.precision, self.bottom_k) for c in self.columns}
+
+    def merge(self, other: "LayerProfile") -> "LayerProfile":
+        if other.columns != self.columns:
+            raise ValueError(f"cannot merge profiles with different columns: {self.columns} vs {other.columns}")
+        self.rows += other.rows
+        for c in self.columns:
+            self.stats[c].merge(other.stats[c])
+        return self
+
+    def summary(self) -> Dict[str, Any]:
+        return {"rows": self.rows, "columns": {c: self.stats[c].summary() for c in self.columns}}
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "columns": self.columns,
+            "rows": self.rows,
+            "config": {"hll_precision": self.precision, "bottom_k": self.bottom_k},
+            "stats": {c: self.stats[c].to_state() for c in self.columns},
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "LayerProfile":
+        profile = cls(state["columns"], state["config"])
+        profile.rows = state["rows"]
+        profile.stats = {
+            c: ColumnStats.from_state(s, profile.precision, profile.bottom_k) for c, s in state["stats"].items()
+        }
+        return profile
+
+
+def profile_rows(columns: Sequence[str], rows: Iterable[Sequence[Optional[str]]], config: Optional[Dict[str, Any]] = None) -> LayerProfile:
+    profile = LayerProfile(columns, config)
+    ordered = [profile.stats[c] for c in profile.columns]
+    count = 0
+    for row in rows:
+        count += 1
+        for stats, value in zip(ordered, row):
+            stats.add(value)
+    profile.rows = count
+    return profile
+
+
+def profile_csv(path: Path, config: Optional[Dict[str, Any]] = None) -> LayerProfile:
+    header = read_header(path)
+    if not header:
+        return LayerProfile([], config)
+    return profile_rows(header, iter_rows(path, columns=header, row_type="tuple"), config)
+
+
+def profile_columnar(path: Path, config: Optional[Dict[str, Any]] = None) -> LayerProfile:
+    """Same statistics from a `.lcol` file, one column at a time."""
+    with ColumnarFile(path) as cf:
+        profile = LayerProfile(cf.columns, config)
+        profile.rows = cf.rows
+        for column in cf.columns:
+            stats = profile.stats[column]
+            for value in cf.values(column):
+                stats.add(value if isinstance(value, str) else repr(value) if isinstance(value, float) else str(value))
+    return profile
+
+
+def diff_layers(
+    before: LayerProfile,
+    after: LayerProfile,
+    rename_similarity: float = DEFAULT_CONFIG["rename_similarity"],
+) -> Dict[str, Any]:
+    """Columns added / dropped / renamed / retyped between two layers."""
+    old_cols = set(before.columns)
+    new_cols = set(after.columns)
+    dropped = [c for c in before.columns if c not in new_cols]
+    added = [c for c in after.columns if c not in old_cols]
+
+    candidates = []
+    k = min(before.bottom_k, after.bottom_k)
+    for d in dropped:
+        for a in added:
+            similarity = jaccard(before.stats[d].sketch(), after.stats[a].sketch(), k)
+            if similarity >= rename_similarity:
+                candidates.append((-similarity, d, a))
+    renamed = []
+    used = set()
+    for neg_sim, d, a in sorted(candidates):
+        if d in used or a in used:
+            continue
+        used.update((d, a))
+        renamed.append({"from": d, "to": a, "similarity": round(-neg_sim, 3)})
+
+    type_changed = []
+    for c in before.columns:
+        if c in new_cols:
+            t0 = before.stats[c].summary()["type"]
+            t1 = after.stats[c].summary()["type"]
+            if t0 != t1:
+                type_changed.append({"column": c, "from": t0, "to": t1})
+
+    return {
+        "added": [c for c in added if c not in used],
+        "dropped": [c for c in dropped if c not in used],
+        "renamed": renamed,
+        "type_changed": type_changed,
+    }
+
+
+def schema_evolution(
+    layers: Sequence[Tuple[str, LayerProfile]],
+    config: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Per-layer summaries plus a diff for each consecutive pair of layers."""
+    cfg = dict(DEFAULT_CONFIG, **(config or {}))
+    transitions = []
+    for (name0, p0), (name1, p1) in zip(layers, layers[1:]):
+        entry = {"from": name0, "to": name1}
+        entry.update(diff_layers(p0, p1, float(cfg["rename_similarity"])))
+        transitions.append(entry)
+    return {
+        "layers": {name: profile.summary() for name, profile in layers},
+        "transitions": transitions,
+    }
+
+
+def profile_layer(csv_path: Path, config: Optional[Dict[str, Any]] = None) -> LayerProfile:
+    """Profile a layer from its fresh `.lcol` copy if there is one, else from the CSV."""
+    col_path = columnar_path(csv_path)
+    if is_fresh(col_path, csv_path):
+        return profile_columnar(col_path, config)
+    return profile_csv(csv_path, config)
+
+
+def profile_files(paths: Sequence[Path], config: Optional[Dict[str, Any]] = None) -> LayerProfile:
+    """Profile a layer's partition files one after another and merge them.
+
+    Partitions whose header differs from the first non-empty one are left
+    out, as in `partitions.merge_partials`.
+    """
+    merged: Optional[LayerProfile] = None
+    for path in paths:
+        part = profile_layer(path, config)
+        if merged is None or (not merged.rows and part.rows):
+            merged = part
+        elif part.columns == merged.columns:
+            merged.merge(part)
+    return merged if merged is not None else LayerProfile([], config)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="CH04 schema-evolution report.")
+    parser.add_argument("inputs_dir", type=Path)
+    parser.add_argument("--table", default="customers")
+    parser.add_argument("--config", type=Path, default=None, help="JSON overrides for DEFAULT_CONFIG.")
+    args = parser.parse_args(argv)
+
+    config = json.loads(args.config.read_text(encoding="utf-8")) if args.config else None
+    layers = [
+        (layer, profile_layer(args.inputs_dir / layer / f"{args.table}.csv", config))
+        for layer in LAYERS
+        if (args.inputs_dir / layer / f"{args.table}.csv").exists()
+        or (args.inputs_dir / layer / f"{args.table}.lcol").exists()
+    ]
+    print(json.dumps(schema_evolution(layers, config), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -16,7 +16,7 @@ Top-level result keys (contract):
 - metrics: dict[str, number or small string] for simple metrics
 """
 
-import json
+import sys
 from pathlib import Path
 from typing import Any, Dict, List
 
@@ -24,8 +24,18 @@ from typing import Any, Dict, List
 HERE = Path(__file__).resolve().parent
 INPUTS_DIR = HERE / "inputs"
 ARTIFACTS_DIR = HERE / "artifacts"
+RESULT_PATH = ARTIFACTS_DIR / "result.json"
+
+LABS_DIR = str(HERE.parent)
+if LABS_DIR not in sys.path:
+    sys.path.insert(0, LABS_DIR)
+
+from common import perf
+from common.fastio import load_json
+from common.validation import rejected, validate_inputs
 
 PIPELINE_FILE = INPUTS_DIR / "pipeline.json"
+PIPELINE_SCHEMA = HERE / "schemas" / "pipeline.schema.json"
 
 CANONICAL_STAGES: List[str] = [
     "validate",
@@ -58,8 +68,7 @@ def load_pipeline(path: Path) -> Dict[str, Any]:
 
     Extra fields are ignored by this runner.
     """
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    return load_json(path)
 
 
 def ensure_artifacts_dir() -> None:
@@ -179,17 +188,29 @@ def build_messages(
     return messages
 
 
-def main() -> None:
-    pipeline = load_pipeline(PIPELINE_FILE)
-    result = evaluate_pipeline(pipeline)
-
+def run_lab() -> Dict[str, Any]:
+    """Load inputs, evaluate them, and write artifacts/result.json."""
     ensure_artifacts_dir()
-    artifacts_path = ARTIFACTS_DIR / "result.json"
-    with artifacts_path.open("w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    with perf.session("CH05", ARTIFACTS_DIR):
+        with perf.phase("load"):
+            pipeline = load_pipeline(PIPELINE_FILE)
+        with perf.phase("validate"):
+            errors = validate_inputs({"pipeline.json": (PIPELINE_SCHEMA, pipeline)})
+        if errors:
+            result = rejected("CH05", "baseline", errors)
+        else:
+            with perf.phase("evaluate"):
+                result = evaluate_pipeline(pipeline)
+        perf.write_result(result, RESULT_PATH)
+
+    return result
+
+
+def main() -> None:
+    result = run_lab()
 
     # Human-friendly one-line summary（パスは Path から算出）
-    display_path = artifacts_path.relative_to(HERE)
+    display_path = RESULT_PATH.relative_to(HERE)
     print(f"[CH05] Lab completed. status={result['status']} → {display_path}")
 
 
@@ -1,31 +1,43 @@
 #!/usr/bin/env python
 from pathlib import Path
-import csv
-import json
+import sys
 
-def load_csv(path: Path):
-    with path.open("r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        return list(reader)
+LABS_DIR = str(Path(__file__).resolve().parent.parent)
+if LABS_DIR not in sys.path:
+    sys.path.insert(0, LABS_DIR)
 
-def main():
-    base_dir = Path(__file__).resolve().parent
-    inputs_dir = base_dir / "inputs"
+from common import perf
+from common.fastio import read_header, read_keys
+from common.uniqueness import check_unique, describe
 
+# A satellite keeps history per hub key: with this column its key is
+# (policy_id, load_date); without it, one row per policy_id.
+SAT_LOAD_DATE = "load_date"
+
+def evaluate_vault(inputs_dir: Path) -> dict:
     raw_path = inputs_dir / "raw" / "transactions.csv"
     hub_path = inputs_dir / "vault" / "hub_policy.csv"
     sat_path = inputs_dir / "vault" / "sat_policy_details.csv"
-    artifacts_dir = base_dir / "artifacts"
-    artifacts_dir.mkdir(parents=True, exist_ok=True)
-    out_path = artifacts_dir / "result.json"
 
-    txns = load_csv(raw_path)
-    hubs = load_csv(hub_path)
-    sats = load_csv(sat_path)
+    with perf.phase("load"):
+        policy_ids_txn, txn_count = read_keys(raw_path, "policy_id")
+        policy_ids_hub, hub_count = read_keys(hub_path, "policy_id")
+        policy_ids_sat, sat_count = read_keys(sat_path, "policy_id")
 
-    policy_ids_txn = {r["policy_id"] for r in txns}
-    policy_ids_hub = {r["policy_id"] for r in hubs}
-    policy_ids_sat = {r["policy_id"] for r in sats}
+    # Primary keys: txn_id for transactions, policy_id for the hub, and
+    # policy_id (plus load_date when present) for the satellite. The hub
+    # and single-key satellite sets are already built, so only a short
+    # set means duplicates.
+    duplicates = {}
+    with perf.phase("uniqueness"):
+        duplicates["transactions"] = check_unique([raw_path], "txn_id")
+        if len(policy_ids_hub) < hub_count:
+            duplicates["hub_policy"] = check_unique([hub_path], "policy_id")
+        if SAT_LOAD_DATE in read_header(sat_path):
+            duplicates["sat_policy_details"] = check_unique([sat_path], ["policy_id", SAT_LOAD_DATE])
+        elif len(policy_ids_sat) < sat_count:
+            duplicates["sat_policy_details"] = check_unique([sat_path], "policy_id")
+    duplicates = {name: report for name, report in duplicates.items() if report["duplicate_keys"]}
 
     missing_in_hub = sorted(policy_ids_txn - policy_ids_hub)
     orphan_sat = sorted(policy_ids_sat - policy_ids_hub)
@@ -35,6 +47,7 @@ def main():
         "all_transactions_have_hub": len(missing_in_hub) == 0,
         "no_orphan_satellite": len(orphan_sat) == 0,
         "all_hubs_have_satellite": len(missing_sat) == 0,
+        "primary_keys_unique": not duplicates,
     }
 
     status = "accept" if all(checks.values()) else "reject"
@@ -51,6 +64,8 @@ def main():
             messages.append(f"Orphan satellite rows (no hub): {orphan_sat}")
         if missing_sat:
             messages.append(f"Hub policies without satellite: {missing_sat}")
+        for name, report in duplicates.items():
+            messages.append(describe(name, report))
 
     result = {
         "chapter": "CH06",
@@ -60,20 +75,38 @@ def main():
         "checks": checks,
         "metrics": {
             "counts": {
-                "transactions": len(txns),
-                "hub_policies": len(hubs),
-                "sat_policies": len(sats),
+                "transactions": txn_count,
+                "hub_policies": hub_count,
+                "sat_policies": sat_count,
             },
             "missing_in_hub": missing_in_hub,
             "orphan_sat": orphan_sat,
             "missing_sat": missing_sat,
+            "duplicate_keys": duplicates,
         },
     }
 
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    return result
+
+
+def run_lab():
+    base_dir = Path(__file__).resolve().parent
+    inputs_dir = base_dir / "inputs"
+    artifacts_dir = base_dir / "artifacts"
+    artifacts_dir.mkdir(parents=True, exist_ok=True)
+    out_path = artifacts_dir / "result.json"
 
-    print(f"[CH06] Lab completed. status={status} → {out_path.relative_to(base_dir)}")
+    with perf.session("CH06", artifacts_dir):
+        with perf.phase("evaluate"):
+            result = evaluate_vault(inputs_dir)
+        perf.write_result(result, out_path)
+
+    return result
+
+
+def main():
+    result = run_lab()
+    print(f"[CH06] Lab completed. status={result['status']} → artifacts/result.json")
 
 
 if __name__ == "__main__":
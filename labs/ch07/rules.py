@@ -0,0 +1,100 @@
+"""
+Declarative gate rules for the CH07 evaluator.
+
+A gate is a `Rule` row: the function that runs it, the rules it depends
+on, a cost estimate for this pack/snapshot, and a prior failure rate.
+`run.py` declares the table; this module only plans and runs it.
+
+Two modes:
+
+- `full` (default): every rule runs in declaration order, so `messages`
+  is the same exhaustive report as before.
+- `fail_fast`: rules run cheapest-per-expected-rejection first
+  (`cost / fail_rate`, dependencies permitting) and evaluation stops at
+  the first failure, since the outcome is then decided.
+
+In both modes a rule whose dependency failed or was skipped does not
+run; its check is False (fail closed) and the rule is listed as skipped.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+MODES = ("full", "fail_fast")
+
+
+class Rule(NamedTuple):
+    name: str  # result key is f"{name}_ok"; messages are prefixed "[name]"
+    run: Callable[[Dict[str, Any], Dict[str, Any], List[str], Dict[str, Any]], bool]
+    cost: Callable[[Dict[str, Any], Dict[str, Any]], float]
+    fail_rate: float  # prior estimate of how often this rule rejects a pack
+    depends_on: Tuple[str, ...] = ()
+
+    @property
+    def check(self) -> str:
+        return f"{self.name}_ok"
+
+
+def plan(rules: List[Rule], pack: Dict[str, Any], snapshot: Dict[str, Any], by_cost: bool) -> List[Rule]:
+    """Rules in run order: a topological order of `depends_on` that picks
+    the ready rule with the lowest cost per expected rejection (`by_cost`)
+    or the earliest declared one."""
+    position = {r.name: i for i, r in enumerate(rules)}
+    for r in rules:
+        unknown = [d for d in r.depends_on if d not in position]
+        if unknown:
+            raise ValueError(f"rule {r.name!r} depends on unknown rule(s) {unknown}")
+
+    def key(r: Rule) -> Tuple[float, int]:
+        if not by_cost:
+            return (0.0, position[r.name])
+        return (r.cost(pack, snapshot) / max(r.fail_rate, 1e-6), position[r.name])
+
+    keys = {r.name: key(r) for r in rules}
+    order: List[Rule] = []
+    done: set = set()
+    pending = list(rules)
+    while pending:
+        ready = [r for r in pending if all(d in done for d in r.depends_on)]
+        if not ready:
+            raise ValueError(f"rule dependencies form a cycle among {[r.name for r in pending]}")
+        nxt = min(ready, key=lambda r: keys[r.name])
+        order.append(nxt)
+        done.add(nxt.name)
+        pending.remove(nxt)
+    return order
+
+
+def run_rules(
+    rules: List[Rule],
+    pack: Dict[str, Any],
+    snapshot: Dict[str, Any],
+    messages: List[str],
+    mode: str = "full",
+) -> Tuple[Dict[str, bool], Dict[str, Any], Dict[str, Any]]:
+    """Return (checks in declaration order, info collected by rules, run summary)."""
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+    order = plan(rules, pack, snapshot, by_cost=mode == "fail_fast")
+
+    checks = {r.check: False for r in rules}
+    info: Dict[str, Any] = {}
+    ran: List[str] = []
+    skipped: List[str] = []
+    decided = False
+    for rule in order:
+        blocked = [d for d in rule.depends_on if d in skipped or not checks[f"{d}_ok"]]
+        if decided or blocked:
+            skipped.append(rule.name)
+            if blocked and mode == "full":
+                messages.append(f"[{rule.name}] skipped: requires {', '.join(f'{d}_ok' for d in blocked)}.")
+            continue
+        ok = bool(rule.run(pack, snapshot, messages, info))
+        checks[rule.check] = ok
+        ran.append(rule.name)
+        if not ok and mode == "fail_fast":
+            decided = True
+
+    summary = {"mode": mode, "order": [r.name for r in order], "ran": ran, "skipped": skipped}
+    return checks, info, summary
@@ -5,6 +5,7 @@ CH07 Lab Day-0 / Phase-1 runner
 - Reads Labs Global Snapshot (labs/ch07/inputs/state_snapshot.json)
 - Reads AI-generated change pack (labs/ch07/inputs/ai_generated_change_pack_example.json)
 - Evaluates the pack against schema, chapter, RB-30, boundary, and metrics
+  (a declarative rule table, see `RULES` and rules.py)
 - Writes labs/ch07/artifacts/result.json
 
 This runner never:
@@ -17,7 +18,10 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from rules import MODES, Rule, run_rules
+from schema_check import schema_errors
 
 
 CH07_DIR = Path(__file__).resolve().parent
@@ -26,7 +30,11 @@ ARTIFACTS_DIR = CH07_DIR / "artifacts"
 
 SNAPSHOT_PATH = INPUTS_DIR / "state_snapshot.json"
 CHANGE_PACK_PATH = INPUTS_DIR / "ai_generated_change_pack_example.json"
+RULES_CONFIG_PATH = INPUTS_DIR / "rules.json"  # optional: {"mode": "fail_fast"}
+REF_INDEX_PATH = INPUTS_DIR / "ref_index.json"  # optional: exported by scripts/ref_index.py
+REF_PREFIXES = ("refs/tags/", "refs/heads/", "refs/remotes/")
 RESULT_PATH = ARTIFACTS_DIR / "result.json"
+CHANGE_PACK_SCHEMA = CH07_DIR / "schemas" / "change_pack.schema.json"
 
 
 def load_json(path: Path, errors: List[str]) -> Dict[str, Any]:
@@ -43,25 +51,10 @@ def load_json(path: Path, errors: List[str]) -> Dict[str, Any]:
 
 
 def check_schema(change_pack: Dict[str, Any], messages: List[str]) -> bool:
-    required_top_level = ["kind", "chapter", "mode", "rb30_anchor", "metrics", "changes"]
-    ok = True
-
-    for key in required_top_level:
-        if key not in change_pack:
-            messages.append(f"[schema] Missing required key: {key}")
-            ok = False
-
-    if change_pack.get("kind") != "ai_generated_change_pack":
-        messages.append(
-            f"[schema] kind must be 'ai_generated_change_pack', got: {change_pack.get('kind')!r}"
-        )
-        ok = False
-
-    if not isinstance(change_pack.get("changes"), list):
-        messages.append("[schema] 'changes' must be a list.")
-        ok = False
-
-    return ok
+    """Validate the pack against schemas/change_pack.schema.json."""
+    errors = schema_errors(CHANGE_PACK_SCHEMA, change_pack)
+    messages.extend(f"[schema] {e}" for e in errors)
+    return not errors
 
 
 def check_chapter(change_pack: Dict[str, Any], snapshot: Dict[str, Any], messages: List[str]) -> bool:
@@ -86,7 +79,20 @@ def check_chapter(change_pack: Dict[str, Any], snapshot: Dict[str, Any], message
     return ok
 
 
-def check_rb30(change_pack: Dict[str, Any], messages: List[str]) -> bool:
+def known_refs(ref_index: Dict[str, Any]) -> Set[str]:
+    """Every string a tag anchor may use for a ref in `inputs/ref_index.json`:
+    full ref names, short names, and the object ids they point to."""
+    names: Set[str] = set()
+    for name, oid in ref_index.get("refs", {}).items():
+        names.add(name)
+        names.add(oid)
+        for prefix in REF_PREFIXES:
+            if name.startswith(prefix):
+                names.add(name[len(prefix):])
+    return names
+
+
+def check_rb30(change_pack: Dict[str, Any], messages: List[str], refs: Optional[Set[str]] = None) -> bool:
     ok = True
     anchor = change_pack.get("rb30_anchor")
 
@@ -107,6 +113,11 @@ def check_rb30(change_pack: Dict[str, Any], messages: List[str]) -> bool:
     if not anchor_ref or not isinstance(anchor_ref, str):
         messages.append("[rb30] rb30_anchor.ref must be a non-empty string.")
         ok = False
+    elif refs is not None and anchor_type == "tag" and anchor_ref not in refs:
+        messages.append(
+            f"[rb30] rb30_anchor.ref {anchor_ref!r} is not a ref or commit in {REF_INDEX_PATH.name}."
+        )
+        ok = False
 
     return ok
 
@@ -207,49 +218,75 @@ def check_metrics(snapshot: Dict[str, Any], messages: List[str]) -> Tuple[bool,
     return ok, info
 
 
-def main() -> int:
-    ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
+def _change_count(change_pack: Dict[str, Any]) -> int:
+    changes = change_pack.get("changes")
+    return len(changes) if isinstance(changes, list) else 0
 
-    messages: List[str] = []
-    load_errors: List[str] = []
 
-    snapshot = load_json(SNAPSHOT_PATH, load_errors)
-    change_pack = load_json(CHANGE_PACK_PATH, load_errors)
+def _metrics_rule(change_pack: Dict[str, Any], snapshot: Dict[str, Any], messages: List[str], info: Dict[str, Any]) -> bool:
+    ok, found = check_metrics(snapshot, messages)
+    info.update(found)
+    return ok
+
+
+# The CH07 gates as data: (name, run, cost estimate, prior failure rate,
+# dependencies). Declaration order is the report order in "full" mode;
+# "fail_fast" runs the cheapest rule per expected rejection first.
+# boundary needs `changes` to be a list of objects, hence schema first.
+# `refs` (from inputs/ref_index.json) makes rb30 check that tags exist.
+def build_rules(refs: Optional[Set[str]] = None) -> List[Rule]:
+    return [
+        Rule("schema", lambda pack, snap, msgs, info: check_schema(pack, msgs), lambda pack, snap: 1 + _change_count(pack), 0.05),
+        Rule("chapter", lambda pack, snap, msgs, info: check_chapter(pack, snap, msgs), lambda pack, snap: 1, 0.10),
+        Rule("rb30", lambda pack, snap, msgs, info: check_rb30(pack, msgs, refs), lambda pack, snap: 1, 0.10),
+        Rule(
+            "boundary",
+            lambda pack, snap, msgs, info: check_boundary(pack, snap, msgs),
+            lambda pack, snap: 1 + _change_count(pack),
+            0.20,
+            ("schema",),
+        ),
+        Rule("metrics", _metrics_rule, lambda pack, snap: 2, 0.05),
+    ]
+
+
+RULES = build_rules()
+
+
+def evaluate_change_pack(
+    snapshot: Dict[str, Any],
+    change_pack: Dict[str, Any],
+    load_errors: List[str],
+    mode: str = "full",
+    refs: Optional[Set[str]] = None,
+) -> Dict[str, Any]:
+    """Run the rule table and build the CH07 result (no I/O).
+
+    `mode` is "full" (every rule, exhaustive messages) or "fail_fast"
+    (cost-ordered, stops at the first failing rule). With `refs` (see
+    `known_refs`), a "tag" anchor must name one of them.
+    """
+    messages: List[str] = []
 
     for err in load_errors:
         messages.append(f"[io] {err}")
 
     # Default checks to False if I/O failed
+    rules_run = None
     if load_errors:
-        checks = {
-            "schema_ok": False,
-            "chapter_ok": False,
-            "rb30_ok": False,
-            "boundary_ok": False,
-            "metrics_ok": False,
-        }
+        checks = {rule.check: False for rule in RULES}
         metrics_info: Dict[str, float] = {}
         status = "reject"
     else:
-        schema_ok = check_schema(change_pack, messages)
-        chapter_ok = check_chapter(change_pack, snapshot, messages)
-        rb30_ok = check_rb30(change_pack, messages)
-        boundary_ok = check_boundary(change_pack, snapshot, messages)
-        metrics_ok, metrics_info = check_metrics(snapshot, messages)
-
-        checks = {
-            "schema_ok": schema_ok,
-            "chapter_ok": chapter_ok,
-            "rb30_ok": rb30_ok,
-            "boundary_ok": boundary_ok,
-            "metrics_ok": metrics_ok,
-        }
-
+        rules = RULES if refs is None else build_rules(refs)
+        checks, metrics_info, rules_run = run_rules(rules, change_pack, snapshot, messages, mode)
         status = "accept" if all(checks.values()) else "reject"
 
     # Simple summary
     changes = change_pack.get("changes") if isinstance(change_pack, dict) else []
-    change_count = len(changes) if isinstance(changes, list) else 0
+    if not isinstance(changes, list):
+        changes = []
+    change_count = len(changes)
     boundary_targets = sorted(
         {c.get("target") for c in changes if isinstance(c, dict) and "target" in c}
     )
@@ -264,6 +301,10 @@ def main() -> int:
         }
     )
 
+    # Which rules ran is only interesting when some may have been skipped.
+    if rules_run is not None and (mode != "full" or rules_run["skipped"]):
+        combined_metrics["rules"] = rules_run
+
     result = {
         "chapter": "CH07",
         "status": status,
@@ -273,9 +314,45 @@ def main() -> int:
         "messages": messages,
     }
 
+    return result
+
+
+def run_lab() -> Dict[str, Any]:
+    """Evaluate the change pack against the snapshot and write result.json."""
+    ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
+
+    load_errors: List[str] = []
+    snapshot = load_json(SNAPSHOT_PATH, load_errors)
+    change_pack = load_json(CHANGE_PACK_PATH, load_errors)
+
+    mode = "full"
+    if RULES_CONFIG_PATH.exists():
+        config = load_json(RULES_CONFIG_PATH, load_errors)
+        mode = config.get("mode", "full") if isinstance(config, dict) else config
+        if mode not in MODES:
+            load_errors.append(f"{RULES_CONFIG_PATH.name}: mode must be one of {list(MODES)}, got {mode!r}")
+
+    refs = None
+    if REF_INDEX_PATH.exists():
+        before = len(load_errors)
+        ref_index = load_json(REF_INDEX_PATH, load_errors)
+        if isinstance(ref_index, dict) and isinstance(ref_index.get("refs"), dict):
+            refs = known_refs(ref_index)
+        elif len(load_errors) == before:
+            load_errors.append(f"{REF_INDEX_PATH.name}: expected an object with a \"refs\" object")
+
+    result = evaluate_change_pack(snapshot, change_pack, load_errors, mode, refs)
+
     with RESULT_PATH.open("w", encoding="utf-8") as f:
         json.dump(result, f, ensure_ascii=False, indent=2)
 
+    return result
+
+
+def main() -> int:
+    result = run_lab()
+    status = result["status"]
+
     display_path = RESULT_PATH.relative_to(CH07_DIR)
     print(f"[CH07] Lab completed. status={status} → {display_path}")
     return 0 if status == "accept" else 1
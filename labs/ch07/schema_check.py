@@ -0,0 +1,128 @@
+"""
+Stdlib-only JSON Schema subset for CH07 (compiled once, cached).
+
+CH07 may not import from outside `labs/ch07/` nor depend on third-party
+packages (see CH07_lab_min_spec.md), so it cannot use
+`labs/common/validation.py` or `jsonschema`. This is the same approach
+cut down to the keywords `schemas/change_pack.schema.json` uses: `type`,
+`const`, `enum`, `required`, `properties`, `items`, `minimum`,
+`maximum`. Other keywords raise `ValueError` when the schema is loaded.
+"""
+
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+Check = Callable[[Any, str, List[str]], None]
+
+_ANNOTATIONS = {"$schema", "$id", "$comment", "title", "description", "default", "examples"}
+
+_TYPES: Dict[str, Callable[[Any], bool]] = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None,
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "integer": lambda v: (isinstance(v, int) and not isinstance(v, bool))
+    or (isinstance(v, float) and v.is_integer()),
+}
+
+
+def _compile(schema: Dict[str, Any]) -> Check:
+    unknown = set(schema) - _ANNOTATIONS - {
+        "type", "const", "enum", "required", "properties", "items", "minimum", "maximum",
+    }
+    if unknown:
+        raise ValueError(f"unsupported JSON Schema keyword(s) in CH07 schema: {sorted(unknown)}")
+
+    checks: List[Check] = []
+    if "type" in schema:
+        names = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+        tests = [_TYPES[n] for n in names]
+        label = names[0] if len(names) == 1 else names
+
+        def check_type(v: Any, path: str, errors: List[str]) -> None:
+            if not any(t(v) for t in tests):
+                errors.append(f"{path}: {v!r} is not of type {label!r}")
+
+        checks.append(check_type)
+    if "const" in schema:
+        expected = schema["const"]
+
+        def check_const(v: Any, path: str, errors: List[str]) -> None:
+            if v != expected:
+                errors.append(f"{path}: {expected!r} was expected, got {v!r}")
+
+        checks.append(check_const)
+    if "enum" in schema:
+        allowed = schema["enum"]
+
+        def check_enum(v: Any, path: str, errors: List[str]) -> None:
+            if v not in allowed:
+                errors.append(f"{path}: {v!r} is not one of {allowed!r}")
+
+        checks.append(check_enum)
+    if "required" in schema:
+        required = schema["required"]
+
+        def check_required(v: Any, path: str, errors: List[str]) -> None:
+            if isinstance(v, dict):
+                errors.extend(f"{path}: {k!r} is a required property" for k in required if k not in v)
+
+        checks.append(check_required)
+    if "properties" in schema:
+        props = {k: _compile(s) for k, s in schema["properties"].items()}
+
+        def check_properties(v: Any, path: str, errors: List[str]) -> None:
+            if isinstance(v, dict):
+                for k, c in props.items():
+                    if k in v:
+                        c(v[k], f"{path}.{k}", errors)
+
+        checks.append(check_properties)
+    if "items" in schema:
+        item = _compile(schema["items"])
+
+        def check_items(v: Any, path: str, errors: List[str]) -> None:
+            if isinstance(v, list):
+                for i, x in enumerate(v):
+                    item(x, f"{path}[{i}]", errors)
+
+        checks.append(check_items)
+    for keyword, fails, text in (
+        ("minimum", lambda v, n: v < n, "less than the minimum of"),
+        ("maximum", lambda v, n: v > n, "greater than the maximum of"),
+    ):
+        if keyword in schema:
+            checks.append(_bound(schema[keyword], fails, text))
+
+    def check(v: Any, path: str, errors: List[str]) -> None:
+        for c in checks:
+            c(v, path, errors)
+
+    return check
+
+
+def _bound(limit: Any, fails: Callable[[Any, Any], bool], text: str) -> Check:
+    def check(v: Any, path: str, errors: List[str]) -> None:
+        if _TYPES["number"](v) and fails(v, limit):
+            errors.append(f"{path}: {v!r} is {text} {limit!r}")
+
+    return check
+
+
+@lru_cache(maxsize=None)
+def _load(path: str, mtime_ns: int) -> Check:
+    with open(path, "r", encoding="utf-8") as f:
+        return _compile(json.load(f))
+
+
+def schema_errors(schema_path: Path, doc: Any) -> List[str]:
+    """`<json path>: <message>` for everything in `doc` the schema rejects."""
+    errors: List[str] = []
+    _load(str(schema_path), schema_path.stat().st_mtime_ns)(doc, "$", errors)
+    return errors
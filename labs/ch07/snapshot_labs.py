@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+LABS Global Snapshot generator (Day-0 / dev helper).
+
+- Aggregates labs/chXX/artifacts/result.json into a single
+  labs/ch07/inputs/state_snapshot.json for CH07 Lab.
+- Importable (`build_snapshot`, `write_snapshot`) so the unified runner
+  can refresh the snapshot in-process; `snapshot_labs.sh` calls `main()`.
+- Incremental: a side index (`inputs/state_snapshot.index.json`,
+  git-ignored) records the size, mtime and sha256 of every result.json
+  folded in. A refresh re-reads only results whose size or mtime moved,
+  patches only chapters whose content hash changed, and leaves the
+  snapshot file alone when nothing did. `--full` rebuilds from scratch.
+- Writers take an exclusive lock (`fcntl`, where available), and both
+  files are replaced atomically (temp file + `os.replace`), so CH07
+  never reads a half-written snapshot.
+
+This script is a dev/authoring helper, NOT part of the reader's GA flow.
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, writes stay atomic.
+    fcntl = None  # type: ignore[assignment]
+
+
+CH07_DIR = Path(__file__).resolve().parent
+LABS_DIR = CH07_DIR.parent
+SNAPSHOT_PATH = CH07_DIR / "inputs" / "state_snapshot.json"
+INDEX_PATH = CH07_DIR / "inputs" / "state_snapshot.index.json"
+
+DEFAULT_BOUNDARY: Dict[str, Any] = {
+    "allowed_targets": ["production"],
+}
+
+DEFAULT_METRICS: Dict[str, Any] = {
+    "current_model": {"id": "ch07_model_v1", "auc": 0.92},
+    "candidate_model": {"id": "ch07_model_v2", "auc": 0.94},
+    "min_auc": 0.90,
+    "max_delta_auc": 0.05,
+}
+
+
+def result_paths(labs_dir: Path = LABS_DIR) -> Dict[str, Path]:
+    """{"CH02": labs/ch02/artifacts/result.json, ...} in chapter order."""
+    # labs/ch02/artifacts/result.json -> ch02 -> CH02
+    return {
+        path.parent.parent.name.upper(): path
+        for path in sorted(labs_dir.glob("ch*/artifacts/result.json"))
+    }
+
+
+def _parse_result(data: bytes) -> Dict[str, Any]:
+    result = json.loads(data.decode("utf-8"))
+    # Timings differ run to run; keep the snapshot deterministic.
+    result.pop("perf", None)
+    return result
+
+
+def collect_chapter_results(labs_dir: Path = LABS_DIR) -> Dict[str, Any]:
+    """Return {"CH02": {"result": {...}}, ...} for every chapter with a result."""
+    return {
+        chapter: {"result": _parse_result(path.read_bytes())}
+        for chapter, path in result_paths(labs_dir).items()
+    }
+
+
+def build_snapshot(chapters: Dict[str, Any], generated_ts_utc: str) -> Dict[str, Any]:
+    """Wrap chapter results with meta + boundary + metrics for the CH07 evaluator."""
+    return {
+        "chapters": chapters,
+        "meta": {
+            "generated_by": "labs/ch07/snapshot_labs.sh",
+            "generated_ts_utc": generated_ts_utc,
+            "profile": "HDBM-LABS-Global",
+            "scope": "labs",
+        },
+        "boundary": copy.deepcopy(DEFAULT_BOUNDARY),
+        "metrics": copy.deepcopy(DEFAULT_METRICS),
+    }
+
+
+def _write_atomic(path: Path, data: Any) -> None:
+    """Write JSON to a temp file next to `path`, then rename it over `path`."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def write_snapshot(snapshot: Dict[str, Any], path: Path = SNAPSHOT_PATH) -> None:
+    _write_atomic(path, snapshot)
+
+
+@contextmanager
+def _locked(index_path: Path) -> Iterator[None]:
+    """Serialize snapshot writers on `<index>.lock`."""
+    if fcntl is None:
+        yield
+        return
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    with index_path.with_suffix(".lock").open("a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _stat(path: Path) -> List[int]:
+    st = path.stat()
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def update_snapshot(
+    labs_dir: Path = LABS_DIR,
+    path: Path = SNAPSHOT_PATH,
+    index_path: Path = INDEX_PATH,
+    full: bool = False,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Fold changed chapter results into the snapshot; return (snapshot, stats).
+
+    The index is trusted only while the snapshot file still has the size
+    and mtime recorded at the last write; after a hand edit or a
+    `git checkout` every result is re-read (and only written back if it
+    differs). `stats` lists the chapters patched and removed.
+    """
+    with _locked(index_path):
+        snapshot = None if full else _read_json(path)
+        index = _read_json(index_path) if snapshot is not None else None
+        if index is None or not path.exists() or index.get("snapshot") != _stat(path):
+            index = {}
+        folded: Dict[str, Any] = index.get("results", {})
+        chapters: Dict[str, Any] = dict(snapshot.get("chapters", {})) if snapshot else {}
+
+        entries: Dict[str, Any] = {}
+        patched: List[str] = []
+        for chapter, result_path in result_paths(labs_dir).items():
+            stat = _stat(result_path)
+            entry = folded.get(chapter)
+            if entry is not None and entry["stat"] == stat and chapter in chapters:
+                entries[chapter] = entry
+                continue
+            data = result_path.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            if entry is None or entry["sha256"] != digest or chapter not in chapters:
+                result = _parse_result(data)
+                if chapters.get(chapter) != {"result": result}:
+                    chapters[chapter] = {"result": result}
+                    patched.append(chapter)
+            entries[chapter] = {"stat": stat, "sha256": digest}
+        removed = [chapter for chapter in chapters if chapter not in entries]
+        for chapter in removed:
+            del chapters[chapter]
+        chapters = dict(sorted(chapters.items()))
+
+        if not chapters:
+            print(
+                "[WARN] No labs/chXX/artifacts/result.json found; writing empty chapters object.",
+                file=sys.stderr,
+            )
+        now_utc = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        if snapshot is None:
+            snapshot = build_snapshot(chapters, now_utc)
+            write_snapshot(snapshot, path)
+        elif patched or removed:
+            snapshot["chapters"] = chapters
+            snapshot.setdefault("meta", {})["generated_ts_utc"] = now_utc
+            write_snapshot(snapshot, path)
+
+        _write_atomic(index_path, {"snapshot": _stat(path), "results": entries})
+
+    stats = {
+        "mode": "full" if full or not folded else "incremental",
+        "chapters": len(chapters),
+        "patched": patched,
+        "removed": removed,
+    }
+    return snapshot, stats
+
+
+def refresh_snapshot(labs_dir: Path = LABS_DIR, path: Path = SNAPSHOT_PATH, full: bool = False) -> Dict[str, Any]:
+    """Bring the snapshot up to date with every chapter result and return it."""
+    snapshot, _ = update_snapshot(labs_dir, path, path.with_name(INDEX_PATH.name), full)
+    return snapshot
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Refresh the LABS Global Snapshot for CH07.")
+    parser.add_argument("--full", action="store_true", help="Rebuild from every result, ignoring the index.")
+    args = parser.parse_args(argv)
+    _, stats = update_snapshot(full=args.full)
+    if stats["patched"] or stats["removed"] or args.full:
+        print(
+            f"[OK] Wrote Labs Global Snapshot to {SNAPSHOT_PATH} ({stats['mode']}: "
+            f"patched {stats['patched']}, removed {stats['removed']})"
+        )
+    else:
+        print(f"[OK] Labs Global Snapshot is up to date ({stats['chapters']} chapter(s)); {SNAPSHOT_PATH} unchanged")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,20 +1,17 @@
 #!/usr/bin/env python
 from pathlib import Path
-import json
+import sys
 
-def load_json(path: Path) -> dict:
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+LABS_DIR = str(Path(__file__).resolve().parent.parent)
+if LABS_DIR not in sys.path:
+    sys.path.insert(0, LABS_DIR)
 
-def main():
-    base_dir = Path(__file__).resolve().parent
-    inputs_dir = base_dir / "inputs"
-    artifacts_dir = base_dir / "artifacts"
-    artifacts_dir.mkdir(parents=True, exist_ok=True)
-    out_path = artifacts_dir / "result.json"
+from common import perf
+from common.fastio import load_json
+from common.validation import rejected, validate_inputs
 
-    cfg = load_json(inputs_dir / "pipeline.json")
 
+def evaluate_guards(cfg: dict) -> dict:
     stages = cfg.get("stages", [])
     stage_count = len(stages)
     guards_per_stage = [len(s.get("guards", [])) for s in stages]
@@ -57,10 +54,33 @@ def main():
         },
     }
 
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    return result
+
+def run_lab():
+    base_dir = Path(__file__).resolve().parent
+    inputs_dir = base_dir / "inputs"
+    artifacts_dir = base_dir / "artifacts"
+    artifacts_dir.mkdir(parents=True, exist_ok=True)
+    out_path = artifacts_dir / "result.json"
+
+    with perf.session("CH08", artifacts_dir):
+        with perf.phase("load"):
+            cfg = load_json(inputs_dir / "pipeline.json")
+        with perf.phase("validate"):
+            errors = validate_inputs({"pipeline.json": (base_dir / "schemas" / "pipeline.schema.json", cfg)})
+        if errors:
+            result = rejected("CH08", "unknown", errors)
+        else:
+            with perf.phase("evaluate"):
+                result = evaluate_guards(cfg)
+        perf.write_result(result, out_path)
+
+    return result
 
-    print(f"[CH08] Lab completed. status={status} → {out_path.relative_to(base_dir)}")
+
+def main():
+    result = run_lab()
+    print(f"[CH08] Lab completed. status={result['status']} → artifacts/result.json")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+CH09 dual-write monitor: replication lag and drift from change logs.
+
+`run.py` compares row counts at one point in time. While a table is in
+`dual_write` mode, the application writes every change to both copies.
+Each copy also appends it to a change log:
+
+    inputs/<log_dir>/onprem/<table>.csv
+    inputs/<log_dir>/cloud/<table>.csv
+
+Each log is a CSV with a header and the columns `seq` (the write's
+sequence number, shared by both copies), `ts` (epoch seconds when that
+copy applied it), `op` (I/U/D) and the table key (`"key"` in the plan
+entry, else the first other column).
+
+The monitor tails both logs and matches records by (key, seq):
+
+- A matched pair's lag is the gap between its two `ts`. Lags go into a
+  sliding window of per-slot histograms (about 3% resolution), so p50,
+  p95 and p99 cost bounded memory at any event rate.
+- Drift is a record that is never matched:
+  - `missing_<side>`: still unmatched `drift_after_seconds` after the
+    newest `ts` seen;
+  - `op_mismatch`: the two copies logged different ops;
+  - `duplicate`: one copy logged the same (key, seq) twice;
+  - `overflow`: evicted because more than `max_pending` records were
+    waiting.
+- Unmatched records younger than that are in flight (`pending`), not
+  drift.
+
+Memory is bounded by `max_pending` plus the histogram window. Each poll
+reads at most `max_bytes` per log.
+
+`run.py` uses `evaluate_dual_write` once per gate run when
+`inputs/dual_write.json` exists. To watch a cutover continuously, run
+this file:
+
+    python labs/ch09/dual_write.py --interval 5
+
+It rewrites `artifacts/dual_write.json` (a CH09-shaped result) after
+every poll.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+SIDES = ("onprem", "cloud")
+LOG_COLUMNS = ("seq", "ts", "op")
+
+DEFAULTS: Dict[str, Any] = {
+    "log_dir": "changelog",
+    "window_seconds": 300,
+    "max_lag_p99_seconds": 5.0,
+    "drift_after_seconds": 60,
+    "max_drift": 0,
+    "max_pending": 100_000,
+    "max_bytes": 1 << 20,
+}
+
+SLOTS = 60  # the lag window is kept as this many histogram slots
+SUB_BUCKETS = 32  # histogram buckets per power of two of milliseconds
+
+
+def _bucket(lag_ms: float) -> int:
+    if lag_ms < 1.0:
+        return 0
+    mantissa, exponent = math.frexp(lag_ms)
+    return exponent * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS)
+
+
+def _bucket_ms(bucket: int) -> float:
+    """Upper bound of a histogram bucket, in milliseconds."""
+    if bucket == 0:
+        return 1.0
+    exponent, sub = divmod(bucket, SUB_BUCKETS)
+    return math.ldexp(0.5 + (sub + 1) / (2 * SUB_BUCKETS), exponent)
+
+
+class LogTail:
+    """Incremental reader of one append-only change log."""
+
+    def __init__(self, path: Path, key: Optional[str], max_bytes: int) -> None:
+        self.path = path
+        self.key = key
+        self.max_bytes = max_bytes
+        self.offset = 0
+        self.inode: Optional[int] = None
+        self.at_end = False
+        self.columns: Optional[Tuple[int, int, int, int]] = None  # key, seq, ts, op positions
+        self.width = 0
+
+    def _read_header(self, line: bytes) -> None:
+        header = [c.strip() for c in next(csv.reader([line.decode("utf-8")]), [])]
+        key = self.key or next((c for c in header if c not in LOG_COLUMNS), None)
+        missing = [c for c in (key,) + LOG_COLUMNS if c is None or c not in header]
+        if missing:
+            raise ValueError(f"{self.path}: change log needs key, seq, ts and op columns; header is {header}")
+        self.columns = tuple(header.index(c) for c in (key,) + LOG_COLUMNS)  # type: ignore[assignment]
+        self.width = len(header)
+
+    def poll(self) -> List[Tuple[str, str, float, str]]:
+        """New whole records as (key, seq, ts, op); [] when the log does not exist yet."""
+        self.at_end = True
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return []
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            # New, rotated or truncated: read from the start.
+            self.inode, self.offset, self.columns = st.st_ino, 0, None
+        if st.st_size == self.offset:
+            return []
+        with self.path.open("rb") as f:
+            if self.columns is None:
+                header = f.readline()
+                if not header.endswith(b"\n"):
+                    return []
+                self._read_header(header)
+                self.offset = len(header)
+            f.seek(self.offset)
+            chunk = f.read(self.max_bytes)
+        # Only whole lines; a record still being appended is read next poll.
+        end = chunk.rfind(b"\n") + 1
+        if not end:
+            if len(chunk) >= self.max_bytes:
+                raise ValueError(f"{self.path}: record at byte {self.offset} is longer than max_bytes={self.max_bytes}")
+            return []
+        self.offset += end
+        self.at_end = self.offset + (len(chunk) - end) >= st.st_size
+        text = chunk[:end].decode("utf-8")
+        key_at, seq_at, ts_at, op_at = self.columns  # type: ignore[misc]
+        if '"' in text:
+            rows = csv.reader(text.splitlines())
+        else:
+            rows = (line.split(",") for line in text.splitlines())
+        records = []
+        for fields in rows:
+            if len(fields) < self.width:
+                if not fields or fields == [""]:
+                    continue
+                raise ValueError(f"{self.path}: record has {len(fields)} fields, expected {self.width}: {fields}")
+            try:
+                ts = float(fields[ts_at])
+            except ValueError:
+                raise ValueError(f"{self.path}: ts must be epoch seconds, got {fields[ts_at]!r}") from None
+            records.append((fields[key_at], fields[seq_at], ts, fields[op_at].strip().upper()[:1]))
+        return records
+
+
+class TableMonitor:
+    """Matches one table's on-prem and cloud records and keeps lag/drift stats."""
+
+    def __init__(self, name: str, config: Dict[str, Any]) -> None:
+        self.name = name
+        self.window = float(config["window_seconds"])
+        self.slot_seconds = self.window / SLOTS
+        self.drift_after = float(config["drift_after_seconds"])
+        self.max_pending = int(config["max_pending"])
+        # (key, seq) -> (side, ts, op), oldest first.
+        self.pending: "OrderedDict[Tuple[str, str], Tuple[int, float, str]]" = OrderedDict()
+        self.slots: Dict[int, Dict[int, int]] = {}
+        self.events = [0, 0]
+        self.later = [0, 0]  # matched pairs where this side applied the write last
+        self.matched = 0
+        self.max_lag = 0.0
+        self.newest = [-math.inf, -math.inf]  # latest ts read from each side
+        self.drift: Dict[str, int] = {f"missing_{s}": 0 for s in SIDES}
+        self.drift.update(op_mismatch=0, duplicate=0, overflow=0)
+
+    def add(self, side: int, records: List[Tuple[str, str, float, str]]) -> None:
+        pending = self.pending
+        slots = self.slots
+        slot_seconds = self.slot_seconds
+        newest = self.newest[side]
+        for key, seq, ts, op in records:
+            k = (key, seq)
+            other = pending.get(k)
+            if other is None:
+                pending[k] = (side, ts, op)
+            elif other[0] == side:
+                self.drift["duplicate"] += 1  # the first one keeps waiting for its pair
+            else:
+                del pending[k]
+                if other[2] != op:
+                    self.drift["op_mismatch"] += 1
+                lag = ts - other[1]
+                if lag < 0:
+                    lag = -lag
+                    self.later[other[0]] += 1
+                else:
+                    self.later[side] += 1
+                if lag > self.max_lag:
+                    self.max_lag = lag
+                self.matched += 1
+                slot = slots.setdefault(int(max(ts, other[1]) // slot_seconds), {})
+                b = _bucket(lag * 1000.0)
+                slot[b] = slot.get(b, 0) + 1
+            if ts > newest:
+                newest = ts
+        self.newest[side] = newest
+        self.events[side] += len(records)
+
+    def expire(self, caught_up: bool) -> None:
+        """Count records that can no longer be matched as drift.
+
+        While either log still has a backlog, time is measured by the log
+        that is further behind, so reading one log ahead of the other is
+        not mistaken for drift. Once both are read to the end, the newest
+        `ts` of either side counts, so a stalled copy shows up as drift.
+        """
+        pending = self.pending
+        now = max(self.newest) if caught_up else min(self.newest)
+        deadline = now - self.drift_after
+        while pending:
+            k, (side, ts, op) = next(iter(pending.items()))
+            if len(pending) > self.max_pending:
+                self.drift["overflow"] += 1
+            elif ts < deadline:
+                self.drift[f"missing_{SIDES[1 - side]}"] += 1
+            else:
+                break
+            pending.popitem(last=False)
+        if self.slots:
+            oldest = int((max(self.newest) - self.window) // self.slot_seconds)
+            for slot in [s for s in self.slots if s <= oldest]:
+                del self.slots[slot]
+
+    def lag_percentiles(self) -> Dict[str, Optional[float]]:
+        merged: Dict[int, int] = {}
+        for slot in self.slots.values():
+            for b, n in slot.items():
+                merged[b] = merged.get(b, 0) + n
+        total = sum(merged.values())
+        out: Dict[str, Optional[float]] = {}
+        for label, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+            if not total:
+                out[label] = None
+                continue
+            rank, seen = q * total, 0
+            for b in sorted(merged):
+                seen += merged[b]
+                if seen >= rank:
+                    out[label] = round(_bucket_ms(b) / 1000.0, 3)
+                    break
+        return out
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "events": dict(zip(SIDES, self.events)),
+            "matched": self.matched,
+            "pending": len(self.pending),
+            "lag_seconds": {**self.lag_percentiles(), "max": round(self.max_lag, 3)},
+            "applied_last": dict(zip(SIDES, self.later)),
+            "drift": dict(self.drift),
+        }
+
+    def drift_count(self) -> int:
+        return sum(self.drift.values())
+
+
+class DualWriteMonitor:
+    """Tails the change logs of every `dual_write` table in a migration plan."""
+
+    def __init__(self, plan: Dict[str, Any], log_dir: Path, config: Dict[str, Any]) -> None:
+        self.plan_id = plan.get("plan_id", "baseline")
+        self.config = {**DEFAULTS, **config}
+        self.tables: Dict[str, Tuple[TableMonitor, List[LogTail]]] = {}
+        for t in plan.get("tables", []):
+            if t.get("mode") != "dual_write" or not t.get("name"):
+                continue
+            name = t["name"]
+            tails = [LogTail(log_dir / side / f"{name}.csv", t.get("key"), int(self.config["max_bytes"])) for side in SIDES]
+            self.tables[name] = (TableMonitor(name, self.config), tails)
+
+    def poll(self) -> int:
+        """Read whatever the logs gained since the last poll; return how many records."""
+        read = 0
+        for monitor, tails in self.tables.values():
+            for side, tail in enumerate(tails):
+                records = tail.poll()
+                read += len(records)
+                monitor.add(side, records)
+            monitor.expire(caught_up=all(tail.at_end for tail in tails))
+        return read
+
+    def drain(self) -> int:
+        """Poll until the logs have nothing new (one gate run)."""
+        total = 0
+        while True:
+            read = self.poll()
+            total += read
+            if not read:
+                return total
+
+    def result(self) -> Dict[str, Any]:
+        max_p99 = float(self.config["max_lag_p99_seconds"])
+        max_drift = int(self.config["max_drift"])
+        tables = {name: monitor.report() for name, (monitor, _) in self.tables.items()}
+        slow = sorted(n for n, r in tables.items() if (r["lag_seconds"]["p99"] or 0.0) > max_p99)
+        drifting = sorted(n for n, (m, _) in self.tables.items() if m.drift_count() > max_drift)
+        missing_logs = sorted(
+            f"{name}@{side}" for name, (_, tails) in self.tables.items() for side, tail in zip(SIDES, tails)
+            if not tail.path.exists()
+        )
+
+        checks = {
+            "dual_write_logs_present": not missing_logs,
+            "dual_write_lag_within_limit": not slow,
+            "no_dual_write_drift": not drifting,
+        }
+        status = "accept" if all(checks.values()) else "reject"
+        messages = [f"Monitored dual-write change logs for {len(tables)} table(s)."]
+        if missing_logs:
+            messages.append(f"Change logs missing for: {missing_logs}")
+        for name in slow:
+            messages.append(
+                f"Replication lag p99 for '{name}' is {tables[name]['lag_seconds']['p99']}s (limit {max_p99}s)."
+            )
+        for name in drifting:
+            found = {k: v for k, v in tables[name]["drift"].items() if v}
+            messages.append(f"Dual-write drift for '{name}': {found} (allowed {max_drift}).")
+        return {
+            "chapter": "CH09",
+            "status": status,
+            "change_id": self.plan_id,
+            "messages": messages,
+            "checks": checks,
+            "metrics": {"dual_write": tables},
+        }
+
+
+def evaluate_dual_write(plan: Dict[str, Any], log_dir: Path, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Read every log to its end once and return the CH09-shaped result."""
+    monitor = DualWriteMonitor(plan, log_dir, config)
+    monitor.drain()
+    return monitor.result()
+
+
+def _write_atomic(path: Path, result: Dict[str, Any]) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    base_dir = Path(__file__).resolve().parent
+    parser = argparse.ArgumentParser(description="Monitor CH09 dual-write replication lag and drift.")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls.")
+    parser.add_argument("--once", action="store_true", help="Read the logs to the end, write one result, exit.")
+    parser.add_argument("--out", type=Path, default=base_dir / "artifacts" / "dual_write.json")
+    args = parser.parse_args(argv)
+
+    inputs_dir = base_dir / "inputs"
+    with (inputs_dir / "ch09_migration_plan.json").open("r", encoding="utf-8") as f:
+        plan = json.load(f)
+    config_path = inputs_dir / "dual_write.json"
+    config: Dict[str, Any] = {}
+    if config_path.exists():
+        with config_path.open("r", encoding="utf-8") as f:
+            config = json.load(f)
+    monitor = DualWriteMonitor(plan, inputs_dir / config.get("log_dir", DEFAULTS["log_dir"]), config)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                read = monitor.drain() if args.once else monitor.poll()
+            except ValueError as e:
+                print(f"[CH09 dual-write] change log rejected: {e}", file=sys.stderr)
+                return 1
+            elapsed = time.perf_counter() - start
+            result = monitor.result()
+            _write_atomic(args.out, result)
+            rate = f", {read / elapsed:,.0f} records/s" if read and elapsed > 0 else ""
+            print(f"[CH09 dual-write] status={result['status']} read={read}{rate}", flush=True)
+            if args.once:
+                return 0 if result["status"] == "accept" else 1
+            time.sleep(max(0.0, args.interval - elapsed))
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+CH09 row-content parity: a sampled pre-check that escalates to a full
+comparison.
+
+Row counts and key uniqueness can match while the rows themselves
+differ. A full content comparison holds one side's rows (as 64-bit row
+hashes) keyed by primary key, so for the common case (copies in sync)
+the check first compares a sample:
+
+- A key is in the sample when `crc32(key)` falls below `sample_rate`
+  of the hash range. Both copies therefore sample the *same* keys
+  (stratified by key hash), and the sample is the same on every run.
+- Rows are picked from raw line bytes (key field + crc32), so only
+  sampled rows are decoded and built; files with quoted fields or
+  compression go through `fastio.iter_rows` instead.
+- A sampled key is a mismatch when it is missing on one side or its row
+  (columns aligned by name) differs.
+- From `x` mismatches among `n` sampled keys, the one-sided Wilson
+  score bound gives an upper limit on the table's mismatch rate at
+  `confidence`.
+
+Only when that bound exceeds `max_mismatch_rate` is the whole table
+compared. The exact rate then decides. With `max_mismatch_rate` 0 every
+table escalates, so the result is always exact.
+"""
+
+from __future__ import annotations
+
+import math
+import zlib
+from pathlib import Path
+from statistics import NormalDist
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from common.fastio import BUFFER_SIZE, iter_rows, read_header
+
+DEFAULTS: Dict[str, Any] = {
+    "sample_rate": 0.01,
+    "confidence": 0.95,
+    "max_mismatch_rate": 0.001,
+}
+
+EXAMPLES = 5
+_HASH_RANGE = 1 << 32
+
+
+def wilson_upper(mismatches: int, n: int, confidence: float) -> float:
+    """One-sided Wilson score upper bound for a proportion (1.0 when n == 0)."""
+    if n == 0:
+        return 1.0
+    z = NormalDist().inv_cdf(confidence)
+    p = mismatches / n
+    z2n = z * z / n
+    centre = p + z2n / 2
+    spread = z * math.sqrt(p * (1 - p) / n + z2n / (4 * n))
+    return min(1.0, (centre + spread) / (1 + z2n))
+
+
+def _sampled_rows(path: Path, columns: List[str], key: str, cutoff: int) -> List[Tuple[Optional[str], ...]]:
+    """Rows projected to `columns` whose key hashes below `cutoff`.
+
+    Plain `.csv` files are filtered a batch of raw lines at a time and
+    only the picked lines are decoded; a batch containing a `"` falls
+    back to `iter_rows` for the whole file.
+    """
+    header = read_header(path)
+    positions = [header.index(c) for c in columns]
+    key_at = header.index(key)
+    crc32 = zlib.crc32
+    if path.suffix.lower() == ".csv":
+        picked: List[Tuple[Optional[str], ...]] = []
+        with path.open("rb") as f:
+            f.readline()
+            while True:
+                batch = f.readlines(BUFFER_SIZE)
+                if not batch:
+                    return picked
+                if b'"' in b"".join(batch):
+                    break
+                if key_at == 0 and len(header) > 1:
+                    lines = [line for line in batch if crc32(line.split(b",", 1)[0]) < cutoff]
+                else:
+                    lines = [
+                        line for line in batch
+                        if len(parts := line.rstrip(b"\r\n").split(b",", key_at + 1)) > key_at
+                        and crc32(parts[key_at]) < cutoff
+                    ]
+                for line in lines:
+                    fields = line.decode("utf-8").rstrip("\r\n").split(",")
+                    if fields == [""]:
+                        continue
+                    fields += [None] * (len(header) - len(fields))  # type: ignore[list-item]
+                    picked.append(tuple(fields[i] for i in positions))
+    key_in_row = columns.index(key)
+    return [
+        row for row in iter_rows(path, columns=columns, row_type="tuple")
+        if crc32((row[key_in_row] or "").encode("utf-8")) < cutoff
+    ]
+
+
+def compare(
+    onprem_path: Path, cloud_path: Path, columns: List[str], key: str, sample_rate: Optional[float] = None
+) -> Dict[str, Any]:
+    """Compare rows by key: every key, or only the sampled keys when `sample_rate` is set."""
+    key_at = columns.index(key)
+
+    def rows(path: Path) -> Iterable[Tuple[Optional[str], ...]]:
+        if sample_rate is None:
+            return iter_rows(path, columns=columns, row_type="tuple")
+        return _sampled_rows(path, columns, key, int(sample_rate * _HASH_RANGE))
+
+    onprem = {row[key_at]: hash(row) for row in rows(onprem_path)}
+    compared = only_cloud = changed = 0
+    examples: List[Optional[str]] = []
+    for row in rows(cloud_path):
+        k = row[key_at]
+        compared += 1
+        expected = onprem.pop(k, None)
+        if expected is None:
+            only_cloud += 1
+        elif expected == hash(row):
+            continue
+        else:
+            changed += 1
+        if len(examples) < EXAMPLES:
+            examples.append(k)
+    only_onprem = len(onprem)
+    examples.extend(sorted(onprem, key=str)[: EXAMPLES - len(examples)])
+
+    mismatches = only_onprem + only_cloud + changed
+    return {
+        "keys": compared + only_onprem,
+        "mismatches": mismatches,
+        "only_onprem": only_onprem,
+        "only_cloud": only_cloud,
+        "changed": changed,
+        "example_keys": examples,
+    }
+
+
+def check_parity(onprem_path: Path, cloud_path: Path, key: Optional[str], config: Dict[str, Any]) -> Dict[str, Any]:
+    """Sampled pre-check, escalated to a full comparison when its bound is too high."""
+    config = {**DEFAULTS, **config}
+    limit = float(config["max_mismatch_rate"])
+    columns = read_header(onprem_path)
+    cloud_columns = read_header(cloud_path)
+    if sorted(columns) != sorted(cloud_columns):
+        return {
+            "phase": "columns",
+            "within_limit": False,
+            "columns": {"onprem": columns, "cloud": cloud_columns},
+        }
+    key = key or columns[0]
+
+    sample = compare(onprem_path, cloud_path, columns, key, float(config["sample_rate"]))
+    n, x = sample["keys"], sample["mismatches"]
+    upper = wilson_upper(x, n, float(config["confidence"]))
+    report: Dict[str, Any] = {
+        "phase": "sample",
+        "sample": {
+            "rate": config["sample_rate"],
+            "keys": n,
+            "mismatches": x,
+            "estimated_mismatch_rate": round(x / n, 6) if n else None,
+            "upper_bound": round(upper, 6),
+            "confidence": config["confidence"],
+        },
+        "mismatch_rate": round(upper, 6),
+        "within_limit": upper <= limit,
+    }
+    if upper > limit:
+        full = compare(onprem_path, cloud_path, columns, key)
+        rate = full["mismatches"] / full["keys"] if full["keys"] else 0.0
+        report.update(phase="full", full=full, mismatch_rate=round(rate, 6), within_limit=rate <= limit)
+    return report
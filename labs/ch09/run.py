@@ -1,27 +1,45 @@
 #!/usr/bin/env python
 from pathlib import Path
-import csv
-import json
+from typing import Optional
+import sys
 
-def load_csv(path: Path):
-    with path.open("r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        return list(reader)
+LABS_DIR = str(Path(__file__).resolve().parent.parent)
+if LABS_DIR not in sys.path:
+    sys.path.insert(0, LABS_DIR)
 
-def load_json(path: Path) -> dict:
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+from common import perf
+from common.fastio import count_rows, load_json, read_header
+from common.keyindex import KeyIndex
+from common.validation import rejected, validate_inputs
+from common.uniqueness import check_unique, describe
+from dual_write import evaluate_dual_write
+from parity import check_parity
 
-def main():
-    base_dir = Path(__file__).resolve().parent
-    onprem_dir = base_dir / "onprem"
-    cloud_dir = base_dir / "cloud"
-    inputs_dir = base_dir / "inputs"
-    artifacts_dir = base_dir / "artifacts"
-    artifacts_dir.mkdir(parents=True, exist_ok=True)
-    out_path = artifacts_dir / "result.json"
+def delta_row_counts(name: str, key: Optional[str], onprem_path: Path, cloud_path: Path, delta: dict):
+    """Row counts from the persisted key index of one table, updated from
+    changed snapshot files and new CDC records (`<cdc_dir>/<side>/<name>.csv`)."""
+    key = key or read_header(onprem_path)[0]
+    sides = {"onprem": onprem_path, "cloud": cloud_path}
+    with KeyIndex(delta["state_dir"] / f"key_index_{name}.sqlite", list(sides)) as index:
+        for side, path in sides.items():
+            log = delta["cdc_dir"] / side / f"{name}.csv"
+            logs = [log] if log.exists() else []
+            index.forget_missing(side, [path] + logs)
+            index.sync_file(side, path, key)
+            for log in logs:
+                index.apply_log(side, log, key)
+        stats = {"files_read": index.files_read, "cdc_records": index.cdc_records, "keys_changed": index.changed_keys}
+        duplicates = {side: index.duplicates(side) for side in sides}
+        return index.rows("onprem"), index.rows("cloud"), duplicates, stats
 
-    plan = load_json(inputs_dir / "ch09_migration_plan.json")
+def evaluate_migration(
+    plan: dict,
+    onprem_dir: Path,
+    cloud_dir: Path,
+    delta: Optional[dict] = None,
+    dual_write: Optional[dict] = None,
+    parity: Optional[dict] = None,
+) -> dict:
     tables = plan.get("tables", [])
 
     missing_onprem = []
@@ -41,6 +59,10 @@ def main():
 
     # For simplicity, we check only 'customers' row counts when both exist
     row_mismatch = {}
+    duplicates = {}
+    delta_stats = {}
+    cdc_errors = {}
+    parity_reports = {}
     for t in tables:
         name = t.get("name")
         if not name:
@@ -48,19 +70,63 @@ def main():
         onprem_path = onprem_dir / f"{name}.csv"
         cloud_path = cloud_dir / f"{name}.csv"
         if onprem_path.exists() and cloud_path.exists():
-            onprem_rows = load_csv(onprem_path)
-            cloud_rows = load_csv(cloud_path)
-            if len(onprem_rows) != len(cloud_rows):
+            with perf.phase("load"):
+                if delta is not None:
+                    try:
+                        onprem_count, cloud_count, found, delta_stats[name] = delta_row_counts(
+                            name, t.get("key"), onprem_path, cloud_path, delta
+                        )
+                    except ValueError as e:
+                        # Bad CDC log; the table's index was rolled back.
+                        cdc_errors[name] = str(e)
+                        continue
+                else:
+                    onprem_count = count_rows(onprem_path)
+                    cloud_count = count_rows(cloud_path)
+            # Matching counts can still hide repeated keys on either side.
+            if delta is None:
+                key = t.get("key") or read_header(onprem_path)[0]
+                with perf.phase("uniqueness"):
+                    found = {
+                        "onprem": check_unique([onprem_path], key),
+                        "cloud": check_unique([cloud_path], key),
+                    }
+            for side, report in found.items():
+                if report["duplicate_keys"]:
+                    duplicates[f"{name}@{side}"] = report
+            if onprem_count != cloud_count:
                 row_mismatch[name] = {
-                    "onprem": len(onprem_rows),
-                    "cloud": len(cloud_rows),
+                    "onprem": onprem_count,
+                    "cloud": cloud_count,
                 }
+            if parity is not None:
+                # Row contents: sampled first, full comparison only if needed (see parity.py).
+                with perf.phase("parity"):
+                    parity_reports[name] = check_parity(onprem_path, cloud_path, t.get("key"), parity)
 
     checks = {
         "all_plan_tables_exist_onprem": len(missing_onprem) == 0,
         "all_dual_or_cutover_tables_exist_in_cloud": len(missing_cloud) == 0,
         "no_rowcount_mismatch_for_migrated_tables": len(row_mismatch) == 0,
+        "no_duplicate_keys_in_migrated_tables": len(duplicates) == 0,
     }
+    if delta is not None:
+        checks["cdc_logs_valid"] = len(cdc_errors) == 0
+    if parity is not None:
+        checks["row_contents_within_mismatch_limit"] = all(r["within_limit"] for r in parity_reports.values())
+    monitored = None
+    dual_write_error = None
+    if dual_write is not None:
+        # Lag and drift of dual_write tables from their change logs (see dual_write.py).
+        with perf.phase("dual_write"):
+            try:
+                monitored = evaluate_dual_write(plan, dual_write["log_dir"], dual_write["config"])
+            except ValueError as e:
+                # Malformed change log (bad header, short row, non-numeric ts).
+                dual_write_error = str(e)
+        checks["dual_write_logs_valid"] = dual_write_error is None
+        if monitored is not None:
+            checks.update(monitored["checks"])
 
     status = "accept" if all(checks.values()) else "reject"
 
@@ -76,6 +142,26 @@ def main():
             messages.append(f"Plan requires tables missing in cloud: {missing_cloud}")
         if row_mismatch:
             messages.append(f"Row-count mismatches detected: {row_mismatch}")
+        for table, report in duplicates.items():
+            messages.append(describe(table, report))
+        for table, error in cdc_errors.items():
+            messages.append(f"CDC log for '{table}' rejected, key index left unchanged: {error}")
+        for table, report in parity_reports.items():
+            if report["within_limit"]:
+                continue
+            if report["phase"] == "columns":
+                messages.append(f"Columns of '{table}' differ between copies: {report['columns']}")
+            else:
+                full = report["full"]
+                messages.append(
+                    f"Row contents of '{table}' differ for {full['mismatches']} of {full['keys']} keys "
+                    f"(only on-prem {full['only_onprem']}, only cloud {full['only_cloud']}, changed {full['changed']}; "
+                    f"e.g. {full['example_keys']})."
+                )
+    if monitored is not None:
+        messages.extend(monitored["messages"])
+    if dual_write_error is not None:
+        messages.append(f"Dual-write change log rejected: {dual_write_error}")
 
     result = {
         "chapter": "CH09",
@@ -87,13 +173,74 @@ def main():
             "missing_onprem": missing_onprem,
             "missing_cloud": missing_cloud,
             "row_mismatch": row_mismatch,
+            "duplicate_keys": duplicates,
         },
     }
 
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    if delta is not None:
+        result["metrics"]["delta"] = delta_stats
+        if cdc_errors:
+            result["metrics"]["cdc_errors"] = cdc_errors
+    if parity is not None:
+        result["metrics"]["parity"] = parity_reports
+    if monitored is not None:
+        result["metrics"]["dual_write"] = monitored["metrics"]["dual_write"]
+    elif dual_write_error is not None:
+        result["metrics"]["dual_write"] = {"error": dual_write_error}
+
+    return result
+
+
+def run_lab():
+    base_dir = Path(__file__).resolve().parent
+    onprem_dir = base_dir / "onprem"
+    cloud_dir = base_dir / "cloud"
+    inputs_dir = base_dir / "inputs"
+    artifacts_dir = base_dir / "artifacts"
+    artifacts_dir.mkdir(parents=True, exist_ok=True)
+    out_path = artifacts_dir / "result.json"
+
+    with perf.session("CH09", artifacts_dir):
+        with perf.phase("load"):
+            plan = load_json(inputs_dir / "ch09_migration_plan.json")
+            # Optional configs; each is validated before it is used.
+            # delta: key indexes updated from CDC logs (see common/keyindex.py).
+            # parity: row contents, sampled pre-check (see parity.py).
+            # dual_write: lag/drift monitor over change logs (see dual_write.py).
+            configs = {
+                name: load_json(inputs_dir / f"{name}.json")
+                for name in ("delta", "parity", "dual_write")
+                if (inputs_dir / f"{name}.json").exists()
+            }
+        with perf.phase("validate"):
+            inputs = {"ch09_migration_plan.json": (base_dir / "schemas" / "migration_plan.schema.json", plan)}
+            for name, config in configs.items():
+                inputs[f"{name}.json"] = (base_dir / "schemas" / f"{name}.schema.json", config)
+            errors = validate_inputs(inputs)
+        if errors:
+            result = rejected("CH09", "baseline", errors)
+        else:
+            delta = dual_write = None
+            if "delta" in configs:
+                delta = {
+                    "state_dir": artifacts_dir,
+                    "cdc_dir": inputs_dir / configs["delta"].get("cdc_dir", "cdc"),
+                }
+            if "dual_write" in configs:
+                dual_write = {
+                    "log_dir": inputs_dir / configs["dual_write"].get("log_dir", "changelog"),
+                    "config": configs["dual_write"],
+                }
+            with perf.phase("evaluate"):
+                result = evaluate_migration(plan, onprem_dir, cloud_dir, delta, dual_write, configs.get("parity"))
+        perf.write_result(result, out_path)
+
+    return result
+
 
-    print(f"[CH09] Lab completed. status={status} → {out_path.relative_to(base_dir)}")
+def main():
+    result = run_lab()
+    print(f"[CH09] Lab completed. status={result['status']} → artifacts/result.json")
 
 
 if __name__ == "__main__":
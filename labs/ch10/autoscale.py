@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+CH10 autoscaling policy evaluator.
+
+Replays minute-level load against a multi-cluster warehouse model and
+reports cost, queueing, and scale events for a given autoscaling policy.
+
+Model (per warehouse, one step per minute):
+
+- Capacity is time-varying: `clusters(t) * max_concurrency`, the same
+  `wh_cap` as the static check multiplied by the running cluster count.
+- `demand(t)` is the average number of queries that want to run at
+  once during minute `t`. Work that does not fit is carried over as
+  backlog (queued query-minutes) and served first in the next minute.
+- After each minute the policy may add one cluster (queueing, or
+  utilization at or above `scale_out_utilization`) or remove one
+  (utilization below `scale_in_utilization` with no backlog), subject to
+  `min_clusters`/`max_clusters` and separate scale-out / scale-in
+  cooldowns counted from the last scale event.
+- Cost is cluster-minutes times the warehouse's `cost_per_hour / 60`.
+
+Load comes from a CSV (`minute,warehouse,demand`) of historical
+minute-level demand, or is simulated from `workloads.json` with a
+seeded diurnal pattern. Each warehouse's series is held in a compact
+`array('d')` and replayed in a tight loop, so a month of minutes across
+hundreds of warehouses evaluates in seconds and parameter sweeps stay
+practical.
+"""
+
+from __future__ import annotations
+
+import csv
+import itertools
+import math
+import random
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+
+DEFAULT_POLICY: Dict[str, Any] = {
+    "min_clusters": 1,
+    "max_clusters": 3,
+    "scale_out_utilization": 1.0,
+    "scale_in_utilization": 0.5,
+    "scale_out_cooldown_minutes": 2,
+    "scale_in_cooldown_minutes": 10,
+}
+
+DEFAULT_SIMULATED_LOAD: Dict[str, Any] = {
+    "minutes": 1440,
+    "seed": 10,
+    "diurnal_amplitude": 0.5,
+    "noise": 0.2,
+}
+
+DEFAULT_MAX_QUEUED_FRACTION = 0.01
+
+
+def load_demand_csv(path: Path) -> Dict[str, array]:
+    """Read `minute,warehouse,demand` rows into one series per warehouse.
+
+    Minutes are integers counted from the start of the replay; missing
+    minutes have zero demand.
+    """
+    series: Dict[str, array] = {}
+    with path.open("r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        col = {name.strip(): i for i, name in enumerate(header)}
+        i_min, i_wh, i_dem = col["minute"], col["warehouse"], col["demand"]
+        for row in reader:
+            if not row:
+                continue
+            minute = int(row[i_min])
+            values = series.get(row[i_wh])
+            if values is None:
+                values = series[row[i_wh]] = array("d")
+            if minute >= len(values):
+                values.extend(itertools.repeat(0.0, minute + 1 - len(values)))
+            values[minute] += float(row[i_dem])
+    return series
+
+
+def simulate_demand(workloads: List[Dict[str, Any]], config: Dict[str, Any]) -> Dict[str, array]:
+    """Generate minute-level demand from nominal workload concurrency.
+
+    Each workload follows `concurrency * (1 + amplitude * sin(day phase))`
+    with multiplicative noise, so peaks sit well above the nominal value.
+    """
+    cfg = dict(DEFAULT_SIMULATED_LOAD)
+    cfg.update(config)
+    minutes = int(cfg["minutes"])
+    amplitude = float(cfg["diurnal_amplitude"])
+    noise = float(cfg["noise"])
+    rng = random.Random(cfg["seed"])
+
+    shape = [1.0 + amplitude * math.sin(2.0 * math.pi * (m % 1440) / 1440.0 - math.pi / 2.0) for m in range(minutes)]
+
+    series: Dict[str, array] = {}
+    for wl in workloads:
+        wh_id = wl.get("assigned_warehouse")
+        if wh_id is None:
+            continue
+        base = float(wl.get("concurrency", 0))
+        values = series.get(wh_id)
+        if values is None:
+            values = series[wh_id] = array("d", bytes(8 * minutes))
+        gauss = rng.gauss
+        for m in range(minutes):
+            values[m] += max(0.0, base * shape[m] * (1.0 + noise * gauss(0.0, 1.0)))
+    return series
+
+
+def replay_warehouse(demand: array, slots_per_cluster: int, cost_per_hour: float, policy: Dict[str, Any]) -> Dict[str, Any]:
+    """Replay one warehouse's demand under `policy`."""
+    min_clusters = int(policy["min_clusters"])
+    max_clusters = int(policy["max_clusters"])
+    out_util = float(policy["scale_out_utilization"])
+    in_util = float(policy["scale_in_utilization"])
+    out_cooldown = int(policy["scale_out_cooldown_minutes"])
+    in_cooldown = int(policy["scale_in_cooldown_minutes"])
+
+    clusters = min_clusters
+    last_event = -(10 ** 9)
+    backlog = 0.0
+    cluster_minutes = 0
+    scale_out = 0
+    scale_in = 0
+    queued = 0.0
+    queued_minutes = 0
+    max_backlog = 0.0
+    peak_clusters = clusters
+    total_demand = 0.0
+
+    for minute, wanted in enumerate(demand):
+        total_demand += wanted
+        capacity = clusters * slots_per_cluster
+        cluster_minutes += clusters
+        pending = wanted + backlog
+        if pending > capacity:
+            backlog = pending - capacity
+            served = capacity
+            queued += backlog
+            queued_minutes += 1
+            if backlog > max_backlog:
+                max_backlog = backlog
+        else:
+            backlog = 0.0
+            served = pending
+        util = served / capacity if capacity else 1.0
+
+        since = minute - last_event
+        if (backlog > 0.0 or util >= out_util) and clusters < max_clusters and since >= out_cooldown:
+            clusters += 1
+            scale_out += 1
+            last_event = minute
+            if clusters > peak_clusters:
+                peak_clusters = clusters
+        elif backlog == 0.0 and util < in_util and clusters > min_clusters and since >= in_cooldown:
+            clusters -= 1
+            scale_in += 1
+            last_event = minute
+
+    return {
+        "minutes": len(demand),
+        "cluster_minutes": cluster_minutes,
+        "cost": round(cluster_minutes * cost_per_hour / 60.0, 4),
+        "peak_clusters": peak_clusters,
+        "scale_out_events": scale_out,
+        "scale_in_events": scale_in,
+        "queued_query_minutes": round(queued, 3),
+        "minutes_with_queue": queued_minutes,
+        "max_backlog": round(max_backlog, 3),
+        "queued_fraction": round(queued / total_demand, 6) if total_demand else 0.0,
+        "backlog_at_end": round(backlog, 3),
+    }
+
+
+def evaluate_policy(
+    demand: Dict[str, array],
+    warehouses: List[Dict[str, Any]],
+    policy: Dict[str, Any],
+    overrides: Dict[str, Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Replay every warehouse and return per-warehouse and total figures."""
+    per_warehouse: Dict[str, Any] = {}
+    empty = array("d")
+    for w in warehouses:
+        wh_id = str(w["id"])
+        wh_policy = dict(policy)
+        wh_policy.update(overrides.get(wh_id, {}))
+        per_warehouse[wh_id] = replay_warehouse(
+            demand.get(wh_id, empty),
+            int(w.get("max_concurrency", 0)),
+            float(w.get("cost_per_hour", 1.0)),
+            wh_policy,
+        )
+
+    totals = {
+        "cost": round(sum(s["cost"] for s in per_warehouse.values()), 4),
+        "scale_events": sum(s["scale_out_events"] + s["scale_in_events"] for s in per_warehouse.values()),
+        "queued_query_minutes": round(sum(s["queued_query_minutes"] for s in per_warehouse.values()), 3),
+    }
+    return {"totals": totals, "warehouses": per_warehouse}
+
+
+def sweep(
+    demand: Dict[str, array],
+    warehouses: List[Dict[str, Any]],
+    policy: Dict[str, Any],
+    overrides: Dict[str, Dict[str, Any]],
+    grid: Dict[str, List[Any]],
+) -> List[Dict[str, Any]]:
+    """Evaluate every combination in `grid` and return totals, cheapest first."""
+    keys = sorted(grid)
+    rows: List[Dict[str, Any]] = []
+    for values in itertools.product(*(grid[k] for k in keys)):
+        variant = dict(zip(keys, values))
+        # Swept values win over both the base policy and per-warehouse overrides.
+        variant_overrides = {wh_id: dict(o, **variant) for wh_id, o in overrides.items()}
+        evaluation = evaluate_policy(demand, warehouses, dict(policy, **variant), variant_overrides)
+        rows.append({"policy": variant, **evaluation["totals"]})
+    rows.sort(key=lambda r: (r["queued_query_minutes"], r["cost"], r["scale_events"]))
+    return rows
+
+
+def evaluate_autoscaling(
+    config: Dict[str, Any],
+    workloads: List[Dict[str, Any]],
+    warehouses: List[Dict[str, Any]],
+    inputs_dir: Path,
+) -> Tuple[bool, Dict[str, Any]]:
+    """Run the configured policy (and optional sweep); return (queue_ok, report)."""
+    policy = dict(DEFAULT_POLICY)
+    policy.update(config.get("policy", {}))
+    overrides = config.get("warehouses", {})
+    max_queued_fraction = float(config.get("max_queued_fraction", DEFAULT_MAX_QUEUED_FRACTION))
+
+    load_cfg = config.get("load", {})
+    if load_cfg.get("source") == "csv":
+        demand = load_demand_csv(inputs_dir / load_cfg["path"])
+    else:
+        demand = simulate_demand(workloads, load_cfg)
+
+    evaluation = evaluate_policy(demand, warehouses, policy, overrides)
+    queued = [
+        wh_id for wh_id, stats in evaluation["warehouses"].items()
+        if stats["queued_fraction"] > max_queued_fraction
+    ]
+
+    report: Dict[str, Any] = {
+        "load_source": load_cfg.get("source", "simulated"),
+        "policy": policy,
+        "max_queued_fraction": max_queued_fraction,
+        **evaluation,
+        "queueing_warehouses": queued,
+    }
+    if config.get("sweep"):
+        report["sweep"] = sweep(demand, warehouses, policy, overrides, config["sweep"])
+    return not queued, report
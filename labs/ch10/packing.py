@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+CH10 workload-to-warehouse packing.
+
+Treats each warehouse as a bin whose size is `max_concurrency` and each
+workload as an item whose size is its `concurrency`, and searches for an
+assignment that minimizes the total warehouse cost:
+
+- `first_fit_decreasing` is the fast heuristic used for every instance.
+  It keeps two max-trees over the warehouses (open residuals, closed
+  capacities) so each placement is O(log #warehouses).
+- `branch_and_bound` is an exact solver for small instances. It starts
+  from the heuristic solution and only replaces it when it finds a
+  strictly better (cost, moves) pair.
+
+Warehouse cost comes from the optional `cost_per_hour` field. When it is
+missing every warehouse costs 1.0, so minimizing cost means minimizing
+the number of warehouses in use.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+
+DEFAULT_WAREHOUSE_COST = 1.0
+
+# Instances up to this many workloads are also handed to the exact solver.
+EXACT_MAX_WORKLOADS = 12
+# Search budget for the exact solver; when exceeded we keep the heuristic.
+EXACT_NODE_LIMIT = 200_000
+
+
+class _MaxTree:
+    """Array-backed max segment tree with a leftmost `>= x` query."""
+
+    def __init__(self, values: List[int]) -> None:
+        size = 1
+        while size < max(len(values), 1):
+            size *= 2
+        self.size = size
+        self.tree = [-1] * (2 * size)
+        self.tree[size:size + len(values)] = values
+        for i in range(size - 1, 0, -1):
+            self.tree[i] = max(self.tree[2 * i], self.tree[2 * i + 1])
+
+    def update(self, index: int, value: int) -> None:
+        tree = self.tree
+        i = index + self.size
+        tree[i] = value
+        i //= 2
+        while i:
+            best = max(tree[2 * i], tree[2 * i + 1])
+            if tree[i] == best:
+                break
+            tree[i] = best
+            i //= 2
+
+    def first_at_least(self, value: int) -> int:
+        tree = self.tree
+        if tree[1] < value:
+            return -1
+        i = 1
+        size = self.size
+        while i < size:
+            i *= 2
+            if tree[i] < value:
+                i += 1
+        return i - size
+
+
+def _warehouse_specs(warehouses: List[Dict[str, Any]]) -> Tuple[List[str], List[int], List[float]]:
+    ids = [str(w["id"]) for w in warehouses]
+    caps = [int(w.get("max_concurrency", 0)) for w in warehouses]
+    costs = [float(w.get("cost_per_hour", DEFAULT_WAREHOUSE_COST)) for w in warehouses]
+    return ids, caps, costs
+
+
+def _workload_specs(workloads: List[Dict[str, Any]]) -> Tuple[List[str], List[int], List[Optional[str]]]:
+    ids = [str(wl.get("id")) for wl in workloads]
+    sizes = [int(wl.get("concurrency", 0)) for wl in workloads]
+    current = [wl.get("assigned_warehouse") for wl in workloads]
+    return ids, sizes, current
+
+
+def _summarize(
+    method: str,
+    optimal: bool,
+    assignment: Dict[str, str],
+    unplaced: List[str],
+    wl_ids: List[str],
+    sizes: List[int],
+    current: List[Optional[str]],
+    wh_ids: List[str],
+    caps: List[int],
+    costs: List[float],
+) -> Dict[str, Any]:
+    size_by_id = dict(zip(wl_ids, sizes))
+    load: Dict[str, int] = {}
+    for wl_id, wh_id in assignment.items():
+        load[wh_id] = load.get(wh_id, 0) + size_by_id[wl_id]
+
+    cost_by_id = dict(zip(wh_ids, costs))
+    cap_by_id = dict(zip(wh_ids, caps))
+    used = [wh_id for wh_id in wh_ids if wh_id in load]
+
+    moves = {
+        wl_id: {"from": cur, "to": assignment[wl_id]}
+        for wl_id, cur in zip(wl_ids, current)
+        if wl_id in assignment and assignment[wl_id] != cur
+    }
+
+    return {
+        "method": method,
+        "optimal": optimal,
+        "warehouses_used": len(used),
+        "total_cost": sum(cost_by_id[wh_id] for wh_id in used),
+        "warehouse_load": {
+            wh_id: {"used": load[wh_id], "max": cap_by_id[wh_id]} for wh_id in used
+        },
+        "assignment": assignment,
+        "moves": moves,
+        "unplaced": unplaced,
+    }
+
+
+def current_plan(workloads: List[Dict[str, Any]], warehouses: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Return the existing assignment as a plan, or None if it is infeasible."""
+    wh_ids, caps, costs = _warehouse_specs(warehouses)
+    wl_ids, sizes, current = _workload_specs(workloads)
+
+    cap_by_id = dict(zip(wh_ids, caps))
+    load: Dict[str, int] = {}
+    assignment: Dict[str, str] = {}
+    for wl_id, size, wh_id in zip(wl_ids, sizes, current):
+        if wh_id not in cap_by_id:
+            return None
+        load[wh_id] = load.get(wh_id, 0) + size
+        assignment[wl_id] = wh_id
+
+    if any(used > cap_by_id[wh_id] for wh_id, used in load.items()):
+        return None
+
+    return _summarize("current", False, assignment, [], wl_ids, sizes, current, wh_ids, caps, costs)
+
+
+def first_fit_decreasing(workloads: List[Dict[str, Any]], warehouses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Pack workloads with first-fit-decreasing over cost-efficient warehouses.
+
+    Warehouses are ordered by cost per concurrency slot (cheapest first,
+    larger first on ties). Each workload, largest first, goes to the first
+    already-open warehouse with room; only when none fits is the first
+    closed warehouse that can hold it opened.
+    """
+    wh_ids, caps, costs = _warehouse_specs(warehouses)
+    wl_ids, sizes, current = _workload_specs(workloads)
+
+    order = sorted(
+        range(len(wh_ids)),
+        key=lambda i: (costs[i] / caps[i] if caps[i] > 0 else math.inf, -caps[i], i),
+    )
+    ordered_caps = [caps[i] for i in order]
+    residual = [-1] * len(order)
+
+    open_tree = _MaxTree([-1] * len(order))
+    closed_tree = _MaxTree(ordered_caps)
+
+    assignment: Dict[str, str] = {}
+    unplaced: List[str] = []
+
+    for k in sorted(range(len(wl_ids)), key=lambda k: (-sizes[k], k)):
+        size = sizes[k]
+        slot = open_tree.first_at_least(size)
+        if slot < 0:
+            slot = closed_tree.first_at_least(size)
+            if slot < 0:
+                unplaced.append(wl_ids[k])
+                continue
+            closed_tree.update(slot, -1)
+            residual[slot] = ordered_caps[slot]
+        residual[slot] -= size
+        open_tree.update(slot, residual[slot])
+        assignment[wl_ids[k]] = wh_ids[order[slot]]
+
+    assignment = _downsize(assignment, dict(zip(wl_ids, sizes)), wh_ids, caps, costs)
+    return _summarize(
+        "first_fit_decreasing", False, assignment, sorted(unplaced),
+        wl_ids, sizes, current, wh_ids, caps, costs,
+    )
+
+
+def _downsize(
+    assignment: Dict[str, str],
+    size_by_id: Dict[str, int],
+    wh_ids: List[str],
+    caps: List[int],
+    costs: List[float],
+) -> Dict[str, str]:
+    """Move whole warehouses onto cheaper unused ones that still fit the load."""
+    load: Dict[str, int] = {}
+    for wl_id, wh_id in assignment.items():
+        load[wh_id] = load.get(wh_id, 0) + size_by_id[wl_id]
+
+    cap_by_id = dict(zip(wh_ids, caps))
+    cost_by_id = dict(zip(wh_ids, costs))
+    unused = sorted(
+        (wh_id for wh_id in wh_ids if wh_id not in load),
+        key=lambda wh_id: (cost_by_id[wh_id], cap_by_id[wh_id]),
+    )
+
+    rename: Dict[str, str] = {}
+    for wh_id in sorted(load, key=lambda wh_id: -cost_by_id[wh_id]):
+        for candidate in unused:
+            if cost_by_id[candidate] >= cost_by_id[wh_id]:
+                break
+            if cap_by_id[candidate] >= load[wh_id]:
+                rename[wh_id] = candidate
+                unused.remove(candidate)
+                unused.append(wh_id)
+                unused.sort(key=lambda w: (cost_by_id[w], cap_by_id[w]))
+                break
+
+    if not rename:
+        return assignment
+    return {wl_id: rename.get(wh_id, wh_id) for wl_id, wh_id in assignment.items()}
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+def branch_and_bound(
+    workloads: List[Dict[str, Any]],
+    warehouses: List[Dict[str, Any]],
+    incumbent: Optional[Dict[str, Any]] = None,
+    node_limit: int = EXACT_NODE_LIMIT,
+) -> Optional[Dict[str, Any]]:
+    """Exact minimum-cost packing, tie-broken by the number of moves.
+
+    `incumbent`, when given, must be a feasible plan with no unplaced
+    workloads (the heuristic or current plan). Returns None when the node
+    budget runs out, or when no plan places every workload.
+    """
+    wh_ids, caps, costs = _warehouse_specs(warehouses)
+    wl_ids, sizes, current = _workload_specs(workloads)
+
+    n = len(wl_ids)
+    m = len(wh_ids)
+    order = sorted(range(n), key=lambda k: (-sizes[k], k))
+    item_sizes = [sizes[k] for k in order]
+    item_home = [wh_ids.index(current[k]) if current[k] in wh_ids else -1 for k in order]
+    homes = set(item_home)
+
+    suffix = [0] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        suffix[i] = suffix[i + 1] + item_sizes[i]
+
+    slot_costs = [costs[j] / caps[j] for j in range(m) if caps[j] > 0]
+    min_slot_cost = min(slot_costs) if slot_costs else math.inf
+
+    if incumbent is not None:
+        best_key = (incumbent["total_cost"], len(incumbent["moves"]))
+    else:
+        best_key = (math.inf, math.inf)
+    best_choice: List[Optional[List[int]]] = [None]
+    residual: List[Optional[int]] = [None] * m
+    choice = [0] * n
+    nodes = [0]
+
+    def search(i: int, cost: float, moves: int, free_open: int) -> None:
+        nonlocal best_key
+        nodes[0] += 1
+        if nodes[0] > node_limit:
+            raise _BudgetExceeded
+
+        if i == n:
+            if (cost, moves) < best_key:
+                best_key = (cost, moves)
+                best_choice[0] = list(choice)
+            return
+
+        shortfall = max(0, suffix[i] - free_open)
+        if (cost + shortfall * min_slot_cost, moves) >= best_key:
+            return
+
+        size = item_sizes[i]
+        home = item_home[i]
+
+        candidates = [home] + [j for j in range(m) if j != home] if home >= 0 else range(m)
+        seen_open = set()
+        seen_closed = set()
+        for j in candidates:
+            moved = 0 if j == home else 1
+            # Warehouses that are nobody's home are interchangeable when
+            # they look the same; home warehouses must be tried individually.
+            tag = j if j in homes else -1
+            room = residual[j]
+            if room is not None:
+                if room < size or (room, tag) in seen_open:
+                    continue
+                seen_open.add((room, tag))
+                residual[j] = room - size
+                choice[i] = j
+                search(i + 1, cost, moves + moved, free_open - size)
+                residual[j] = room
+            else:
+                if caps[j] < size or (caps[j], costs[j], tag) in seen_closed:
+                    continue
+                seen_closed.add((caps[j], costs[j], tag))
+                residual[j] = caps[j] - size
+                choice[i] = j
+                search(i + 1, cost + costs[j], moves + moved, free_open + caps[j] - size)
+                residual[j] = None
+
+    try:
+        search(0, 0.0, 0, 0)
+    except _BudgetExceeded:
+        return None
+
+    if best_choice[0] is None:
+        if incumbent is None:
+            return None
+        return dict(incumbent, method="exact", optimal=True)
+
+    assignment = {wl_ids[order[i]]: wh_ids[j] for i, j in enumerate(best_choice[0])}
+    return _summarize("exact", True, assignment, [], wl_ids, sizes, current, wh_ids, caps, costs)
+
+
+def _rank(plan: Dict[str, Any]) -> Tuple[int, float]:
+    """Sort key for plans: fewer unplaced workloads first, then lower cost."""
+    return len(plan["unplaced"]), plan["total_cost"]
+
+
+def optimize_assignment(
+    workloads: List[Dict[str, Any]],
+    warehouses: List[Dict[str, Any]],
+    exact_max_workloads: int = EXACT_MAX_WORKLOADS,
+) -> Dict[str, Any]:
+    """Return the cheapest assignment found, preferring fewer moves on ties.
+
+    A plan that places every workload always beats one that leaves some
+    unplaced, whatever their costs.
+    """
+    plan = first_fit_decreasing(workloads, warehouses)
+
+    current = current_plan(workloads, warehouses)
+    if current is not None and _rank(current) <= _rank(plan):
+        plan = current
+
+    if len(workloads) <= exact_max_workloads:
+        exact = branch_and_bound(workloads, warehouses, None if plan["unplaced"] else plan)
+        if exact is not None:
+            plan = exact
+
+    return plan
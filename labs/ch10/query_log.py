@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+CH10 time-windowed concurrency analysis from query logs.
+
+Streams query-log records (start, end, workload, warehouse) and computes
+each warehouse's concurrency over time with a sweep line:
+
+- Records are consumed in start-time order. Each warehouse keeps a
+  min-heap of the end times of its running queries; before a query starts,
+  every end at or before its start is popped (intervals are half-open,
+  `[start, end)`). Memory per warehouse is bounded by its peak concurrency.
+- Logs only need to be *roughly* sorted: a reorder buffer holds records
+  for `reorder_window_seconds` behind the newest start seen. A record that
+  arrives later than that raises `ValueError`; sort the log first.
+- Time spent at each concurrency level is accumulated, so peak and
+  time-weighted p95 concurrency come from a histogram, not from storing
+  events.
+
+CSV columns: `start,end,workload,warehouse`. Timestamps are epoch seconds
+or ISO 8601 (`2025-11-16T09:00:00Z`). Files ending in `.gz` are read
+through gzip.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import heapq
+import math
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+DEFAULT_REORDER_WINDOW_SECONDS = 300.0
+
+# Only the first N overcommit windows per warehouse are listed in full.
+MAX_WINDOWS_REPORTED = 50
+
+Record = Tuple[float, float, str, str]
+
+
+def _parse_ts(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        dt = datetime.fromisoformat(value)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+
+
+def _format_ts(ts: float, iso: bool) -> Any:
+    if not iso:
+        return ts
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def iter_query_log(path: Path) -> Iterator[Record]:
+    """Yield (start, end, workload, warehouse) tuples without loading the file."""
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        col = {name.strip(): i for i, name in enumerate(header)}
+        try:
+            i_start, i_end = col["start"], col["end"]
+            i_wl, i_wh = col["workload"], col["warehouse"]
+        except KeyError as e:
+            raise ValueError(f"{path}: query log is missing column {e.args[0]!r}") from None
+        for row in reader:
+            if not row:
+                continue
+            yield _parse_ts(row[i_start]), _parse_ts(row[i_end]), row[i_wl], row[i_wh]
+
+
+def _uses_iso_timestamps(path: Path) -> bool:
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            try:
+                float(row.get("start") or "")
+            except ValueError:
+                return True
+            return False
+    return False
+
+
+class _WarehouseSweep:
+    """Sweep-line state for one warehouse."""
+
+    __slots__ = (
+        "capacity", "ends", "active", "level", "last_t",
+        "level_seconds", "peak", "peak_at", "window_start", "window_peak",
+        "window_workloads", "windows", "window_count", "overcommitted_seconds",
+        "queries",
+    )
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.ends: List[Tuple[float, str]] = []
+        self.active: Dict[str, int] = {}
+        self.level = 0
+        self.last_t: Optional[float] = None
+        self.level_seconds: Dict[int, float] = {}
+        self.peak = 0
+        self.peak_at: Optional[float] = None
+        self.window_start: Optional[float] = None
+        self.window_peak = 0
+        self.window_workloads: Dict[str, int] = {}
+        self.windows: List[Tuple[float, float, int, Dict[str, int]]] = []
+        self.window_count = 0
+        self.overcommitted_seconds = 0.0
+        self.queries = 0
+
+    def _step(self, t: float, delta: int, workload: str) -> None:
+        before = self.level
+        last = self.last_t
+        if last is not None and t > last:
+            span = t - last
+            self.level_seconds[before] = self.level_seconds.get(before, 0.0) + span
+            if before > self.capacity:
+                self.overcommitted_seconds += span
+        self.last_t = t
+
+        self.level = before + delta
+        active = self.active
+        count = active.get(workload, 0) + delta
+        if count:
+            active[workload] = count
+        else:
+            del active[workload]
+
+        if self.level > self.peak:
+            self.peak = self.level
+            self.peak_at = t
+
+        cap = self.capacity
+        if before <= cap < self.level:
+            self.window_start = t
+            self.window_peak = 0
+        if self.level > cap and self.level > self.window_peak:
+            self.window_peak = self.level
+            if self.window_count < MAX_WINDOWS_REPORTED:
+                self.window_workloads = dict(self.active)
+        if self.level <= cap < before:
+            if self.window_count < MAX_WINDOWS_REPORTED:
+                self.windows.append((self.window_start, t, self.window_peak, self.window_workloads))
+            self.window_count += 1
+            self.window_start = None
+
+    def release_until(self, t: float) -> None:
+        ends = self.ends
+        while ends and ends[0][0] <= t:
+            end, workload = heapq.heappop(ends)
+            self._step(end, -1, workload)
+
+    def start(self, start: float, end: float, workload: str) -> None:
+        self.release_until(start)
+        self.queries += 1
+        if end <= start:
+            return  # an empty [start, end) interval never overlaps anything
+        self._step(start, +1, workload)
+        heapq.heappush(self.ends, (end, workload))
+
+    def finish(self) -> None:
+        self.release_until(math.inf)
+
+    def percentile(self, pct: float) -> int:
+        total = sum(self.level_seconds.values())
+        if total <= 0:
+            return self.peak
+        target = total * pct / 100.0
+        seen = 0.0
+        for level in sorted(self.level_seconds):
+            seen += self.level_seconds[level]
+            if seen >= target:
+                return level
+        return self.peak
+
+    def report(self, iso: bool) -> Dict[str, Any]:
+        return {
+            "queries": self.queries,
+            "max_concurrency": self.capacity,
+            "peak_concurrency": self.peak,
+            "peak_at": _format_ts(self.peak_at, iso) if self.peak_at is not None else None,
+            "p95_concurrency": self.percentile(95),
+            "observed_seconds": round(sum(self.level_seconds.values()), 3),
+            "overcommitted_seconds": round(self.overcommitted_seconds, 3),
+            "overcommit_window_count": self.window_count,
+            "overcommit_windows": [
+                {
+                    "start": _format_ts(w_start, iso),
+                    "end": _format_ts(w_end, iso),
+                    "duration_seconds": round(w_end - w_start, 3),
+                    "peak_concurrency": w_peak,
+                    "active_workloads_at_peak": dict(sorted(w_active.items())),
+                }
+                for w_start, w_end, w_peak, w_active in self.windows
+            ],
+        }
+
+
+def sweep_query_log(
+    records: Iterable[Record],
+    capacity: Dict[str, int],
+    reorder_window_seconds: float = DEFAULT_REORDER_WINDOW_SECONDS,
+) -> Dict[str, _WarehouseSweep]:
+    """Run the sweep over `records`; warehouses not in `capacity` count as 0."""
+    sweeps: Dict[str, _WarehouseSweep] = {}
+    buffer: List[Tuple[float, int, float, str, str]] = []
+    newest = -math.inf
+    released = -math.inf
+    seq = 0
+
+    def emit(start: float, end: float, workload: str, warehouse: str) -> None:
+        sweep = sweeps.get(warehouse)
+        if sweep is None:
+            sweep = sweeps[warehouse] = _WarehouseSweep(int(capacity.get(warehouse, 0)))
+        sweep.start(start, end, workload)
+
+    for start, end, workload, warehouse in records:
+        if end < start:
+            raise ValueError(f"Query log record ends before it starts: {start} > {end}")
+        if start < released:
+            raise ValueError(
+                f"Query log is out of order by more than {reorder_window_seconds}s "
+                f"(start={start}); sort it by start time first."
+            )
+        heapq.heappush(buffer, (start, seq, end, workload, warehouse))
+        seq += 1
+        if start > newest:
+            newest = start
+        watermark = newest - reorder_window_seconds
+        while buffer and buffer[0][0] <= watermark:
+            released, _, b_end, b_workload, b_warehouse = heapq.heappop(buffer)
+            emit(released, b_end, b_workload, b_warehouse)
+
+    while buffer:
+        b_start, _, b_end, b_workload, b_warehouse = heapq.heappop(buffer)
+        emit(b_start, b_end, b_workload, b_warehouse)
+
+    for sweep in sweeps.values():
+        sweep.finish()
+    return sweeps
+
+
+def analyze_query_log(
+    path: Path,
+    warehouses: List[Dict[str, Any]],
+    reorder_window_seconds: float = DEFAULT_REORDER_WINDOW_SECONDS,
+) -> Tuple[bool, Dict[str, Any]]:
+    """Analyze one log file and return (within_capacity, report)."""
+    capacity = {str(w["id"]): int(w.get("max_concurrency", 0)) for w in warehouses}
+    sweeps = sweep_query_log(iter_query_log(path), capacity, reorder_window_seconds)
+    iso = _uses_iso_timestamps(path)
+
+    per_warehouse = {wh_id: sweeps[wh_id].report(iso) for wh_id in sorted(sweeps)}
+    overcommitted = [
+        wh_id for wh_id, stats in per_warehouse.items() if stats["overcommit_window_count"] > 0
+    ]
+    unknown = [wh_id for wh_id in per_warehouse if wh_id not in capacity]
+
+    report = {
+        "source": path.name,
+        "total_queries": sum(s["queries"] for s in per_warehouse.values()),
+        "warehouses": per_warehouse,
+        "overcommitted_warehouses": overcommitted,
+        "unknown_warehouses": unknown,
+    }
+    return not overcommitted, report
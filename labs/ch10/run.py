@@ -1,21 +1,21 @@
 #!/usr/bin/env python
 from pathlib import Path
-import json
+import sys
 
-def load_json(path: Path) -> dict:
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+LABS_DIR = str(Path(__file__).resolve().parent.parent)
+if LABS_DIR not in sys.path:
+    sys.path.insert(0, LABS_DIR)
 
-def main():
-    base_dir = Path(__file__).resolve().parent
-    inputs_dir = base_dir / "inputs"
-    artifacts_dir = base_dir / "artifacts"
-    artifacts_dir.mkdir(parents=True, exist_ok=True)
-    out_path = artifacts_dir / "result.json"
+from autoscale import evaluate_autoscaling
+from common import perf
+from common.fastio import load_json
+from common.validation import rejected, validate_inputs
+from packing import optimize_assignment
+from query_log import analyze_query_log
+from simulate import simulate
 
-    workloads_cfg = load_json(inputs_dir / "workloads.json")
-    warehouses_cfg = load_json(inputs_dir / "warehouses.json")
 
+def evaluate_scaling(workloads_cfg: dict, warehouses_cfg: dict, inputs_dir: Path) -> dict:
     workloads = workloads_cfg.get("workloads", [])
     warehouses = warehouses_cfg.get("warehouses", [])
 
@@ -34,12 +34,44 @@ def main():
         if used > wh_cap.get(wh_id, 0)
     }
 
+    with perf.phase("optimize"):
+        optimization = optimize_assignment(workloads, warehouses)
+
     checks = {
         "warehouses_defined": len(warehouses) > 0,
         "workloads_defined": len(workloads) > 0,
         "no_overcommitted_warehouses": len(overcommitted) == 0,
     }
 
+    # Optional: replay synthetic traffic when a simulation config is present.
+    simulation = None
+    simulation_path = inputs_dir / "simulation.json"
+    if simulation_path.exists():
+        with perf.phase("simulate"):
+            sla_ok, simulation = simulate(workloads, warehouses, load_json(simulation_path))
+        checks["simulated_sla_ok"] = sla_ok
+
+    # Optional: measure real peaks when a query log is present.
+    query_log = None
+    for name in ("query_log.csv", "query_log.csv.gz"):
+        log_path = inputs_dir / name
+        if log_path.exists():
+            with perf.phase("query_log"):
+                perf.count_read(log_path)
+                within_capacity, query_log = analyze_query_log(log_path, warehouses)
+            checks["query_log_within_capacity"] = within_capacity
+            break
+
+    # Optional: replay an autoscaling policy against minute-level load.
+    autoscaling = None
+    autoscaling_path = inputs_dir / "autoscaling.json"
+    if autoscaling_path.exists():
+        with perf.phase("autoscaling"):
+            queue_ok, autoscaling = evaluate_autoscaling(
+                load_json(autoscaling_path), workloads, warehouses, inputs_dir
+            )
+        checks["autoscaling_queue_ok"] = queue_ok
+
     status = "accept" if all(checks.values()) else "reject"
 
     messages = [
@@ -50,6 +82,38 @@ def main():
     else:
         if overcommitted:
             messages.append(f"Overcommitted warehouses detected: {overcommitted}")
+        if overcommitted and not optimization["unplaced"]:
+            messages.append(
+                f"Optimizer found a feasible assignment on {optimization['warehouses_used']} warehouse(s) "
+                f"with {len(optimization['moves'])} move(s); see metrics.optimization."
+            )
+        elif optimization["unplaced"]:
+            # Only a workload larger than every warehouse is provably
+            # unplaceable; the rest is what the optimizer did not manage.
+            largest = max(wh_cap.values(), default=0)
+            too_big = [str(wl.get("id")) for wl in workloads if int(wl.get("concurrency", 0)) > largest]
+            if too_big:
+                messages.append(f"No warehouse can host these workloads (concurrency above every max_concurrency): {too_big}")
+            others = [wl_id for wl_id in optimization["unplaced"] if wl_id not in too_big]
+            if others:
+                messages.append(
+                    f"Optimizer ({optimization['method']}) could not place these workloads; "
+                    f"a feasible assignment may still exist: {others}"
+                )
+        if simulation and simulation["sla_breached_warehouses"]:
+            messages.append(
+                f"Simulated queue waits breach the SLA on: {simulation['sla_breached_warehouses']}"
+            )
+        if query_log and query_log["overcommitted_warehouses"]:
+            messages.append(
+                "Query log shows concurrency above max_concurrency on: "
+                f"{query_log['overcommitted_warehouses']}; see metrics.query_log for the windows."
+            )
+        if autoscaling and autoscaling["queueing_warehouses"]:
+            messages.append(
+                "Autoscaling policy leaves too much queued work on: "
+                f"{autoscaling['queueing_warehouses']}"
+            )
 
     result = {
         "chapter": "CH10",
@@ -61,13 +125,48 @@ def main():
             "warehouse_capacity": wh_cap,
             "warehouse_used_concurrency": wh_used,
             "overcommitted": overcommitted,
+            "optimization": optimization,
         },
     }
+    if simulation is not None:
+        result["metrics"]["simulation"] = simulation
+    if query_log is not None:
+        result["metrics"]["query_log"] = query_log
+    if autoscaling is not None:
+        result["metrics"]["autoscaling"] = autoscaling
+
+    return result
 
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
 
-    print(f"[CH10] Lab completed. status={status} → {out_path.relative_to(base_dir)}")
+def run_lab():
+    base_dir = Path(__file__).resolve().parent
+    inputs_dir = base_dir / "inputs"
+    artifacts_dir = base_dir / "artifacts"
+    artifacts_dir.mkdir(parents=True, exist_ok=True)
+    out_path = artifacts_dir / "result.json"
+
+    with perf.session("CH10", artifacts_dir):
+        with perf.phase("load"):
+            workloads_cfg = load_json(inputs_dir / "workloads.json")
+            warehouses_cfg = load_json(inputs_dir / "warehouses.json")
+        with perf.phase("validate"):
+            errors = validate_inputs({
+                "workloads.json": (base_dir / "schemas" / "workloads.schema.json", workloads_cfg),
+                "warehouses.json": (base_dir / "schemas" / "warehouses.schema.json", warehouses_cfg),
+            })
+        if errors:
+            result = rejected("CH10", "baseline", errors)
+        else:
+            with perf.phase("evaluate"):
+                result = evaluate_scaling(workloads_cfg, warehouses_cfg, inputs_dir)
+        perf.write_result(result, out_path)
+
+    return result
+
+
+def main():
+    result = run_lab()
+    print(f"[CH10] Lab completed. status={result['status']} → artifacts/result.json")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+CH10 discrete-event queueing simulator.
+
+Replays synthetic query traffic against each warehouse's `max_concurrency`
+and reports queue waits, utilization, and SLA breaches.
+
+Model (per warehouse, first-come-first-served):
+
+- Each workload is a Poisson arrival stream. Its rate defaults to
+  `concurrency / avg_query_seconds` (Little's law: on average the workload
+  keeps `concurrency` queries in flight) and can be overridden with
+  `arrivals_per_second` on the workload.
+- Service times have mean `avg_query_seconds` and follow
+  `service_time_distribution` (`exponential`, `deterministic`, or
+  `lognormal` with `service_time_cv`), set per workload or globally.
+- The warehouse runs `max_concurrency` queries at once. Completion events
+  live in a min-heap keyed by finish time; each arrival takes the earliest
+  completion slot, so one heap operation per query drives the simulation.
+
+Waits are kept in a 100 ms histogram, so memory stays bounded no matter
+how many queries are simulated.
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import math
+import random
+from typing import Any, Callable, Dict, List, Tuple
+
+
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "duration_seconds": 86400,
+    "seed": 10,
+    "service_time_distribution": "exponential",
+    "service_time_cv": 1.0,
+    "sla_wait_seconds": 120.0,
+    "max_sla_breach_rate": 0.01,
+}
+
+# Histogram bucket width for queue waits, in seconds.
+WAIT_RESOLUTION = 0.1
+
+PERCENTILES = (50, 95, 99)
+
+
+def _service_sampler(rng: random.Random, mean: float, dist: str, cv: float) -> Callable[[], float]:
+    if mean <= 0 or dist == "deterministic":
+        return lambda: max(mean, 0.0)
+    if dist == "exponential":
+        rate = 1.0 / mean
+        return lambda: rng.expovariate(rate)
+    if dist == "lognormal":
+        sigma = math.sqrt(math.log(1.0 + cv * cv))
+        mu = math.log(mean) - sigma * sigma / 2.0
+        return lambda: rng.lognormvariate(mu, sigma)
+    raise ValueError(f"Unknown service_time_distribution: {dist!r}")
+
+
+def _arrival_rate(workload: Dict[str, Any]) -> float:
+    if "arrivals_per_second" in workload:
+        return float(workload["arrivals_per_second"])
+    mean = float(workload.get("avg_query_seconds", 0))
+    if mean <= 0:
+        return 0.0
+    return float(workload.get("concurrency", 0)) / mean
+
+
+def _percentile(histogram: Dict[int, int], zero_waits: int, total: int, pct: float) -> float:
+    if total == 0:
+        return 0.0
+    rank = math.ceil(total * pct / 100.0)
+    if rank <= zero_waits:
+        return 0.0
+    seen = zero_waits
+    for bucket in sorted(histogram):
+        seen += histogram[bucket]
+        if seen >= rank:
+            return round((bucket + 1) * WAIT_RESOLUTION, 3)
+    return 0.0
+
+
+def simulate_warehouse(
+    capacity: int,
+    workloads: List[Dict[str, Any]],
+    config: Dict[str, Any],
+    rng: random.Random,
+) -> Dict[str, Any]:
+    """Simulate one warehouse for `config['duration_seconds']`."""
+    duration = float(config["duration_seconds"])
+    sla = float(config["sla_wait_seconds"])
+
+    rates: List[float] = []
+    means: List[float] = []
+    samplers: List[Callable[[], float]] = []
+    for wl in workloads:
+        rate = _arrival_rate(wl)
+        if rate <= 0:
+            continue
+        mean = float(wl.get("avg_query_seconds", 0))
+        rates.append(rate)
+        means.append(mean)
+        samplers.append(
+            _service_sampler(
+                rng,
+                mean,
+                wl.get("service_time_distribution", config["service_time_distribution"]),
+                float(wl.get("service_time_cv", config["service_time_cv"])),
+            )
+        )
+
+    total_rate = sum(rates)
+    queries = 0
+    zero_waits = 0
+    breaches = 0
+    wait_sum = 0.0
+    max_wait = 0.0
+    busy = 0.0
+    histogram: Dict[int, int] = {}
+
+    if total_rate > 0 and capacity > 0:
+        cumulative: List[float] = []
+        acc = 0.0
+        for rate in rates:
+            acc += rate / total_rate
+            cumulative.append(acc)
+        cumulative[-1] = 1.0
+
+        completions = [0.0] * capacity  # already a valid heap
+        expovariate = rng.expovariate
+        uniform = rng.random
+        pick = bisect.bisect_left
+        replace = heapq.heapreplace
+        single = len(samplers) == 1
+
+        t = expovariate(total_rate)
+        while t < duration:
+            sampler = samplers[0] if single else samplers[pick(cumulative, uniform())]
+            service = sampler()
+            free_at = completions[0]
+            if free_at <= t:
+                start = t
+                zero_waits += 1
+            else:
+                start = free_at
+                wait = free_at - t
+                wait_sum += wait
+                if wait > max_wait:
+                    max_wait = wait
+                if wait > sla:
+                    breaches += 1
+                bucket = int(wait / WAIT_RESOLUTION)
+                histogram[bucket] = histogram.get(bucket, 0) + 1
+            finish = start + service
+            replace(completions, finish)
+            if start < duration:
+                busy += (finish if finish < duration else duration) - start
+            queries += 1
+            t += expovariate(total_rate)
+
+    elif total_rate > 0:
+        # No capacity at all: every query would wait forever.
+        queries = int(total_rate * duration)
+        breaches = queries
+
+    # Waits are unbounded without capacity; report them as null.
+    starved = capacity <= 0 and queries > 0
+    wait_seconds: Dict[str, Any] = {
+        f"p{pct}": None if starved else _percentile(histogram, zero_waits, queries, pct)
+        for pct in PERCENTILES
+    }
+    wait_seconds["mean"] = None if starved else (round(wait_sum / queries, 3) if queries else 0.0)
+    wait_seconds["max"] = None if starved else round(max_wait, 3)
+
+    return {
+        "queries": queries,
+        "offered_load": round(sum(r * m for r, m in zip(rates, means)), 3),
+        "utilization": round(busy / (capacity * duration), 4) if capacity > 0 and duration > 0 else 0.0,
+        "queued_fraction": round(1.0 - zero_waits / queries, 4) if queries else 0.0,
+        "wait_seconds": wait_seconds,
+        "sla_breaches": breaches,
+        "sla_breach_rate": round(breaches / queries, 6) if queries else 0.0,
+    }
+
+
+def simulate(
+    workloads: List[Dict[str, Any]],
+    warehouses: List[Dict[str, Any]],
+    config: Dict[str, Any],
+) -> Tuple[bool, Dict[str, Any]]:
+    """Simulate every warehouse and return (sla_ok, report)."""
+    cfg = dict(DEFAULT_CONFIG)
+    cfg.update(config)
+
+    by_warehouse: Dict[str, List[Dict[str, Any]]] = {str(w["id"]): [] for w in warehouses}
+    for wl in workloads:
+        wh_id = wl.get("assigned_warehouse")
+        if wh_id in by_warehouse:
+            by_warehouse[wh_id].append(wl)
+
+    rng = random.Random(cfg["seed"])
+    per_warehouse: Dict[str, Any] = {}
+    breached: List[str] = []
+    for w in warehouses:
+        wh_id = str(w["id"])
+        stats = simulate_warehouse(int(w.get("max_concurrency", 0)), by_warehouse[wh_id], cfg, rng)
+        per_warehouse[wh_id] = stats
+        if stats["sla_breach_rate"] > float(cfg["max_sla_breach_rate"]):
+            breached.append(wh_id)
+
+    report = {
+        "duration_seconds": cfg["duration_seconds"],
+        "seed": cfg["seed"],
+        "sla_wait_seconds": cfg["sla_wait_seconds"],
+        "max_sla_breach_rate": cfg["max_sla_breach_rate"],
+        "total_queries": sum(s["queries"] for s in per_warehouse.values()),
+        "warehouses": per_warehouse,
+        "sla_breached_warehouses": breached,
+    }
+    return not breached, report
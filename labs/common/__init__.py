@@ -0,0 +1 @@
+"""Helpers shared by the chapter runners (`labs/chNN/run.py`)."""
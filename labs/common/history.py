@@ -0,0 +1,198 @@
+"""
+Append-only history of chapter results.
+
+`artifacts/result.json` only holds the latest run. `scripts/run_labs.py`
+also appends every chapter result it produces to a local SQLite store,
+so you can look at trends across runs:
+
+    LABS_HISTORY unset      labs/.history/results.sqlite (git-ignored)
+    LABS_HISTORY=<path>     that file instead
+    LABS_HISTORY=0          do not record
+
+Rows are indexed on (chapter, recorded_at), (chapter, status,
+recorded_at) and change_id. The full result is kept as JSON text, so
+`series()` can pull any field (`metrics.overcommitted`) with SQLite's
+`json_extract`.
+
+`compact()` folds old runs into one row per chapter, change_id, status
+and time bucket. That row is the bucket's latest result, and its `runs`
+column holds how many runs it stands for. Status rates stay exact after
+compaction; per-run metric series keep one point per bucket.
+
+Recording never fails a gate: store errors become a warning on stderr.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+ENV_VAR = "LABS_HISTORY"
+DEFAULT_PATH = Path(__file__).resolve().parent.parent / ".history" / "results.sqlite"
+DAY = 86400
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    recorded_at REAL NOT NULL,
+    chapter TEXT NOT NULL,
+    change_id TEXT,
+    status TEXT,
+    runs INTEGER NOT NULL DEFAULT 1,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_chapter_time ON results (chapter, recorded_at);
+CREATE INDEX IF NOT EXISTS results_chapter_status_time ON results (chapter, status, recorded_at);
+CREATE INDEX IF NOT EXISTS results_change ON results (change_id);
+"""
+
+
+def store_path() -> Optional[Path]:
+    """Where results are recorded, or None when `LABS_HISTORY` turns it off."""
+    value = os.environ.get(ENV_VAR, "").strip()
+    if value.lower() in ("0", "off", "false", "no"):
+        return None
+    return Path(value) if value else DEFAULT_PATH
+
+
+class HistoryStore:
+    """SQLite-backed result history; one connection per instance."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def record(self, result: Dict[str, Any], recorded_at: Optional[float] = None) -> None:
+        self.record_many([result], recorded_at)
+
+    def record_many(self, results: List[Dict[str, Any]], recorded_at: Optional[float] = None) -> None:
+        when = time.time() if recorded_at is None else recorded_at
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO results (recorded_at, chapter, change_id, status, result) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (when, r.get("chapter", "?"), r.get("change_id"), r.get("status"), json.dumps(r, ensure_ascii=False))
+                    for r in results
+                ],
+            )
+
+    @staticmethod
+    def _where(
+        chapter: Optional[str] = None,
+        status: Optional[str] = None,
+        change_id: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        for column, value in (("chapter", chapter), ("status", status), ("change_id", change_id)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("recorded_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("recorded_at < ?")
+            params.append(until)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def rows(self, limit: Optional[int] = None, with_result: bool = False, **filters: Any) -> Iterator[Dict[str, Any]]:
+        """Matching runs, newest first."""
+        where, params = self._where(**filters)
+        columns = "recorded_at, chapter, change_id, status, runs" + (", result" if with_result else "")
+        sql = f"SELECT {columns} FROM results{where} ORDER BY recorded_at DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        for row in self._db.execute(sql, params):
+            entry = {"recorded_at": row[0], "chapter": row[1], "change_id": row[2], "status": row[3], "runs": row[4]}
+            if with_result:
+                entry["result"] = json.loads(row[5])
+            yield entry
+
+    def status_counts(self, **filters: Any) -> Dict[str, Any]:
+        """Runs per status and the rejection rate (compacted rows count by `runs`)."""
+        where, params = self._where(**filters)
+        counts = dict(self._db.execute(f"SELECT status, SUM(runs) FROM results{where} GROUP BY status", params))
+        total = sum(counts.values())
+        return {
+            "runs": total,
+            "by_status": counts,
+            "rejection_rate": round(counts.get("reject", 0) / total, 4) if total else None,
+        }
+
+    def series(self, field: str, **filters: Any) -> List[Tuple[float, Any]]:
+        """(recorded_at, value) oldest first for a dotted result field, e.g. "metrics.overcommitted"."""
+        where, params = self._where(**filters)
+        path = "$." + field.lstrip("$.")
+        points = []
+        for recorded_at, value, kind in self._db.execute(
+            f"SELECT recorded_at, json_extract(result, ?), json_type(result, ?) FROM results{where}"
+            " ORDER BY recorded_at, id",
+            [path, path] + params,
+        ):
+            points.append((recorded_at, json.loads(value) if kind in ("object", "array") else value))
+        return points
+
+    def compact(self, older_than: float, bucket_seconds: int = DAY) -> int:
+        """Fold runs recorded before `older_than` into one row per
+        (chapter, change_id, status, bucket); return how many rows were removed.
+
+        Raises ValueError when `bucket_seconds` is not positive (SQLite would
+        turn the division by 0 into NULL and fold everything into one bucket).
+        """
+        if bucket_seconds <= 0:
+            raise ValueError(f"bucket_seconds must be positive, got {bucket_seconds}")
+        with self._db:
+            self._db.execute("DROP TABLE IF EXISTS temp.keep")
+            # Keyed on id so the NOT IN / IN lookups below are index probes.
+            self._db.execute("CREATE TEMP TABLE keep (id INTEGER PRIMARY KEY, runs INTEGER NOT NULL)")
+            self._db.execute(
+                "INSERT INTO temp.keep (id, runs)"
+                " SELECT MAX(id), SUM(runs) FROM results WHERE recorded_at < ?"
+                " GROUP BY chapter, change_id, status, CAST(recorded_at / ? AS INTEGER)",
+                (older_than, bucket_seconds),
+            )
+            removed = self._db.execute(
+                "DELETE FROM results WHERE recorded_at < ? AND id NOT IN (SELECT id FROM temp.keep)",
+                (older_than,),
+            ).rowcount
+            self._db.execute(
+                "UPDATE results SET runs = (SELECT runs FROM temp.keep WHERE keep.id = results.id)"
+                " WHERE id IN (SELECT id FROM temp.keep)"
+            )
+            self._db.execute("DROP TABLE temp.keep")
+        if removed:
+            self._db.execute("VACUUM")
+        return removed
+
+
+def record(result: Dict[str, Any]) -> None:
+    """Append one result to the configured store (no-op when disabled)."""
+    path = store_path()
+    if path is None:
+        return
+    try:
+        with HistoryStore(path) as store:
+            store.record(result)
+    except (sqlite3.Error, OSError) as e:
+        print(f"[history] not recorded ({path}): {e}", file=sys.stderr)
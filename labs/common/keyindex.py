@@ -0,0 +1,277 @@
+"""
+Persisted key index for delta (change-data-capture) validation.
+
+A full gate run re-reads every table. A `KeyIndex` remembers, in one
+SQLite file, what the previous run saw so the next run only pays for
+what changed:
+
+- per side (a CH04 layer, a CH09 on-prem/cloud copy) and key: how many
+  rows carry that key;
+- per side: total rows, and in how many sides each key is present, so
+  "same key set everywhere" is one indexed count (duplicated keys have
+  their own partial index too);
+- per source file: size/mtime (snapshots) or bytes consumed (CDC logs),
+  plus each source's own per-key contribution.
+
+Two kinds of sources feed a side:
+
+- Snapshot files (`sync_file`): skipped when size and mtime are
+  unchanged; otherwise re-read and diffed against their old contribution.
+  With partitioned layers only the rewritten partitions are read.
+- CDC logs (`apply_log`): append-only CSVs with an `op` column
+  (`I` insert, `U` update, `D` delete) plus the key column, describing
+  changes on top of the snapshots. Only bytes past the last consumed
+  offset are read. A log that shrank or was replaced is treated as new:
+  its old contribution is dropped and it is replayed from the start.
+
+The numbers always equal a fresh rebuild over the same sources
+(`KeyIndex.reset()`, or just delete the file).
+
+Only CDC logs make a run's cost proportional to the change itself. A
+snapshot file that changed at all is re-read in full, so a rewritten
+single-file table costs as much as before; partitioning it limits the
+re-read to the partitions that changed.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import sqlite3
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from . import perf
+from .fastio import iter_rows, read_header
+
+
+SCHEMA_VERSION = 1
+OP_COLUMN = "op"
+OP_DELTAS = {"I": 1, "U": 0, "D": -1}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS sides (side TEXT PRIMARY KEY, rows INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS keys (
+    side TEXT NOT NULL, key TEXT NOT NULL, n INTEGER NOT NULL,
+    PRIMARY KEY (side, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS keys_duplicated ON keys (side, n) WHERE n > 1;
+CREATE TABLE IF NOT EXISTS presence (key TEXT PRIMARY KEY, sides INTEGER NOT NULL) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS presence_sides ON presence (sides);
+CREATE TABLE IF NOT EXISTS contributions (
+    side TEXT NOT NULL, source TEXT NOT NULL, key TEXT NOT NULL, n INTEGER NOT NULL,
+    PRIMARY KEY (side, source, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sources (
+    side TEXT NOT NULL, source TEXT NOT NULL, kind TEXT NOT NULL,
+    size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, inode INTEGER NOT NULL,
+    consumed INTEGER NOT NULL, header TEXT NOT NULL,
+    PRIMARY KEY (side, source)
+);
+"""
+
+
+class KeyIndex:
+    """Key multiplicities for a fixed list of sides, kept in SQLite.
+
+    Use as a context manager; changes are committed on a clean exit and
+    rolled back if validation raises, so a bad CDC log never leaves the
+    index half-applied.
+    """
+
+    def __init__(self, path: Path, sides: Sequence[str]) -> None:
+        self.path = path
+        self.sides = list(sides)
+        self.files_read = 0
+        self.cdc_records = 0
+        self.changed_keys = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.execute("BEGIN")
+        layout = f"{SCHEMA_VERSION}:" + ",".join(self.sides)
+        stored = self._db.execute("SELECT value FROM meta WHERE name = 'layout'").fetchone()
+        if stored is None or stored[0] != layout:
+            self.reset()
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('layout', ?)", (layout,))
+
+    def __enter__(self) -> "KeyIndex":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        self._db.execute("ROLLBACK" if exc_type is not None else "COMMIT")
+        self._db.close()
+
+    def reset(self) -> None:
+        """Forget everything; the next sync rebuilds from scratch."""
+        for table in ("sides", "keys", "presence", "contributions", "sources"):
+            self._db.execute(f"DELETE FROM {table}")
+        self._db.executemany("INSERT INTO sides VALUES (?, 0)", [(s,) for s in self.sides])
+
+    # -- applying deltas -------------------------------------------------
+
+    def _apply(self, side: str, delta: Iterable[Tuple[str, int]]) -> None:
+        """Add per-key row deltas to `side`, set-wise in SQL."""
+        db = self._db
+        db.execute("CREATE TEMP TABLE IF NOT EXISTS delta (key TEXT PRIMARY KEY, d INTEGER NOT NULL)")
+        db.execute("DELETE FROM delta")
+        db.executemany("INSERT INTO delta VALUES (?, ?)", ((k, d) for k, d in delta if d))
+        db.execute("CREATE TEMP TABLE IF NOT EXISTS step (key TEXT PRIMARY KEY, old INTEGER, new INTEGER)")
+        db.execute("DELETE FROM step")
+        db.execute(
+            "INSERT INTO step SELECT delta.key, COALESCE(keys.n, 0), COALESCE(keys.n, 0) + delta.d"
+            " FROM delta LEFT JOIN keys ON keys.side = ? AND keys.key = delta.key",
+            (side,),
+        )
+        bad = db.execute("SELECT key, new FROM step WHERE new < 0 LIMIT 5").fetchall()
+        if bad:
+            raise ValueError(f"{side}: deletes of keys that are not present: {[k for k, _ in bad]}")
+
+        db.execute("DELETE FROM keys WHERE side = ? AND key IN (SELECT key FROM step WHERE new = 0)", (side,))
+        db.execute("INSERT OR REPLACE INTO keys SELECT ?, key, new FROM step WHERE new > 0", (side,))
+        db.execute(
+            "INSERT INTO presence SELECT key, 1 FROM step WHERE old = 0 AND new > 0"
+            " ON CONFLICT (key) DO UPDATE SET sides = sides + 1"
+        )
+        db.execute("UPDATE presence SET sides = sides - 1 WHERE key IN (SELECT key FROM step WHERE old > 0 AND new = 0)")
+        db.execute("DELETE FROM presence WHERE sides = 0")
+        changed_keys, changed_rows = db.execute("SELECT COUNT(*), COALESCE(SUM(new - old), 0) FROM step").fetchone()
+        db.execute("UPDATE sides SET rows = rows + ? WHERE side = ?", (changed_rows, side))
+        self.changed_keys += changed_keys
+
+    def _replace_contribution(self, side: str, source: str, counts: Dict[str, int]) -> None:
+        """Swap a source's stored per-key counts for `counts`, applying the difference."""
+        db = self._db
+        old = dict(db.execute("SELECT key, n FROM contributions WHERE side = ? AND source = ?", (side, source)))
+        delta = Counter(counts)
+        delta.subtract(old)
+        self._apply(side, delta.items())
+        db.execute("DELETE FROM contributions WHERE side = ? AND source = ?", (side, source))
+        db.executemany(
+            "INSERT INTO contributions VALUES (?, ?, ?, ?)",
+            ((side, source, k, n) for k, n in counts.items() if n),
+        )
+
+    def _source(self, side: str, source: str) -> Optional[Tuple]:
+        return self._db.execute(
+            "SELECT kind, size, mtime_ns, inode, consumed, header FROM sources WHERE side = ? AND source = ?",
+            (side, source),
+        ).fetchone()
+
+    def _set_source(self, side: str, source: str, kind: str, path: Path, consumed: int, header: List[str]) -> None:
+        st = path.stat()
+        self._db.execute(
+            "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (side, source, kind, st.st_size, st.st_mtime_ns, st.st_ino, consumed, json.dumps(header)),
+        )
+
+    # -- sources ---------------------------------------------------------
+
+    def sync_file(self, side: str, path: Path, key: str) -> bool:
+        """Bring a snapshot file's contribution up to date; True if it was re-read."""
+        source = str(path)
+        st = path.stat()
+        stored = self._source(side, source)
+        if stored is not None and stored[0] == "file" and stored[1:3] == (st.st_size, st.st_mtime_ns):
+            return False
+        counts = Counter(k for (k,) in iter_rows(path, columns=[key], row_type="tuple"))
+        self._replace_contribution(side, source, counts)
+        self._set_source(side, source, "file", path, st.st_size, read_header(path))
+        self.files_read += 1
+        return True
+
+    def apply_log(self, side: str, path: Path, key: str) -> int:
+        """Apply new CDC records from `path`; return how many were read."""
+        source = str(path)
+        st = path.stat()
+        stored = self._source(side, source)
+        consumed = 0
+        if stored is not None and stored[0] == "log" and stored[3] == st.st_ino and stored[4] <= st.st_size:
+            consumed = stored[4]
+        elif stored is not None:
+            self._replace_contribution(side, source, {})  # rotated or truncated: replay from the start
+
+        with path.open("rb") as f:
+            header_line = f.readline()
+            header = next(csv.reader([header_line.decode("utf-8")]), [])
+            if OP_COLUMN not in header or key not in header:
+                raise ValueError(f"{path}: CDC log needs '{OP_COLUMN}' and '{key}' columns; header is {header}")
+            f.seek(max(consumed, len(header_line)))
+            chunk = f.read()
+        # Only whole lines; a record still being appended is picked up next run.
+        chunk = chunk[: chunk.rfind(b"\n") + 1]
+        op_at, key_at = header.index(OP_COLUMN), header.index(key)
+
+        delta: Counter = Counter()
+        records = 0
+        for fields in csv.reader(io.StringIO(chunk.decode("utf-8"))):
+            if not fields:
+                continue
+            op = fields[op_at].strip().upper()[:1]
+            if op not in OP_DELTAS:
+                raise ValueError(f"{path}: unknown CDC op {fields[op_at]!r} (expected I, U or D)")
+            records += 1
+            delta[fields[key_at]] += OP_DELTAS[op]
+        perf.count_read(path, rows=records)
+
+        self._apply(side, delta.items())
+        self._db.executemany(
+            "INSERT INTO contributions VALUES (?, ?, ?, ?) ON CONFLICT (side, source, key) DO UPDATE SET n = n + excluded.n",
+            ((side, source, k, d) for k, d in delta.items() if d),
+        )
+        self._db.execute("DELETE FROM contributions WHERE side = ? AND source = ? AND n = 0", (side, source))
+        self._set_source(side, source, "log", path, max(consumed, len(header_line)) + len(chunk), header)
+        self.cdc_records += records
+        return records
+
+    def forget_missing(self, side: str, present: Iterable[Path]) -> None:
+        """Drop the contribution of sources that no longer exist (e.g. deleted partitions)."""
+        keep = {str(p) for p in present}
+        for (source,) in self._db.execute("SELECT source FROM sources WHERE side = ?", (side,)).fetchall():
+            if source not in keep:
+                self._replace_contribution(side, source, {})
+                self._db.execute("DELETE FROM sources WHERE side = ? AND source = ?", (side, source))
+
+    # -- results ---------------------------------------------------------
+
+    def rows(self, side: str) -> int:
+        row = self._db.execute("SELECT rows FROM sides WHERE side = ?", (side,)).fetchone()
+        return int(row[0]) if row else 0
+
+    def columns(self, side: str) -> List[str]:
+        """Union of the snapshot headers of `side`, in first-seen order."""
+        seen: Dict[str, None] = {}
+        for (header,) in self._db.execute(
+            "SELECT header FROM sources WHERE side = ? AND kind = 'file' ORDER BY source", (side,)
+        ):
+            seen.update(dict.fromkeys(json.loads(header)))
+        return list(seen)
+
+    def keys_consistent(self) -> bool:
+        """True when every side holds exactly the same key set."""
+        partial = self._db.execute(
+            "SELECT 1 FROM presence WHERE sides < ? LIMIT 1", (len(self.sides),)
+        ).fetchone()
+        return partial is None
+
+    def duplicates(self, side: str, top: int = 10) -> Dict[str, Any]:
+        """Keys of `side` carried by more than one row, in the shape of
+        `uniqueness.find_duplicates` (the index keeps no row offsets)."""
+        dup_keys, dup_rows = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(n - 1), 0) FROM keys WHERE side = ? AND n > 1", (side,)
+        ).fetchone()
+        worst = self._db.execute(
+            "SELECT key, n FROM keys WHERE side = ? AND n > 1 ORDER BY n DESC, key LIMIT ?", (side, top)
+        ).fetchall()
+        return {
+            "rows": self.rows(side),
+            "duplicate_keys": int(dup_keys),
+            "duplicate_rows": int(dup_rows),
+            "top_duplicates": [{"key": k, "count": n, "row_offsets": []} for k, n in worst],
+            "method": "index",
+        }
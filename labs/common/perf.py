@@ -0,0 +1,269 @@
+"""
+Opt-in performance instrumentation shared by the chapter runners.
+
+Off by default: every helper here is a no-op until a chapter opens a
+`session()` with the `LABS_PERF` environment variable set.
+
+    LABS_PERF=1                     per-phase timings in result.json["perf"]
+    LABS_PERF=profile               ... plus a cProfile dump in artifacts/
+    LABS_PERF=tracemalloc           ... plus Python heap peaks per phase and
+                                    the top allocation sites in artifacts/
+    LABS_PERF=profile,tracemalloc   both
+
+A chapter's `run_lab()` wraps its work like this:
+
+    with perf.session("CH04", artifacts_dir):
+        with perf.phase("load"):
+            rows = load_csv(path)          # load_csv calls perf.count_read()
+        with perf.phase("evaluate"):
+            result = evaluate(rows)
+        perf.write_result(result, out_path)
+
+Phases nest (`evaluate/load`) and their numbers are inclusive. CPU time is
+per thread, so chapters running side by side under `scripts/run_labs.py`
+do not see each other's CPU. Peak RSS and tracemalloc peaks are
+process-wide and therefore only meaningful for a single chapter run.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore[assignment]
+
+
+ENV_VAR = "LABS_PERF"
+PROFILE_FILE = "perf_profile.prof"
+PROFILE_TEXT_FILE = "perf_profile.txt"
+TRACEMALLOC_FILE = "perf_tracemalloc.txt"
+TOP_N = 25
+
+_current: ContextVar[Optional["PerfRecorder"]] = ContextVar("labs_perf", default=None)
+_NULL = nullcontext()
+
+
+def parse_options(value: Optional[str]) -> Set[str]:
+    """`"profile,tracemalloc"` -> {"timing", "profile", "tracemalloc"}; `""`/`"0"` -> set()."""
+    tokens = {t.strip().lower() for t in (value or "").split(",") if t.strip()}
+    tokens -= {"0", "off", "false", "no"}
+    if not tokens:
+        return set()
+    return {"timing"} | (tokens & {"profile", "tracemalloc"})
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / scale, 1)
+
+
+class PerfRecorder:
+    """Collects phase timings for one chapter run."""
+
+    def __init__(
+        self,
+        chapter: str,
+        artifacts_dir: Path,
+        profile: bool = False,
+        trace_memory: bool = False,
+    ) -> None:
+        self.chapter = chapter
+        self.artifacts_dir = artifacts_dir
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.phases: List[Dict[str, Any]] = []
+        self.rows = 0
+        self.bytes_read = 0
+        self.dumps: List[str] = []
+        self._stack: List[Dict[str, Any]] = []
+        self._profiler: Optional[cProfile.Profile] = None
+        self._started_tracing = False
+        self._wall0 = 0.0
+        self._cpu0 = 0.0
+
+    def start(self) -> None:
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            try:
+                self._profiler.enable()
+            except ValueError:  # another profiler is already active
+                self._profiler = None
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.thread_time()
+
+    def stop(self) -> None:
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._dump_profile(self._profiler)
+            self._profiler = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            self._dump_tracemalloc(tracemalloc.take_snapshot())
+            if self._started_tracing:
+                tracemalloc.stop()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        path = "/".join([p["name"] for p in self._stack] + [name])
+        entry: Dict[str, Any] = {"name": path, "rows": 0, "bytes_read": 0, "heap_peak": 0}
+        if self.trace_memory and tracemalloc.is_tracing():
+            # Fold the peak so far into the enclosing phases before resetting it.
+            peak = tracemalloc.get_traced_memory()[1]
+            for outer in self._stack:
+                outer["heap_peak"] = max(outer["heap_peak"], peak)
+            tracemalloc.reset_peak()
+        self._stack.append(entry)
+        wall0 = time.perf_counter()
+        cpu0 = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall0
+            cpu = time.thread_time() - cpu0
+            self._stack.pop()
+            record: Dict[str, Any] = {
+                "name": path,
+                "wall_seconds": round(wall, 6),
+                "cpu_seconds": round(cpu, 6),
+                "rows": entry["rows"],
+                "bytes_read": entry["bytes_read"],
+                "peak_rss_mb": _peak_rss_mb(),
+            }
+            if self.trace_memory and tracemalloc.is_tracing():
+                peak = max(entry["heap_peak"], tracemalloc.get_traced_memory()[1])
+                for outer in self._stack:
+                    outer["heap_peak"] = max(outer["heap_peak"], peak)
+                record["py_heap_peak_mb"] = round(peak / (1024 * 1024), 3)
+            self.phases.append(record)
+
+    def count(self, rows: int = 0, bytes_read: int = 0) -> None:
+        self.rows += rows
+        self.bytes_read += bytes_read
+        for entry in self._stack:
+            entry["rows"] += rows
+            entry["bytes_read"] += bytes_read
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "options": sorted(
+                ["timing"]
+                + (["profile"] if self.profile else [])
+                + (["tracemalloc"] if self.trace_memory else [])
+            ),
+            "cpu_clock": "thread",
+            "total": {
+                "wall_seconds": round(time.perf_counter() - self._wall0, 6),
+                "cpu_seconds": round(time.thread_time() - self._cpu0, 6),
+                "rows": self.rows,
+                "bytes_read": self.bytes_read,
+                "peak_rss_mb": _peak_rss_mb(),
+            },
+            "phases": list(self.phases),
+            "dumps": list(self.dumps),
+        }
+
+    def _dump_profile(self, profiler: cProfile.Profile) -> None:
+        self.artifacts_dir.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(self.artifacts_dir / PROFILE_FILE))
+        buf = io.StringIO()
+        pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(TOP_N)
+        (self.artifacts_dir / PROFILE_TEXT_FILE).write_text(buf.getvalue(), encoding="utf-8")
+
+    def _dump_tracemalloc(self, snapshot: tracemalloc.Snapshot) -> None:
+        self.artifacts_dir.mkdir(parents=True, exist_ok=True)
+        lines = [f"Top {TOP_N} allocation sites for {self.chapter} (by line):"]
+        lines.extend(str(stat) for stat in snapshot.statistics("lineno")[:TOP_N])
+        (self.artifacts_dir / TRACEMALLOC_FILE).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+@contextmanager
+def session(chapter: str, artifacts_dir: Path) -> Iterator[Optional[PerfRecorder]]:
+    """Record one chapter run if `LABS_PERF` asks for it; yield the recorder or None."""
+    options = parse_options(os.environ.get(ENV_VAR))
+    if not options:
+        yield None
+        return
+
+    recorder = PerfRecorder(
+        chapter,
+        artifacts_dir,
+        profile="profile" in options,
+        trace_memory="tracemalloc" in options,
+    )
+    # Known up front so they can be listed in result.json before stop() writes them.
+    if recorder.profile:
+        recorder.dumps.extend([PROFILE_FILE, PROFILE_TEXT_FILE])
+    if recorder.trace_memory:
+        recorder.dumps.append(TRACEMALLOC_FILE)
+
+    token = _current.set(recorder)
+    recorder.start()
+    try:
+        yield recorder
+    finally:
+        recorder.stop()
+        _current.reset(token)
+
+
+def phase(name: str):
+    """Time a block inside the active session; a shared no-op otherwise."""
+    recorder = _current.get()
+    if recorder is None:
+        return _NULL
+    return recorder.phase(name)
+
+
+def count_read(path: Optional[Path] = None, rows: int = 0) -> None:
+    """Attribute a file read (its size) and/or parsed rows to the current phase."""
+    recorder = _current.get()
+    if recorder is None:
+        return
+    size = 0
+    if path is not None:
+        try:
+            size = path.stat().st_size
+        except OSError:
+            pass
+    recorder.count(rows=rows, bytes_read=size)
+
+
+def write_result(result: Dict[str, Any], path: Path) -> None:
+    """Write result.json; inside an active session, add the `perf` section first.
+
+    The `write` phase covers serializing the result body, which is done
+    once; the `perf` section is serialized afterwards and spliced in as
+    the last key, giving the same text as dumping the whole dict.
+    """
+    recorder = _current.get()
+    if recorder is None:
+        text = json.dumps(result, ensure_ascii=False, indent=2)
+    else:
+        result.pop("perf", None)
+        with recorder.phase("write"):
+            text = json.dumps(result, ensure_ascii=False, indent=2)
+        result["perf"] = recorder.report()
+        section = '"perf": ' + json.dumps(result["perf"], ensure_ascii=False, indent=2).replace("\n", "\n  ")
+        # The body ends with "\n}" (or is "{}" when empty).
+        text = ("{\n  " if text == "{}" else text[:-2] + ",\n  ") + section + "\n}"
+
+    with path.open("w", encoding="utf-8") as f:
+        f.write(text)
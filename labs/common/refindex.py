@@ -0,0 +1,237 @@
+"""
+Resolve RB-30 anchors against a local git repository, without `git`.
+
+An RB-30 anchor (`{"type": "tag", "ref": "pre-ch02-labs"}`) is only a
+rollback point if `ref` exists. `RefIndex` answers that with dict
+lookups, so a batch of thousands of change requests costs one index
+build, not one `git rev-parse` subprocess per anchor:
+
+- Refs come from `packed-refs` plus the loose files under `refs/`
+  (symbolic refs such as `HEAD` are followed).
+- The ref table is cached on disk (`labs/.cache/`, git-ignored). The
+  cache is keyed by the mtimes of `HEAD`, `packed-refs` and every
+  directory under `refs/`. Git writes refs through a lock file and a
+  rename, so any ref change invalidates it.
+- Object ids (full, or an unambiguous prefix of 7+ hex digits) are
+  looked up among loose objects and the sorted ids of the pack `.idx`
+  files, loaded once when the first id is asked for. Only existence is
+  checked, not that the object is a commit (that would mean inflating
+  it).
+
+`resolve()` accepts a full ref name (`refs/tags/v1`), a short tag,
+branch or remote-branch name (tried in that order, like git), or an
+object id. It returns the object id the ref points to, or None.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+from bisect import bisect_left
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache"
+CACHE_VERSION = 1
+SHORT_PREFIXES = ("refs/tags/", "refs/heads/", "refs/remotes/")
+MIN_ABBREV = 7
+
+_HEX = re.compile(r"[0-9a-f]{%d,40}" % MIN_ABBREV)
+_IDX_MAGIC = b"\377tOc"
+
+
+def find_git_dir(start: Path) -> Optional[Path]:
+    """The git directory of the repository containing `start` (worktree `.git` files included)."""
+    for directory in (start, *start.parents):
+        dot_git = directory / ".git"
+        if dot_git.is_dir():
+            return dot_git
+        if dot_git.is_file():
+            text = dot_git.read_text(encoding="utf-8").strip()
+            if text.startswith("gitdir:"):
+                return (directory / text[len("gitdir:"):].strip()).resolve()
+    return None
+
+
+def _common_dir(git_dir: Path) -> Path:
+    """Where refs and objects live (differs from `git_dir` in a linked worktree)."""
+    common = git_dir / "commondir"
+    if common.is_file():
+        return (git_dir / common.read_text(encoding="utf-8").strip()).resolve()
+    return git_dir
+
+
+def _stamp(git_dir: Path, common: Path) -> List[Tuple[str, int]]:
+    """(path, mtime_ns) of everything whose change means the refs may have changed."""
+    paths = [git_dir / "HEAD", common / "packed-refs"]
+    for root, dirs, _files in os.walk(common / "refs"):
+        paths.append(Path(root))
+    stamp = []
+    for path in paths:
+        try:
+            stamp.append((str(path), path.stat().st_mtime_ns))
+        except FileNotFoundError:
+            stamp.append((str(path), 0))
+    return stamp
+
+
+def _read_refs(git_dir: Path, common: Path) -> Dict[str, str]:
+    """{ref name: object id}, loose refs overriding packed ones, symbolic refs followed."""
+    raw: Dict[str, str] = {}
+    packed = common / "packed-refs"
+    if packed.exists():
+        with packed.open("r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith(("#", "^")) or not line.strip():
+                    continue  # header, or the peeled id of the annotated tag above
+                oid, name = line.split(None, 1)
+                raw[name.strip()] = oid
+    refs_dir = common / "refs"
+    for root, _dirs, files in os.walk(refs_dir):
+        for name in files:
+            if name.endswith(".lock"):
+                continue
+            path = Path(root) / name
+            raw[path.relative_to(common).as_posix()] = path.read_text(encoding="utf-8").strip()
+    head = git_dir / "HEAD"
+    if head.exists():
+        raw["HEAD"] = head.read_text(encoding="utf-8").strip()
+
+    refs: Dict[str, str] = {}
+    for name in raw:
+        value, seen = raw[name], {name}
+        while value.startswith("ref:"):
+            target = value[4:].strip()
+            if target in seen or target not in raw:
+                value = ""
+                break
+            seen.add(target)
+            value = raw[target]
+        if value:
+            refs[name] = value
+    return refs
+
+
+def _pack_ids(pack_dir: Path) -> List[bytes]:
+    """Sorted binary object ids of every pack index (v1 and v2)."""
+    ids: List[bytes] = []
+    for idx in sorted(pack_dir.glob("*.idx")):
+        data = idx.read_bytes()
+        if data[:4] == _IDX_MAGIC:
+            count = int.from_bytes(data[8 + 255 * 4: 8 + 256 * 4], "big")
+            start = 8 + 256 * 4
+            ids.extend(data[start + 20 * i: start + 20 * (i + 1)] for i in range(count))
+        else:
+            count = int.from_bytes(data[255 * 4: 256 * 4], "big")
+            start = 256 * 4
+            ids.extend(data[start + 24 * i + 4: start + 24 * (i + 1)] for i in range(count))
+    ids.sort()
+    return ids
+
+
+class RefIndex:
+    """Refs and object ids of one repository; build with `ref_index()`."""
+
+    def __init__(self, git_dir: Path, refs: Dict[str, str]) -> None:
+        self.git_dir = git_dir
+        self.common = _common_dir(git_dir)
+        self.refs = refs
+        self._packed: Optional[List[bytes]] = None
+
+    def _object(self, prefix: str) -> Optional[str]:
+        """The one object id starting with `prefix` (lowercase hex), if unique."""
+        loose_dir = self.common / "objects" / prefix[:2]
+        if len(prefix) == 40:
+            if (loose_dir / prefix[2:]).exists():
+                return prefix
+            matches = []
+        else:
+            matches = [prefix[:2] + p.name for p in loose_dir.glob(prefix[2:] + "*")] if loose_dir.is_dir() else []
+        if self._packed is None:
+            self._packed = _pack_ids(self.common / "objects" / "pack")
+        low = bytes.fromhex(prefix if len(prefix) % 2 == 0 else prefix + "0")
+        i = bisect_left(self._packed, low)
+        while i < len(self._packed) and self._packed[i].hex().startswith(prefix):
+            matches.append(self._packed[i].hex())
+            if len(set(matches)) > 1:
+                return None
+            i += 1
+        found = set(matches)
+        return found.pop() if len(found) == 1 else None
+
+    def resolve(self, ref: str) -> Optional[str]:
+        """Object id `ref` names (ref name, short name or object id), or None."""
+        ref = ref.strip()
+        if not ref:
+            return None
+        found = self.refs.get(ref)
+        if found is not None:
+            return found
+        for prefix in SHORT_PREFIXES:
+            found = self.refs.get(prefix + ref)
+            if found is not None:
+                return found
+        lowered = ref.lower()
+        if _HEX.fullmatch(lowered):
+            return self._object(lowered)
+        return None
+
+    def resolve_many(self, refs: Iterable[str]) -> Dict[str, Optional[str]]:
+        return {ref: self.resolve(ref) for ref in refs}
+
+    def export(self) -> Dict[str, Any]:
+        """The ref table as JSON (what CH07 reads from `inputs/ref_index.json`)."""
+        return {"git_dir": str(self.git_dir), "refs": dict(sorted(self.refs.items()))}
+
+
+def _cache_path(git_dir: Path) -> Path:
+    digest = hashlib.sha1(str(git_dir).encode("utf-8")).hexdigest()[:12]
+    return CACHE_DIR / f"ref_index-{digest}.json"
+
+
+def _write_cache(path: Path, payload: Dict[str, Any]) -> None:
+    # A cache that cannot be written only costs a rebuild next time.
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp, path)
+    except OSError:
+        os.unlink(tmp)
+
+
+@lru_cache(maxsize=8)
+def _load(git_dir: str, stamp: Tuple[Tuple[str, int], ...]) -> RefIndex:
+    path = Path(git_dir)
+    cache = _cache_path(path)
+    try:
+        with cache.open("r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("version") == CACHE_VERSION and [tuple(s) for s in cached.get("stamp", [])] == list(stamp):
+            return RefIndex(path, cached["refs"])
+    except (OSError, ValueError):
+        pass
+    refs = _read_refs(path, _common_dir(path))
+    _write_cache(cache, {"version": CACHE_VERSION, "stamp": list(stamp), "refs": refs})
+    return RefIndex(path, refs)
+
+
+def ref_index(repo: Path) -> RefIndex:
+    """The ref index of the repository containing `repo`; rebuilt only when refs change.
+
+    Raises ValueError when `repo` is not inside a git repository.
+    """
+    git_dir = find_git_dir(repo.resolve())
+    if git_dir is None:
+        raise ValueError(f"{repo} is not inside a git repository")
+    stamp = tuple(_stamp(git_dir, _common_dir(git_dir)))
+    return _load(str(git_dir), stamp)
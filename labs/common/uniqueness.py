@@ -0,0 +1,194 @@
+"""
+Primary-key uniqueness checks that report the duplicates.
+
+Building a `set` of keys silently collapses duplicates, so a table can
+match row counts while repeating keys. `find_duplicates` counts every
+key and keeps a few sample row offsets per duplicated key:
+
+- In memory while the number of distinct keys stays below `max_keys`
+  (one dict entry per key).
+- Past that, the keys seen so far are sorted and spilled to a temporary
+  run file, and counting starts over. At the end the sorted runs are
+  merged (`heapq.merge`) and equal keys are combined. Memory then stays
+  bounded by `max_keys` however large the table is.
+
+Row offsets are 0-based data-row positions (header excluded), counted
+across the given files in order. A row without a key (a short row, so
+the key is None) is not a key at all: it is counted in `missing_keys`
+and left out of the distinct and duplicate counts.
+
+A key may also be a tuple of column values (a composite key, e.g. a
+satellite's hub key plus load date).
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import shutil
+import tempfile
+from itertools import chain, groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .fastio import iter_rows
+
+
+DEFAULT_MAX_KEYS = 5_000_000
+SAMPLE_OFFSETS = 5
+TOP_DUPLICATES = 10
+
+# A run record: (key, count, sample offsets).
+Record = Tuple[Any, int, List[int]]
+
+
+def _spill(first: Dict[Any, int], dups: Dict[Any, List[Any]], run_dir: Path, index: int) -> Path:
+    path = run_dir / f"run-{index:05d}.jsonl"
+    with path.open("w", encoding="utf-8") as f:
+        for key in sorted(first):
+            d = dups.get(key)
+            record = (key, d[0], d[1]) if d is not None else (key, 1, [first[key]])
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+    return path
+
+
+def _read_run(path: Path) -> Iterator[Record]:
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            key, count, offsets = json.loads(line)
+            # JSON turns composite keys into lists; keep them tuples like in memory.
+            yield (tuple(key) if isinstance(key, list) else key), count, offsets
+
+
+def _merge_runs(runs: Sequence[Path], samples: int) -> Iterator[Record]:
+    """Combined (key, count, offsets) per distinct key, in key order.
+
+    Runs were written in row order and `heapq.merge` breaks ties by input
+    position, so the offsets of a key stay ascending.
+    """
+    merged = heapq.merge(*(_read_run(p) for p in runs), key=itemgetter(0))
+    for key, group in groupby(merged, key=itemgetter(0)):
+        count = 0
+        offsets: List[int] = []
+        for _, n, offs in group:
+            count += n
+            offsets.extend(offs[: samples - len(offsets)])
+        yield key, count, offsets
+
+
+def find_duplicates(
+    keys: Iterable[Optional[Hashable]],
+    max_keys: int = DEFAULT_MAX_KEYS,
+    samples: int = SAMPLE_OFFSETS,
+    top: int = TOP_DUPLICATES,
+    tmp_dir: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """Count rows, distinct keys and duplicates of a key stream.
+
+    `top_duplicates` lists the most repeated keys (count descending, then
+    key) with up to `samples` row offsets each. None keys, and composite
+    keys with a None part, only count towards `missing_keys`.
+    """
+    first: Dict[Any, int] = {}
+    dups: Dict[Any, List[Any]] = {}
+    runs: List[Path] = []
+    run_dir: Optional[Path] = None
+    rows = missing = 0
+    try:
+        for rows, key in enumerate(keys, start=1):
+            if key is None or (type(key) is tuple and None in key):
+                missing += 1
+                continue
+            offset = rows - 1
+            seen = first.get(key)
+            if seen is None:
+                first[key] = offset
+                if len(first) >= max_keys:
+                    if run_dir is None:
+                        run_dir = Path(tempfile.mkdtemp(prefix="labs-unique-", dir=tmp_dir))
+                    runs.append(_spill(first, dups, run_dir, len(runs)))
+                    first.clear()
+                    dups.clear()
+                continue
+            d = dups.get(key)
+            if d is None:
+                dups[key] = [2, [seen, offset]]
+            else:
+                d[0] += 1
+                if len(d[1]) < samples:
+                    d[1].append(offset)
+
+        if runs:
+            if first:
+                runs.append(_spill(first, dups, run_dir, len(runs)))  # type: ignore[arg-type]
+            records: Iterable[Record] = _merge_runs(runs, samples)
+        else:
+            records = chain(
+                ((k, d[0], d[1][:samples]) for k, d in dups.items()),
+                ((k, 1, []) for k in first if k not in dups),
+            )
+
+        totals = {"distinct_keys": 0, "duplicate_keys": 0, "duplicate_rows": 0}
+
+        def duplicated() -> Iterator[Record]:
+            for key, count, offsets in records:
+                totals["distinct_keys"] += 1
+                if count > 1:
+                    totals["duplicate_keys"] += 1
+                    totals["duplicate_rows"] += count - 1
+                    yield key, count, offsets
+
+        worst = heapq.nsmallest(top, duplicated(), key=lambda r: (-r[1], r[0]))
+    finally:
+        if run_dir is not None:
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+    return {
+        "rows": rows,
+        "missing_keys": missing,
+        **totals,
+        "top_duplicates": [
+            {"key": key, "count": count, "row_offsets": offsets[:samples]}
+            for key, count, offsets in worst
+        ],
+        "method": "external" if runs else "memory",
+    }
+
+
+def check_unique(
+    paths: Sequence[Path],
+    column: Union[str, Sequence[str]],
+    max_keys: int = DEFAULT_MAX_KEYS,
+    samples: int = SAMPLE_OFFSETS,
+    top: int = TOP_DUPLICATES,
+    tmp_dir: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """`find_duplicates` over one key column, or a composite key (a list of
+    columns, keys are then tuples), of one or more CSV files."""
+    if isinstance(column, str):
+        keys: Iterable[Any] = (
+            key
+            for path in paths
+            for (key,) in iter_rows(path, columns=[column], row_type="tuple")
+        )
+    else:
+        keys = (row for path in paths for row in iter_rows(path, columns=list(column), row_type="tuple"))
+    return find_duplicates(keys, max_keys=max_keys, samples=samples, top=top, tmp_dir=tmp_dir)
+
+
+def describe(table: str, report: Dict[str, Any]) -> str:
+    """One-line summary of a duplicates report for result messages."""
+    text = (
+        f"Duplicate keys in {table}: {report['duplicate_keys']} key(s) repeated,"
+        f" {report['duplicate_rows']} extra row(s)"
+    )
+    if report["top_duplicates"]:
+        worst = report["top_duplicates"][0]
+        text += f"; e.g. {worst['key']!r} x{worst['count']}"
+        if worst["row_offsets"]:
+            text += f" at rows {worst['row_offsets']}"
+    if report.get("missing_keys"):
+        text += f"; {report['missing_keys']} row(s) had no key"
+    return text + "."
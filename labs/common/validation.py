@@ -0,0 +1,318 @@
+"""
+JSON Schema validation for chapter inputs, compiled once per schema file.
+
+Each chapter keeps the schemas of its JSON inputs in `labs/chNN/schemas/`
+and validates what it loaded before evaluating anything, so a malformed
+input is rejected with a precise message instead of surfacing as a
+`KeyError` or a silently defaulted `.get()` deep inside a check.
+
+- With `jsonschema` installed (it is in `requirements.txt`) its validator
+  for the schema's draft is used.
+- Without it, the schema is compiled into plain Python closures. That
+  covers the keywords the lab schemas use (`type`, `enum`, `const`,
+  `required`, `properties`, `additionalProperties`, `items`, `minItems`,
+  `minLength`, `minimum`, `maximum`, `exclusiveMinimum`, and local
+  `$ref` into `$defs`). Any other keyword raises `ValueError` at compile
+  time rather than being skipped.
+
+Compiled validators are cached by (path, mtime), so repeated calls cost
+one `stat`. `validate_many` is the batch entry point (see
+`scripts/validate_inputs.py`); valid documents take the fast
+`is_valid` path and only invalid ones pay for error messages.
+
+Errors read `<json path>: <message>`, e.g.
+`$.files[0].hunks[0].lines_added: 'x' is not of type 'integer'`.
+"""
+
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import jsonschema
+except ImportError:
+    jsonschema = None  # type: ignore[assignment]
+
+
+MAX_ERRORS = 20
+
+# A compiled check appends "<path>: <message>" strings to `errors`.
+Check = Callable[[Any, str, List[str]], None]
+
+_ANNOTATIONS = {"$schema", "$id", "$defs", "$comment", "title", "description", "default", "examples"}
+
+_TYPES: Dict[str, Callable[[Any], bool]] = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None,
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    # As in JSON Schema, 3.0 is an integer.
+    "integer": lambda v: (isinstance(v, int) and not isinstance(v, bool))
+    or (isinstance(v, float) and v.is_integer()),
+}
+
+
+def _child(path: str, key: Any) -> str:
+    return f"{path}[{key}]" if isinstance(key, int) else f"{path}.{key}"
+
+
+def _compile(schema: Any, root: Dict[str, Any], refs: Dict[str, Check]) -> Check:
+    """Turn one (sub)schema into a Check; `refs` memoizes `$ref` targets."""
+    if schema is True or schema == {}:
+        return lambda value, path, errors: None
+    if schema is False:
+        return lambda value, path, errors: errors.append(f"{path}: no value is allowed here")
+
+    unknown = set(schema) - _ANNOTATIONS - set(_KEYWORDS)
+    if unknown:
+        raise ValueError(f"unsupported JSON Schema keyword(s) {sorted(unknown)} (install jsonschema)")
+    checks = [_KEYWORDS[k](schema, root, refs) for k in _KEYWORDS if k in schema]
+    checks = [c for c in checks if c is not None]
+    if len(checks) == 1:
+        return checks[0]
+
+    def check(value: Any, path: str, errors: List[str]) -> None:
+        for c in checks:
+            c(value, path, errors)
+
+    return check
+
+
+def _type(schema: Dict[str, Any], root: Dict[str, Any], refs: Dict[str, Check]) -> Check:
+    names = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+    tests = [_TYPES[n] for n in names]
+    label = names[0] if len(names) == 1 else names
+
+    def check(value: Any, path: str, errors: List[str]) -> None:
+        if not any(t(value) for t in tests):
+            errors.append(f"{path}: {value!r} is not of type {label!r}")
+
+    return check
+
+
+def _enum(schema: Dict[str, Any], root: Dict[str, Any], refs: Dict[str, Check]) -> Check:
+    allowed = schema["enum"]
+
+    def check(value: Any, path: str, errors: List[str]) -> None:
+        if value not in allowed:
+            errors.append(f"{path}: {value!r} is not one of {allowed!r}")
+
+    return check
+
+
+def _const(schema: Dict[str, Any], root: Dict[str, Any], refs: Dict[str, Check]) -> Check:
+    expected = schema["const"]
+
+    def check(value: Any, path: str, errors: List[str]) -> None:
+        if value != expected:
+            errors.append(f"{path}: {expected!r} was expected")
+
+    return check
+
+
+def _required(schema: Dict[str, Any], root: Dict[str, Any], refs: Dict[str, Check]) -> Check:
+    required = schema["required"]
+
+    def check(value: Any, path: str, errors: List[str]) -> None:
+        if isinstance(value, dict):
+            for key in required:
+                if key not in value:
+                    errors.append(f"{path}: {key!r} is a required property")
+
+    return check
+
+
+def _properties(schema: Dict[str, Any], root: Dict[str, Any], refs: Dict[str, Check]) -> Check:
+    props = {k: _compile(s, root, refs) for k, s in schema["properties"].items()}
+
+    def check(value: Any, path: str, errors: List[str]) -> None:
+        if isinstance(value, dict):
+            for key, c in props.items():
+                if key in value:
+                    c(value[key], _child(path, key), errors)
+
+    return check
+
+
+def _additional(schema: Dict[str, Any], root: Dict[str, Any], refs: Dict[str, Check]) -> Optional[Check]:
+    extra = schema["additionalProperties"]
+    if extra is True:
+        return None
+    known = set(schema.get("properties", {}))
+    sub = _compile(extra, root, refs) if extra is not False else None
+
+    def check(value: Any, path: str, errors: List[str]) -> None:
+        if not isinstance(value, dict):
+            return
+        for key in value:
+            if key in known:
+                continue
+            if sub is None:
+                errors.append(f"{path}: additional property {key!r} is not allowed")
+            else:
+                sub(value[key], _child(path, key), errors)
+
+    return check
+
+
+def _items(schema: Dict[str, Any], root: Dict[str, Any], refs: Dict[str, Check]) -> Check:
+    item = _compile(schema["items"], root, refs)
+
+    def check(value: Any, path: str, errors: List[str]) -> None:
+        if isinstance(value, list):
+            for i, v in enumerate(value):
+                item(v, _child(path, i), errors)
+
+    return check
+
+
+def _min_items(schema: Dict[str, Any], root: Dict[str, Any], refs: Dict[str, Check]) -> Check:
+    n = schema["minItems"]
+
+    def check(value: Any, path: str, errors: List[str]) -> None:
+        if isinstance(value, list) and len(value) < n:
+            errors.append(f"{path}: {value!r} should have at least {n} item(s)")
+
+    return check
+
+
+def _min_length(schema: Dict[str, Any], root: Dict[str, Any], refs: Dict[str, Check]) -> Check:
+    n = schema["minLength"]
+
+    def check(value: Any, path: str, errors: List[str]) -> None:
+        if isinstance(value, str) and len(value) < n:
+            errors.append(f"{path}: {value!r} is too short")
+
+    return check
+
+
+def _bound(keyword: str, fails: Callable[[Any, Any], bool], text: str) -> Callable[..., Check]:
+    def build(schema: Dict[str, Any], root: Dict[str, Any], refs: Dict[str, Check]) -> Check:
+        limit = schema[keyword]
+
+        def check(value: Any, path: str, errors: List[str]) -> None:
+            if _TYPES["number"](value) and fails(value, limit):
+                errors.append(f"{path}: {value!r} is {text} {limit!r}")
+
+        return check
+
+    return build
+
+
+def _ref(schema: Dict[str, Any], root: Dict[str, Any], refs: Dict[str, Check]) -> Check:
+    ref = schema["$ref"]
+    if not ref.startswith("#/"):
+        raise ValueError(f"only local $ref is supported without jsonschema, got {ref!r}")
+    if ref not in refs:
+        # Placeholder first, so recursive definitions terminate.
+        target: List[Check] = []
+        refs[ref] = lambda value, path, errors: target[0](value, path, errors)
+        node: Any = root
+        for part in ref[2:].split("/"):
+            node = node[part]
+        target.append(_compile(node, root, refs))
+    return refs[ref]
+
+
+_KEYWORDS: Dict[str, Callable[..., Optional[Check]]] = {
+    "$ref": _ref,
+    "type": _type,
+    "enum": _enum,
+    "const": _const,
+    "required": _required,
+    "properties": _properties,
+    "additionalProperties": _additional,
+    "items": _items,
+    "minItems": _min_items,
+    "minLength": _min_length,
+    "minimum": _bound("minimum", lambda v, n: v < n, "less than the minimum of"),
+    "maximum": _bound("maximum", lambda v, n: v > n, "greater than the maximum of"),
+    "exclusiveMinimum": _bound("exclusiveMinimum", lambda v, n: v <= n, "less than or equal to the minimum of"),
+}
+
+
+class Validator:
+    """A compiled schema; `errors(doc)` lists what is wrong with `doc`."""
+
+    def __init__(self, schema: Dict[str, Any], name: str = "schema") -> None:
+        self.name = name
+        self.schema = schema
+        if jsonschema is not None:
+            cls = jsonschema.validators.validator_for(schema)
+            cls.check_schema(schema)
+            self._impl = cls(schema)
+            self._check: Optional[Check] = None
+        else:
+            self._impl = None
+            self._check = _compile(schema, schema, {})
+
+    def is_valid(self, doc: Any) -> bool:
+        if self._impl is not None:
+            return self._impl.is_valid(doc)
+        errors: List[str] = []
+        self._check(doc, "$", errors)  # type: ignore[misc]
+        return not errors
+
+    def errors(self, doc: Any, limit: int = MAX_ERRORS) -> List[str]:
+        if self._impl is not None:
+            found = sorted(self._impl.iter_errors(doc), key=lambda e: list(map(str, e.absolute_path)))
+            return [f"{e.json_path}: {e.message}" for e in found[:limit]]
+        errors: List[str] = []
+        self._check(doc, "$", errors)  # type: ignore[misc]
+        return errors[:limit]
+
+
+@lru_cache(maxsize=None)
+def _load(path: str, mtime_ns: int) -> Validator:
+    with open(path, "r", encoding="utf-8") as f:
+        return Validator(json.load(f), Path(path).name)
+
+
+def validator(schema_path: Path) -> Validator:
+    """The compiled validator for a schema file, rebuilt only when it changes."""
+    path = schema_path.resolve()
+    return _load(str(path), path.stat().st_mtime_ns)
+
+
+def validate(schema_path: Path, doc: Any, limit: int = MAX_ERRORS) -> List[str]:
+    v = validator(schema_path)
+    return [] if v.is_valid(doc) else v.errors(doc, limit)
+
+
+def validate_many(schema_path: Path, docs: Iterable[Any], limit: int = MAX_ERRORS) -> List[List[str]]:
+    """Errors per document (empty list = valid), one compiled validator for all."""
+    v = validator(schema_path)
+    return [[] if v.is_valid(doc) else v.errors(doc, limit) for doc in docs]
+
+
+def validate_inputs(inputs: Dict[str, Tuple[Path, Any]]) -> Dict[str, List[str]]:
+    """{input name: errors} for the inputs that fail their schema.
+
+    `inputs` maps a name (e.g. "change_request.json") to (schema path, document).
+    """
+    found = {}
+    for name, (schema_path, doc) in inputs.items():
+        errors = validate(schema_path, doc)
+        if errors:
+            found[name] = errors
+    return found
+
+
+def rejected(chapter: str, change_id: Any, errors: Dict[str, List[str]]) -> Dict[str, Any]:
+    """The result for a run whose inputs failed validation; nothing was evaluated."""
+    messages = ["Input validation failed; no checks were evaluated."]
+    for name, found in errors.items():
+        messages.extend(f"{name} {e}" for e in found)
+    return {
+        "chapter": chapter,
+        "status": "reject",
+        "change_id": change_id,
+        "messages": messages,
+        "checks": {"inputs_valid": False},
+        "metrics": {"input_errors": errors},
+    }
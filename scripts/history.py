@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Query the LABS result history (dev helper).
+
+`scripts/run_labs.py` appends every chapter result to
+`labs/.history/results.sqlite` (see `labs/common/history.py`;
+`LABS_HISTORY` overrides the path).
+
+Usage:
+
+    python scripts/history.py list --chapter CH02 --status reject --days 7
+    python scripts/history.py rate --chapter CH02 --days 30
+    python scripts/history.py series --chapter CH10 --field metrics.overcommitted
+    python scripts/history.py import labs/*/artifacts/result.json
+    python scripts/history.py compact --older-than-days 90
+
+`--store` picks another history file for any subcommand.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "labs"))
+
+from common.history import DAY, HistoryStore, store_path  # noqa: E402
+
+
+def _utc(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _filters(args: argparse.Namespace) -> dict:
+    return {
+        "chapter": args.chapter.upper() if args.chapter else None,
+        "status": getattr(args, "status", None),
+        "change_id": args.change_id,
+        "since": time.time() - args.days * DAY if args.days else None,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Query the LABS result history.")
+    parser.add_argument("--store", type=Path, default=None, help="History file (default: LABS_HISTORY or labs/.history).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def with_filters(p: argparse.ArgumentParser) -> argparse.ArgumentParser:
+        p.add_argument("--chapter")
+        p.add_argument("--change-id")
+        p.add_argument("--days", type=float, default=None, help="Only the last N days.")
+        return p
+
+    p_list = with_filters(sub.add_parser("list", help="Recent runs, newest first."))
+    p_list.add_argument("--status")
+    p_list.add_argument("--limit", type=int, default=20)
+    with_filters(sub.add_parser("rate", help="Runs per status and rejection rate."))
+    p_series = with_filters(sub.add_parser("series", help="One result field over time."))
+    p_series.add_argument("--field", required=True, help='Dotted path, e.g. "metrics.overcommitted".')
+    p_import = sub.add_parser("import", help="Append existing result.json files.")
+    p_import.add_argument("files", nargs="+", type=Path)
+    p_compact = sub.add_parser("compact", help="Fold old runs into one row per day.")
+    p_compact.add_argument("--older-than-days", type=float, required=True)
+    p_compact.add_argument("--bucket-hours", type=float, default=24)
+    args = parser.parse_args(argv)
+
+    bucket_seconds = 0
+    if args.command == "compact":
+        bucket_seconds = int(args.bucket_hours * 3600)
+        if bucket_seconds <= 0:
+            parser.error(f"--bucket-hours must be at least one second (1/3600), got {args.bucket_hours}")
+
+    path = args.store or store_path()
+    if path is None:
+        parser.error("history is disabled (LABS_HISTORY=0); pass --store")
+
+    with HistoryStore(path) as store:
+        if args.command == "list":
+            for row in store.rows(limit=args.limit, **_filters(args)):
+                runs = f"  x{row['runs']}" if row["runs"] > 1 else ""
+                print(f"{_utc(row['recorded_at'])}  {row['chapter']:<5} {row['status'] or '-':<7} {row['change_id'] or '-'}{runs}")
+        elif args.command == "rate":
+            print(json.dumps(store.status_counts(**_filters(args)), indent=2))
+        elif args.command == "series":
+            for ts, value in store.series(args.field, **_filters(args)):
+                print(f"{_utc(ts)}  {json.dumps(value, ensure_ascii=False)}")
+        elif args.command == "import":
+            results = []
+            for f in args.files:
+                with f.open("r", encoding="utf-8") as fh:
+                    result = json.load(fh)
+                store.record(result, recorded_at=f.stat().st_mtime)
+                results.append(result)
+            print(f"[history] imported {len(results)} result(s) into {path}")
+        elif args.command == "compact":
+            removed = store.compact(time.time() - args.older_than_days * DAY, bucket_seconds)
+            print(f"[history] compacted {removed} row(s) in {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
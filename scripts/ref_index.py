@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Resolve RB-30 anchors against the local git repository (dev helper).
+
+Builds the ref index once (see `labs/common/refindex.py`; cached on disk
+until a ref changes) and resolves every anchor with a dict lookup:
+
+    python scripts/ref_index.py resolve pre-ch02-labs v1.2 3f2c9e1
+    python scripts/ref_index.py check requests.jsonl packs/*.json
+    python scripts/ref_index.py export              # for CH07
+
+`check` reads change requests or change packs (`.json`, or `.jsonl` with
+one per line) and reports every `rb30_anchor` of a verified type
+(`--types`, default `tag`) whose `ref` does not exist.
+
+`export` writes the ref table to `labs/ch07/inputs/ref_index.json`. CH07
+may not read outside `labs/ch07/`, so it checks tag anchors against that
+file instead of the repository.
+
+Exit code: 0 when every ref resolves, 1 otherwise.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+LABS_DIR = REPO_ROOT / "labs"
+sys.path.insert(0, str(LABS_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from common.refindex import ref_index  # noqa: E402
+from validate_inputs import iter_documents  # noqa: E402
+
+CH07_REF_INDEX = LABS_DIR / "ch07" / "inputs" / "ref_index.json"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Resolve RB-30 anchors against a local git repository.")
+    parser.add_argument("--repo", type=Path, default=REPO_ROOT, help="Repository to resolve against.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_resolve = sub.add_parser("resolve", help="Resolve refs given on the command line.")
+    p_resolve.add_argument("refs", nargs="+")
+    p_check = sub.add_parser("check", help="Check the rb30_anchor of change requests / packs.")
+    p_check.add_argument("files", nargs="+", type=Path)
+    p_check.add_argument("--types", nargs="+", default=["tag"], help="Anchor types backed by git refs.")
+    p_export = sub.add_parser("export", help="Write the ref table for CH07.")
+    p_export.add_argument("--out", type=Path, default=CH07_REF_INDEX)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        index = ref_index(args.repo)
+    except ValueError as e:
+        parser.error(str(e))
+    built = time.perf_counter() - start
+
+    if args.command == "export":
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        with args.out.open("w", encoding="utf-8") as f:
+            json.dump(index.export(), f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"[refs] {len(index.refs)} ref(s) -> {args.out}")
+        return 0
+
+    if args.command == "resolve":
+        missing = 0
+        for ref in args.refs:
+            oid = index.resolve(ref)
+            missing += oid is None
+            print(f"{ref}\t{oid or 'MISSING'}")
+        return 1 if missing else 0
+
+    checked = missing = 0
+    start = time.perf_counter()
+    for path in args.files:
+        for label, doc in iter_documents(path):
+            anchor = doc.get("rb30_anchor") if isinstance(doc, dict) else None
+            if not isinstance(anchor, dict) or anchor.get("type") not in args.types:
+                continue
+            checked += 1
+            if index.resolve(str(anchor.get("ref", ""))) is None:
+                missing += 1
+                print(f"[MISSING] {label}: rb30_anchor.ref {anchor.get('ref')!r}")
+    elapsed = time.perf_counter() - start
+    print(
+        f"[refs] {checked - missing}/{checked} anchor(s) resolve; index {built * 1000:.1f} ms,"
+        f" lookups {elapsed * 1000:.1f} ms"
+    )
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
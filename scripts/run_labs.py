@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+LABS unified runner (dev helper).
+
+Runs every chapter gate in one interpreter instead of one
+`python labs/chNN/run.py` per chapter:
+
+1. Discover `labs/chNN/run.py` and import each module in-process.
+2. Run independent chapters concurrently (thread pool).
+3. Refresh `labs/ch07/inputs/state_snapshot.json` once every other
+   chapter has written its `artifacts/result.json` (incrementally: only
+   changed results are patched in, see `labs/ch07/snapshot_labs.py`).
+4. Run CH07 last, against the fresh snapshot.
+
+Scheduling is a tiny dependency graph, so later gates can declare their
+own upstream chapters in `DEPENDENCIES`.
+
+Usage:
+
+    python scripts/run_labs.py              # all chapters
+    python scripts/run_labs.py CH04 CH10    # a subset
+    python scripts/run_labs.py --jobs 4
+    python scripts/run_labs.py --perf profile   # same as LABS_PERF=profile
+    python scripts/run_labs.py --watch          # re-run what each edit affects
+
+With `--watch`, the runner stays up after the first run and re-runs
+only the chapters an edit affects (see `WATCH_MAP`), plus the snapshot
+and CH07 downstream of them. Edits are debounced. It waits on
+filesystem notifications when `watchdog` is installed and otherwise
+polls with one stat pass over `labs/` per tick.
+
+Exit code: 0 when every chapter accepts, 1 when any chapter rejects,
+2 when any chapter crashed or was skipped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import importlib.util
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+LABS_DIR = REPO_ROOT / "labs"
+
+if str(LABS_DIR) not in sys.path:
+    sys.path.insert(0, str(LABS_DIR))
+
+from common import history  # noqa: E402
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None  # type: ignore[assignment,misc]
+
+SNAPSHOT_TASK = "SNAPSHOT"
+
+# Extra edges on top of "every chapter is independent".
+# SNAPSHOT's upstream (all other selected chapters) is filled in at runtime.
+DEPENDENCIES: Dict[str, List[str]] = {
+    "CH07": [SNAPSHOT_TASK],
+}
+
+# --watch: what an edited file (relative to labs/) invalidates; first match
+# wins. "*" is every chapter, "CHAPTER" the chapter directory the file is
+# in, None nothing. Downstream tasks (SNAPSHOT, CH07) are added on top.
+WATCH_MAP: List[Tuple[str, Optional[str]]] = [
+    ("*/__pycache__/*", None),
+    (".history/*", None),
+    ("*.lcol", None),
+    ("ch07/inputs/state_snapshot.index.*", None),
+    ("ch07/artifacts/*", None),
+    ("*/artifacts/result.json", SNAPSHOT_TASK),
+    ("*/artifacts/*", None),
+    ("common/*", "*"),
+    ("ch[0-9][0-9]/*", "CHAPTER"),
+]
+
+# Files the gates write themselves; changes to them during a run are ours.
+GENERATED = ("*/artifacts/*", "*.lcol", "ch07/inputs/state_snapshot*")
+
+
+def discover_chapters(labs_dir: Path = LABS_DIR) -> Dict[str, Path]:
+    """Return {"CH02": labs/ch02/run.py, ...} in chapter order."""
+    return {
+        path.parent.name.upper(): path
+        for path in sorted(labs_dir.glob("ch[0-9][0-9]/run.py"))
+    }
+
+
+def import_module(name: str, path: Path) -> ModuleType:
+    """Import `path` as `name`, with its directory importable for siblings."""
+    chapter_dir = str(path.parent)
+    sys.path.insert(0, chapter_dir)
+    try:
+        spec = importlib.util.spec_from_file_location(name, path)
+        if spec is None or spec.loader is None:
+            raise ImportError(f"Cannot import {path}")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+        return module
+    finally:
+        sys.path.remove(chapter_dir)
+
+
+def _recorded(run_lab: Callable[[], Optional[Dict[str, Any]]]) -> Callable[[], Optional[Dict[str, Any]]]:
+    """Append the chapter's result to the run history (see `labs/common/history.py`).
+
+    Recording lives here rather than in the chapters: CH07 may not write
+    outside `labs/ch07/**`, and a plain `python labs/chNN/run.py` stays
+    free of side effects beyond its own artifacts.
+    """
+    def task() -> Optional[Dict[str, Any]]:
+        result = run_lab()
+        if isinstance(result, dict):
+            history.record(result)
+        return result
+    return task
+
+
+def _failed_import(error: Exception) -> Callable[[], Optional[Dict[str, Any]]]:
+    def task() -> Optional[Dict[str, Any]]:
+        raise error
+    return task
+
+
+def build_tasks(chapters: Dict[str, Path]) -> Dict[str, Callable[[], Optional[Dict[str, Any]]]]:
+    """Import every chapter up front (serially) and return runnable tasks.
+
+    Imports happen on the main thread because they touch `sys.path`;
+    a chapter that fails to import becomes a task that re-raises.
+    """
+    tasks: Dict[str, Callable[[], Optional[Dict[str, Any]]]] = {}
+    for chapter, path in chapters.items():
+        try:
+            module = import_module(f"labs_{chapter.lower()}_run", path)
+            tasks[chapter] = _recorded(module.run_lab)
+        except Exception as e:  # noqa: BLE001
+            tasks[chapter] = _failed_import(e)
+
+    if "CH07" in chapters:
+        try:
+            snapshot = import_module("labs_ch07_snapshot", LABS_DIR / "ch07" / "snapshot_labs.py")
+
+            def refresh() -> Optional[Dict[str, Any]]:
+                snapshot.refresh_snapshot()
+                return None
+
+            tasks[SNAPSHOT_TASK] = refresh
+        except Exception as e:  # noqa: BLE001
+            tasks[SNAPSHOT_TASK] = _failed_import(e)
+    return tasks
+
+
+def dependency_graph(tasks: Dict[str, Any]) -> Dict[str, Set[str]]:
+    graph: Dict[str, Set[str]] = {name: set() for name in tasks}
+    for name, deps in DEPENDENCIES.items():
+        if name in graph:
+            graph[name].update(d for d in deps if d in graph)
+    if SNAPSHOT_TASK in graph:
+        graph[SNAPSHOT_TASK] = {
+            name for name in tasks if name not in (SNAPSHOT_TASK, "CH07")
+        }
+    return graph
+
+
+def run_graph(
+    tasks: Dict[str, Callable[[], Optional[Dict[str, Any]]]],
+    graph: Dict[str, Set[str]],
+    jobs: int,
+) -> Dict[str, Dict[str, Any]]:
+    """Run tasks as soon as their dependencies finish; return per-task outcomes."""
+    outcomes: Dict[str, Dict[str, Any]] = {}
+    pending = dict(graph)
+    running: Dict[Future, str] = {}
+
+    def timed(name: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            result = tasks[name]()
+        except Exception as e:  # noqa: BLE001
+            return {
+                "outcome": "error",
+                "seconds": time.perf_counter() - start,
+                "reason": f"{type(e).__name__}: {e}",
+            }
+        status = result.get("status") if isinstance(result, dict) else "done"
+        return {"outcome": status, "seconds": time.perf_counter() - start}
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for name in sorted(pending):
+                deps = pending[name]
+                failed = sorted(
+                    d for d in deps if outcomes.get(d, {}).get("outcome") in ("error", "skipped")
+                )
+                if failed:
+                    outcomes[name] = {"outcome": "skipped", "seconds": 0.0, "reason": f"upstream failed: {failed}"}
+                    del pending[name]
+                elif all(d in outcomes for d in deps):
+                    running[pool.submit(timed, name)] = name
+                    del pending[name]
+
+            if not running:
+                if pending:
+                    raise RuntimeError(f"Dependency cycle among: {sorted(pending)}")
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                outcomes[running.pop(future)] = future.result()
+    return outcomes
+
+
+def exit_code(outcomes: Dict[str, Dict[str, Any]]) -> int:
+    values = [o["outcome"] for o in outcomes.values()]
+    if any(v in ("error", "skipped") for v in values):
+        return 2
+    if any(v == "reject" for v in values):
+        return 1
+    return 0
+
+
+def print_outcomes(chapters: Iterable[str], outcomes: Dict[str, Dict[str, Any]], wall: float) -> int:
+    order = [c for c in chapters if c != "CH07"] + [SNAPSHOT_TASK, "CH07"]
+    for name in (n for n in order if n in outcomes):
+        o = outcomes[name]
+        line = f"[{name}] {o['outcome']:<7} {o['seconds'] * 1000:9.1f} ms"
+        if "reason" in o:
+            line += f"  ({o['reason']})"
+        print(line)
+    code = exit_code(outcomes)
+    print(f"[LABS] {len(outcomes)} task(s) in {wall * 1000:.1f} ms, exit={code}")
+    return code
+
+
+def run_once(chapters: Dict[str, Path], jobs: int, only: Optional[Set[str]] = None) -> int:
+    """Run `chapters` (or just the tasks in `only`) and print the outcomes."""
+    wall_start = time.perf_counter()
+    tasks = build_tasks(chapters)
+    if only is not None:
+        tasks = {name: task for name, task in tasks.items() if name in only}
+    outcomes = run_graph(tasks, dependency_graph(tasks), max(1, jobs))
+    return print_outcomes(chapters, outcomes, time.perf_counter() - wall_start)
+
+
+# --- watch mode ---------------------------------------------------------
+
+
+def scan(labs_dir: Path = LABS_DIR) -> Dict[str, Tuple[int, int]]:
+    """{path relative to labs/: (mtime_ns, size)} for every file, in one pass."""
+    stamps: Dict[str, Tuple[int, int]] = {}
+    stack = [labs_dir]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in ("__pycache__", ".history"):
+                        stack.append(Path(entry.path))
+                elif entry.is_file():
+                    st = entry.stat()
+                    stamps[Path(entry.path).relative_to(labs_dir).as_posix()] = (st.st_mtime_ns, st.st_size)
+    return stamps
+
+
+def changed_paths(before: Dict[str, Tuple[int, int]], after: Dict[str, Tuple[int, int]]) -> Set[str]:
+    """Paths added, removed or modified between two scans."""
+    return {p for p in before.keys() | after.keys() if before.get(p) != after.get(p)}
+
+
+def affected_tasks(paths: Iterable[str], chapters: Dict[str, Path]) -> Set[str]:
+    """Tasks to re-run for `paths`: the mapped chapters plus everything downstream."""
+    hit: Set[str] = set()
+    for path in paths:
+        target = next((t for pattern, t in WATCH_MAP if fnmatch.fnmatch(path, pattern)), None)
+        if target == "*":
+            hit.update(chapters)
+        elif target == "CHAPTER":
+            hit.add(path.split("/", 1)[0].upper())
+        elif target is not None:
+            hit.add(target)
+    hit &= set(chapters) | {SNAPSHOT_TASK}
+    if hit - {"CH07"} and "CH07" in chapters:
+        hit.update((SNAPSHOT_TASK, "CH07"))
+    return hit
+
+
+def forget_lab_modules(labs_dir: Path = LABS_DIR) -> None:
+    """Drop cached lab modules so the next `build_tasks` imports edited code."""
+    root = str(labs_dir)
+    for name, module in list(sys.modules.items()):
+        if (getattr(module, "__file__", None) or "").startswith(root):
+            del sys.modules[name]
+
+
+def _wakeup(labs_dir: Path) -> Tuple[threading.Event, Any]:
+    """An Event set on any filesystem event under `labs_dir` (watchdog), else (Event, None)."""
+    event = threading.Event()
+    if Observer is None:
+        return event, None
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, _event: Any) -> None:
+            event.set()
+
+    observer = Observer()
+    observer.schedule(Handler(), str(labs_dir), recursive=True)
+    observer.start()
+    return event, observer
+
+
+def _absorb_own_writes(before: Dict[str, Tuple[int, int]]) -> Dict[str, Tuple[int, int]]:
+    """New baseline after a run: what the gates wrote is accepted, other edits stay pending."""
+    after = scan()
+    baseline = dict(before)
+    for path in changed_paths(before, after):
+        if not any(fnmatch.fnmatch(path, pattern) for pattern in GENERATED):
+            continue
+        if path in after:
+            baseline[path] = after[path]
+        else:
+            baseline.pop(path, None)
+    return baseline
+
+
+def watch(chapters: Dict[str, Path], jobs: int, interval: float, debounce: float) -> int:
+    """Run everything once, then re-run the tasks affected by each batch of edits."""
+    baseline = scan()
+    run_once(chapters, jobs)
+    baseline = _absorb_own_writes(baseline)
+    event, observer = _wakeup(LABS_DIR)
+    mode = "filesystem events" if observer is not None else f"polling every {interval:g}s"
+    print(f"[watch] watching {LABS_DIR} ({mode}); Ctrl-C to stop")
+    try:
+        while True:
+            # With notifications the timeout is only a safety net.
+            event.wait(interval if observer is None else max(interval, 5.0))
+            event.clear()
+            current = scan()
+            changed = changed_paths(baseline, current)
+            if not changed:
+                continue
+            # Debounce: wait until a scan shows no further edits.
+            while True:
+                time.sleep(debounce)
+                settled = scan()
+                if settled == current:
+                    break
+                changed |= changed_paths(current, settled)
+                current = settled
+            baseline = current
+            tasks = affected_tasks(changed, chapters)
+            if not tasks:
+                continue
+            shown = sorted(changed)
+            print(f"\n[watch] {', '.join(shown[:5])}{' ...' if len(shown) > 5 else ''} -> {', '.join(sorted(tasks))}")
+            if any(p.endswith(".py") for p in changed):
+                forget_lab_modules()
+            selected = {c: p for c, p in chapters.items() if c in tasks}
+            run_once(selected, jobs, tasks)
+            baseline = _absorb_own_writes(baseline)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run LABS chapter gates in one process.")
+    parser.add_argument("chapters", nargs="*", help="Chapters to run (e.g. CH04 CH10); default: all.")
+    parser.add_argument("--jobs", type=int, default=4, help="Maximum chapters running at once.")
+    parser.add_argument(
+        "--perf",
+        metavar="OPTIONS",
+        help="Add a perf section to each result.json (1, profile, tracemalloc; comma-separated).",
+    )
+    parser.add_argument("--watch", action="store_true", help="Keep running; re-run the chapters each edit affects.")
+    parser.add_argument("--interval", type=float, default=0.25, help="--watch poll interval in seconds.")
+    parser.add_argument("--debounce", type=float, default=0.1, help="--watch quiet period before re-running.")
+    args = parser.parse_args(argv)
+    if args.perf:
+        os.environ["LABS_PERF"] = args.perf
+
+    chapters = discover_chapters()
+    if args.chapters:
+        wanted = {c.upper() for c in args.chapters}
+        unknown = sorted(wanted - set(chapters))
+        if unknown:
+            parser.error(f"unknown chapters: {unknown}")
+        chapters = {c: p for c, p in chapters.items() if c in wanted}
+
+    if args.watch:
+        return watch(chapters, args.jobs, args.interval, args.debounce)
+    return run_once(chapters, args.jobs)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Validate LABS input documents against their JSON Schemas (dev helper).
+
+Every chapter already validates its own inputs before evaluating them;
+this script checks them all at once, or checks a batch of candidate
+documents (e.g. generated change requests) before they reach a gate.
+
+Usage:
+
+    python scripts/validate_inputs.py                  # every lab input
+    python scripts/validate_inputs.py --schema labs/ch07/schemas/change_pack.schema.json \\
+        packs/*.json more_packs.jsonl
+
+`.jsonl` files hold one document per line. One compiled validator is
+used for the whole batch. Exit code: 0 when everything is valid, 1
+otherwise.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Tuple
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+LABS_DIR = REPO_ROOT / "labs"
+sys.path.insert(0, str(LABS_DIR))
+
+from common.validation import validate_many  # noqa: E402
+
+# (input document, schema), relative to labs/.
+LAB_INPUTS: List[Tuple[str, str]] = [
+    ("ch02/inputs/boundary_config.json", "ch02/schemas/boundary_config.schema.json"),
+    ("ch02/inputs/change_request.json", "ch02/schemas/change_request.schema.json"),
+    ("ch03/inputs/integration_pipeline.json", "ch03/schemas/integration_pipeline.schema.json"),
+    ("ch03/inputs/sli_slo_config.json", "ch03/schemas/sli_slo_config.schema.json"),
+    ("ch05/inputs/pipeline.json", "ch05/schemas/pipeline.schema.json"),
+    ("ch07/inputs/ai_generated_change_pack_example.json", "ch07/schemas/change_pack.schema.json"),
+    ("ch08/inputs/pipeline.json", "ch08/schemas/pipeline.schema.json"),
+    ("ch09/inputs/ch09_migration_plan.json", "ch09/schemas/migration_plan.schema.json"),
+    ("ch10/inputs/workloads.json", "ch10/schemas/workloads.schema.json"),
+    ("ch10/inputs/warehouses.json", "ch10/schemas/warehouses.schema.json"),
+]
+
+
+def iter_documents(path: Path) -> Iterator[Tuple[str, Any]]:
+    """(label, document) for a .json file or each line of a .jsonl file."""
+    with path.open("r", encoding="utf-8") as f:
+        if path.suffix != ".jsonl":
+            yield str(path), json.load(f)
+            return
+        for n, line in enumerate(f, start=1):
+            if line.strip():
+                yield f"{path}:{n}", json.loads(line)
+
+
+def report(labels: List[str], results: List[List[str]]) -> int:
+    invalid = 0
+    for label, errors in zip(labels, results):
+        if errors:
+            invalid += 1
+            print(f"[INVALID] {label}")
+            for e in errors:
+                print(f"    {e}")
+    return invalid
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Validate LABS inputs against their JSON Schemas.")
+    parser.add_argument("--schema", type=Path, help="Validate FILES against this schema instead of the lab inputs.")
+    parser.add_argument("files", nargs="*", type=Path)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.schema is None:
+        if args.files:
+            parser.error("FILES need --schema")
+        labels = [doc for doc, _ in LAB_INPUTS]
+        results = []
+        for doc, schema in LAB_INPUTS:
+            with (LABS_DIR / doc).open("r", encoding="utf-8") as f:
+                results.extend(validate_many(LABS_DIR / schema, [json.load(f)]))
+    else:
+        labels, docs = [], []
+        for path in args.files:
+            for label, doc in iter_documents(path):
+                labels.append(label)
+                docs.append(doc)
+        results = validate_many(args.schema, docs)
+    elapsed = time.perf_counter() - start
+
+    invalid = report(labels, results)
+    rate = f", {len(results) / elapsed:,.0f} docs/s" if elapsed > 0 and len(results) > 1 else ""
+    print(f"[validate] {len(results) - invalid}/{len(results)} valid in {elapsed * 1000:.1f} ms{rate}")
+    return 1 if invalid else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())